@@ -1,8 +1,7 @@
 # adapters/selenium/board_reader.py
-from typing import List, Tuple, Optional
+from typing import List
 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.remote.webdriver import WebDriver
+from core.types import BoardState, CellChange
 
 
 def parse_cell_value_from_class(class_name: str) -> int:
@@ -26,26 +25,27 @@ def parse_cell_value_from_class(class_name: str) -> int:
     return -1
 
 
-def read_board_from_snapshot(
-    snapshot: List[str],
-    rows: int,
-    cols: int,
-    field_prev: Optional[List[List[int]]] = None,
-    mine_prev: Optional[List[List[int]]] = None,
-) -> Tuple[List[List[int]], List[List[int]]]:
-
-    field = [row[:] for row in field_prev] if field_prev is not None else [[-1]*cols for _ in range(rows)]
-    mine  = [row[:] for row in mine_prev]  if mine_prev  is not None else [[-1]*cols for _ in range(rows)]
+def read_board_from_snapshot(snapshot: List[str], board: BoardState) -> List[CellChange]:
+    """
+    Обновляет board.field/board.mine на месте и возвращает только новые открытые клетки (r, c, v).
+    Уже открытые клетки не перечитываем (кеш как раньше) — копий матриц нет.
+    """
+    rows, cols = board.rows, board.cols
+    field, mine = board.field, board.mine
+    changes: List[CellChange] = []
 
     for r in range(rows):
         base = r * cols
+        frow = field[r]
         for c in range(cols):
-            if field_prev is not None and field_prev[r][c] != -1:
-                continue  # кеш как раньше
+            if frow[c] != -1:
+                continue
 
             v = parse_cell_value_from_class(snapshot[base + c])
-            field[r][c] = v
             if v != -1:
+                frow[c] = v
                 mine[r][c] = 0
+                changes.append((r, c, v))
 
-    return field, mine
+    board.touch(changes)
+    return changes
@@ -1,130 +1,103 @@
-from typing import Iterable, Tuple, Set
+from typing import Iterable, Tuple
 from selenium.webdriver.remote.webdriver import WebDriver
 
 
-def click_action(driver: WebDriver, action):
-    """
-    Надёжный левый клик по клетке (data-x=col, data-y=row).
-    Делает mousedown+mouseup+click, потому что игра часто реагирует именно на mousedown.
-    """
-    res = driver.execute_script(
-        """
-        const x = arguments[0], y = arguments[1];
-
-        const el = document.querySelector(`#AreaBlock [data-x="${x}"][data-y="${y}"]`);
-        if (!el) return { ok: false, reason: "not_found" };
-
-        // на всякий: чтобы элемент был в видимой области
-        el.scrollIntoView({block: "center", inline: "center"});
-
-        const rect = el.getBoundingClientRect();
-        const cx = rect.left + rect.width / 2;
-        const cy = rect.top  + rect.height / 2;
-
-        const opts = {
-          bubbles: true,
-          cancelable: true,
-          view: window,
-          clientX: cx,
-          clientY: cy,
-          button: 0
-        };
-
-        el.dispatchEvent(new MouseEvent("mousedown", opts));
-        el.dispatchEvent(new MouseEvent("mouseup", opts));
-        el.dispatchEvent(new MouseEvent("click", opts));
-
-        return { ok: true, cls: el.className };
-        """,
-        action.c,  # data-x = col
-        action.r,  # data-y = row
-    )
-
-    if not res or not res.get("ok"):
-        raise RuntimeError(f"click_action failed: {res}")
+# Оверлей подсветки: один canvas поверх #AreaBlock вместо boxShadow на каждой клетке.
+# codes — строка длины rows*cols: '0' нет, '1' risk (жёлтый), '2' safe (зелёный), '3' mine (красный).
+# Перерисовываются только клетки, у которых код изменился с прошлого вызова.
+OVERLAY_JS = """
+function msOverlay(codes, cols, rows) {
+  const area = document.getElementById('AreaBlock');
+  if (!area) return -1;
+
+  let st = window.__msOverlay;
+  const stale = !st || st.area !== area || st.cols !== cols || st.rows !== rows ||
+                !st.canvas.isConnected || st.w !== area.clientWidth || st.h !== area.clientHeight;
+
+  if (stale) {
+    if (st && st.canvas) st.canvas.remove();
+
+    const first = area.querySelector('[data-x="0"][data-y="0"]');
+    const last = area.querySelector(`[data-x="${cols - 1}"][data-y="${rows - 1}"]`);
+    if (!first || !last) return -1;
+
+    if (getComputedStyle(area).position === 'static') area.style.position = 'relative';
+
+    const ar = area.getBoundingClientRect();
+    const fr = first.getBoundingClientRect();
+    const lr = last.getBoundingClientRect();
+
+    const canvas = document.createElement('canvas');
+    canvas.id = 'ms-overlay';
+    canvas.width = area.clientWidth;
+    canvas.height = area.clientHeight;
+    canvas.style.cssText = 'position:absolute;left:0;top:0;pointer-events:none;z-index:1000;';
+    area.appendChild(canvas);
+
+    st = window.__msOverlay = {
+      area, canvas, ctx: canvas.getContext('2d'), cols, rows,
+      w: area.clientWidth, h: area.clientHeight,
+      ox: fr.left - ar.left - area.clientLeft,
+      oy: fr.top - ar.top - area.clientTop,
+      cw: (lr.right - fr.left) / cols,
+      ch: (lr.bottom - fr.top) / rows,
+      prev: '0'.repeat(cols * rows),
+    };
+  }
+
+  const COLORS = [null, 'rgba(255, 214, 0, 0.25)', 'rgba(0, 200, 83, 0.25)', 'rgba(213, 0, 0, 0.25)'];
+  const ctx = st.ctx;
+  let dirty = 0;
+  for (let i = 0; i < codes.length; i++) {
+    const code = codes.charCodeAt(i) - 48;
+    if (code === st.prev.charCodeAt(i) - 48) continue;
+
+    const x = st.ox + (i % cols) * st.cw;
+    const y = st.oy + Math.floor(i / cols) * st.ch;
+    ctx.clearRect(x, y, st.cw, st.ch);
+    if (code > 0) {
+      ctx.fillStyle = COLORS[code];
+      ctx.fillRect(x + 1, y + 1, st.cw - 2, st.ch - 2);
+    }
+    dirty++;
+  }
+  st.prev = codes;
+  return dirty;
+}
+"""
+
+
+def encode_highlight(
+    safe_cells: Iterable[Tuple[int, int]],
+    mine_cells: Iterable[Tuple[int, int]],
+    risk_cells: Iterable[Tuple[int, int]],
+    rows: int,
+    cols: int,
+) -> str:
+    """Компактный массив цветов по клеткам (см. OVERLAY_JS). Приоритет: mine > safe > risk."""
+    codes = bytearray(b"0" * (rows * cols))
+    for cells, ch in ((risk_cells, 49), (safe_cells, 50), (mine_cells, 51)):
+        for r, c in cells:
+            codes[r * cols + c] = ch
+    return codes.decode("ascii")
 
 
 def clear_highlights(driver: WebDriver):
     driver.execute_script("""
-        const area = document.getElementById('AreaBlock');
-        if (!area) return;
-        const els = area.querySelectorAll('[data-x][data-y]');
-        for (const el of els) {
-            el.style.boxShadow = '';
-            el.style.borderRadius = '';
-        }
+        const st = window.__msOverlay;
+        if (!st || !st.canvas) return;
+        st.ctx.clearRect(0, 0, st.canvas.width, st.canvas.height);
+        st.prev = '0'.repeat(st.cols * st.rows);
     """)
 
 
-def highlight_cells(
-    driver: WebDriver,
-    safe_cells: Iterable[Tuple[int, int]],
-    mine_cells: Iterable[Tuple[int, int]],
-    risk_cells: Iterable[Tuple[int, int]],
-    prev: Set[Tuple[int, int]],
-):
-    safe_cells = set(safe_cells)
-    mine_cells = set(mine_cells)
-    risk_cells = set(risk_cells)
-
-    # приоритет: красный (mine) перекрывает всё, зелёный перекрывает жёлтый
-    risk_cells -= safe_cells
-    risk_cells -= mine_cells
-    safe_cells -= mine_cells
-
-    now = safe_cells | mine_cells | risk_cells
-    to_clear = prev - now
-
-    driver.execute_script(
-        """
-        const safe = arguments[0];
-        const mines = arguments[1];
-        const risk = arguments[2];
-        const clear = arguments[3];
-
-        function getEl(x,y){
-          return document.querySelector(`#AreaBlock [data-x="${x}"][data-y="${y}"]`);
-        }
-        function clearEl(el){
-          if (!el) return;
-          el.style.boxShadow = '';
-          el.style.borderRadius = '';
-        }
-        function mark(el, rgba){
-          if (!el) return;
-          el.style.borderRadius = '4px';
-          el.style.boxShadow = `inset 0 0 0 9999px ${rgba}`;
-        }
-
-        // clear old
-        for (let i=0;i<clear.length;i++){
-          const [x,y] = clear[i];
-          clearEl(getEl(x,y));
-        }
-
-        // risk yellow
-        for (let i=0;i<risk.length;i++){
-          const [x,y] = risk[i];
-          mark(getEl(x,y), 'rgba(255, 214, 0, 0.25)');
-        }
-
-        // safe green
-        for (let i=0;i<safe.length;i++){
-          const [x,y] = safe[i];
-          mark(getEl(x,y), 'rgba(0, 200, 83, 0.25)');
-        }
-
-        // mines red
-        for (let i=0;i<mines.length;i++){
-          const [x,y] = mines[i];
-          mark(getEl(x,y), 'rgba(213, 0, 0, 0.25)');
-        }
-        """,
-        [[c, r] for (r, c) in safe_cells],
-        [[c, r] for (r, c) in mine_cells],
-        [[c, r] for (r, c) in risk_cells],
-        [[c, r] for (r, c) in to_clear],
-    )
-
-    prev.clear()
-    prev.update(now)
\ No newline at end of file
+def start_new_game(driver: WebDriver):
+    """Клик по смайлику — новая игра без перезагрузки страницы."""
+    ok = driver.execute_script("""
+        const face = document.getElementById('top_area_face');
+        if (!face) return false;
+        face.click();
+        return true;
+    """)
+    if not ok:
+        raise RuntimeError("start_new_game failed: #top_area_face not found")
@@ -1,28 +1,37 @@
-import json
+"""
+Драйверы Chrome: свежий запуск, подключение к уже запущенному браузеру и пул тёплых headless-браузеров.
+
+    # браузер держим открытым между запусками бота, бот только подключается:
+    python -m adapters.selenium.create_driver launch --port 9222
+    python -m cli selenium --attach 127.0.0.1:9222
+"""
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
-def make_driver(start_url: str):
-    opts = Options()
+# профиль по умолчанию — chrome_profile в корне проекта; MS_CHROME_PROFILE переопределяет
+DEFAULT_PROFILE_DIR = os.environ.get("MS_CHROME_PROFILE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "chrome_profile")
 
-    # Профиль (см. ниже про cookies) — самый мощный способ "как обычный браузер"
-    opts.add_argument(r"--user-data-dir=E:\Projects\Mineswepper\chrome_profile")
-    opts.add_argument("--profile-directory=Default")
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
 
-    # Убираем явные флаги automation (не 100% гарантия, но часто помогает)
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
-    opts.add_experimental_option("useAutomationExtension", False)
-
-    # Нормальный user-agent
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    )
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 
-    driver = webdriver.Chrome(options=opts)
 
-    # CDP headers: Accept-Language и т.п.
+def _stealth(driver):
+    """CDP: Accept-Language и т.п., и без navigator.webdriver (часто проверяют). Для реплики не нужно."""
     driver.execute_cdp_cmd("Network.enable", {})
     driver.execute_cdp_cmd("Network.setExtraHTTPHeaders", {
         "headers": {
@@ -30,13 +39,240 @@ def make_driver(start_url: str):
             "DNT": "1",
         }
     })
-
-    # Уберём navigator.webdriver (часто проверяют)
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
         "source": """
             Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
         """
     })
 
-    driver.get(start_url)
-    return driver
\ No newline at end of file
+
+def _same_page(current: str, url: str) -> bool:
+    """Уже на этом сайте и пути (query/hash не важны — игру выбирают на странице)."""
+    a, b = urlsplit(current or ""), urlsplit(url)
+    return (a.scheme, a.netloc, a.path.rstrip("/")) == (b.scheme, b.netloc, b.path.rstrip("/"))
+
+
+def make_driver(start_url: Optional[str], profile_dir: Optional[str] = None, headless: bool = False,
+                debugger_address: Optional[str] = None, stealth: bool = True):
+    """
+    debugger_address — "host:port" уже запущенного Chrome (--remote-debugging-port): подключаемся
+                        без запуска; если вкладка уже на start_url, заново не грузим.
+    profile_dir — каталог профиля (cookies, логин); None — DEFAULT_PROFILE_DIR.
+                  Для параллельных сессий у каждой свой каталог, иначе Chrome не даст открыть профиль дважды.
+    stealth — CDP-заголовки и navigator.webdriver; на локальной реплике выключаем (экономит старт).
+    start_url=None — никуда не переходить.
+    """
+    opts = Options()
+
+    if debugger_address:
+        # к чужому браузеру флаги запуска не применяются — только адрес
+        opts.debugger_address = debugger_address
+        driver = webdriver.Chrome(options=opts)
+        if stealth:
+            _stealth(driver)
+        if start_url and not _same_page(driver.current_url, start_url):
+            driver.get(start_url)
+        return driver
+
+    opts.add_argument(f"--user-data-dir={profile_dir or DEFAULT_PROFILE_DIR}")
+    opts.add_argument("--profile-directory=Default")
+
+    if headless:
+        opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1600,1000")
+        opts.add_argument("--no-sandbox")
+        opts.add_argument("--disable-dev-shm-usage")
+
+    # Убираем явные флаги automation (не 100% гарантия, но часто помогает)
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_experimental_option("excludeSwitches", ["enable-automation"])
+    opts.add_experimental_option("useAutomationExtension", False)
+    opts.add_argument(f"--user-agent={USER_AGENT}")
+
+    driver = webdriver.Chrome(options=opts)
+    if stealth:
+        _stealth(driver)
+    if start_url:
+        driver.get(start_url)
+    return driver
+
+
+def detach_driver(driver):
+    """Отключиться от браузера, к которому подключались (debugger_address), не закрывая его: только chromedriver."""
+    driver.service.stop()
+
+
+# -------------------- браузер для attach --------------------
+
+def find_chrome() -> str:
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    if sys.platform == "win32":
+        for base in (os.environ.get("PROGRAMFILES", ""), os.environ.get("PROGRAMFILES(X86)", ""),
+                     os.environ.get("LOCALAPPDATA", "")):
+            path = os.path.join(base, "Google", "Chrome", "Application", "chrome.exe")
+            if base and os.path.exists(path):
+                return path
+    raise RuntimeError("Chrome/Chromium not found; pass the binary path explicitly")
+
+
+def launch_browser(port: int = 9222, profile_dir: Optional[str] = None, url: Optional[str] = None,
+                   headless: bool = False, binary: Optional[str] = None, wait: float = 15.0) -> subprocess.Popen:
+    """
+    Запустить Chrome с --remote-debugging-port и дождаться порта. Процесс живёт отдельно от бота:
+    make_driver(..., debugger_address=f"127.0.0.1:{port}") подключается за доли секунды.
+    """
+    args = [binary or find_chrome(), f"--remote-debugging-port={port}",
+            f"--user-data-dir={profile_dir or DEFAULT_PROFILE_DIR}", "--no-first-run", "--no-default-browser-check"]
+    if headless:
+        args += ["--headless=new", "--window-size=1600,1000", "--no-sandbox", "--disable-dev-shm-usage"]
+    if url:
+        args.append(url)
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Chrome exited with code {proc.returncode}")
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError(f"Chrome did not open the debugging port {port} in {wait}s")
+
+
+# -------------------- пул тёплых браузеров --------------------
+
+class BrowserPool:
+    """
+    size заранее запущенных headless-драйверов (каждый со своим временным профилем), запускаются
+    в фоне параллельно. acquire() отдаёт готовый и запускает замену, если готовых (вместе с
+    запускающимися) стало меньше size, так что следующий acquire тоже не ждёт запуска Chrome.
+    release() возвращает драйвер в пул, закрывает только лишний (готовых уже size). Тёплый возвращённый
+    важнее: если замена ещё запускается, лишней окажется она — закроется, когда допустится.
+    """
+
+    def __init__(self, size: int = 2, url: Optional[str] = None, headless: bool = True,
+                 profile_root: Optional[str] = None, stealth: bool = False, refill: bool = True):
+        self.url = url
+        self.headless = headless
+        self.profile_root = profile_root
+        self.stealth = stealth
+        self.size = size
+        self.refill = refill
+        self._pending = 0            # запусков в фоне
+        self._idle: "queue.Queue" = queue.Queue()
+        self._dirs: Dict[int, str] = {}
+        self._all: List = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launch_times: List[float] = []
+        self.errors: List[str] = []
+        for _ in range(size):
+            self._spawn_async()
+
+    def _spawn(self):
+        profile_dir = tempfile.mkdtemp(prefix="ms_pool_", dir=self.profile_root)
+        t0 = time.perf_counter()
+        try:
+            driver = make_driver(self.url, profile_dir=profile_dir, headless=self.headless, stealth=self.stealth)
+        except Exception as e:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            with self._lock:
+                self.errors.append(str(e))
+                self._pending -= 1
+                self._idle.put(e)
+            return
+        with self._lock:
+            self._pending -= 1
+            self.launch_times.append(time.perf_counter() - t0)
+            # closed или release уже вернул тёплый драйвер вместо этой замены
+            if self._closed or self._idle.qsize() >= self.size:
+                driver.quit()
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                return
+            self._dirs[id(driver)] = profile_dir
+            self._all.append(driver)
+            self._idle.put(driver)
+
+    def _spawn_async(self):
+        with self._lock:
+            self._pending += 1
+        threading.Thread(target=self._spawn, name="browser-pool", daemon=True).start()
+
+    def _ready(self) -> int:
+        """Готовые + запускающиеся (под self._lock)."""
+        return self._idle.qsize() + self._pending
+
+    def acquire(self, url: Optional[str] = None, timeout: float = 60.0):
+        """Тёплый драйвер; url — перейти, если он не уже там. RuntimeError, если запуск не удался."""
+        try:
+            item = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"BrowserPool: no browser ready in {timeout}s")
+        with self._lock:
+            refill = self.refill and not self._closed and self._ready() < self.size
+        if refill:
+            self._spawn_async()
+        if isinstance(item, Exception):
+            raise RuntimeError(f"BrowserPool: browser failed to start: {item}")
+        url = url or self.url
+        if url and not _same_page(item.current_url, url):
+            item.get(url)
+        return item
+
+    def release(self, driver):
+        with self._lock:
+            # запускающиеся не считаем: вместо лишнего запуска закроется он сам (_spawn)
+            keep = not self._closed and self._idle.qsize() < self.size
+            if keep:
+                self._idle.put(driver)
+        if not keep:
+            self._quit(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            path = self._dirs.pop(id(driver), None)
+            if driver in self._all:
+                self._all.remove(driver)
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            drivers = list(self._all)
+            self._all.clear()
+        for d in drivers:
+            self._quit(d)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="create_driver")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    lp = sub.add_parser("launch", help="запустить Chrome с remote debugging для --attach")
+    lp.add_argument("--port", type=int, default=9222)
+    lp.add_argument("--profile-dir", default=None)
+    lp.add_argument("--url", default="https://minesweeper.online/new-game")
+    lp.add_argument("--headless", action="store_true")
+    lp.add_argument("--binary", default=None)
+    a = ap.parse_args()
+
+    p = launch_browser(a.port, profile_dir=a.profile_dir, url=a.url, headless=a.headless, binary=a.binary)
+    print(f"Chrome pid={p.pid}; attach with: python -m cli selenium --attach 127.0.0.1:{a.port}")
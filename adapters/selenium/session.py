@@ -0,0 +1,94 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from adapters.selenium.board_reader import read_board_from_snapshot
+from adapters.selenium.controller import start_new_game
+from adapters.selenium.discovery import discover_board_meta
+from adapters.selenium.tick import PageTick
+from core.solver import solver_step
+from core.types import BoardState
+from utils.tracing import Tracer
+
+
+@dataclass
+class GameResult:
+    status: str                 # "win" | "loss" | "stuck" | "timeout"
+    ticks: int
+    clicks: int
+    duration: float             # секунд от первого snapshot до конца игры
+    round_trips: int = 0        # вызовов WebDriver в игровом цикле (PageTick — один на тик)
+    samples: Dict[str, List[float]] = field(default_factory=dict)  # {stage: [мс]}
+
+
+def play_game(
+    driver: WebDriver,
+    new_game: bool = True,
+    max_ticks: int = 2000,
+    time_limit: float = 300.0,
+    settle_timeout: float = 0.5,
+    solver=None,
+) -> GameResult:
+    """
+    Одна игра без участия человека: page tick (клики прошлого тика + settle + чтение) -> parse -> solve,
+    пока не win/loss. Один тик — один round trip (PageTick).
+    new_game — перед началом нажать смайлик (страница уже открыта на нужном URL).
+    Тайминги стадий пишутся в свой Tracer (не в общий TRACER), чтобы вернуть их вместе с результатом;
+    "tick" — весь круг от round trip до конца solve.
+    solver — вызывается как solver_step (Solver, SolverClient); None — solver_step.
+    """
+    tracer = Tracer()
+    solver = solver or solver_step
+
+    if new_game:
+        start_new_game(driver)
+
+    meta = discover_board_meta(driver)
+    rows, cols = meta.rows, meta.cols
+    board = BoardState.new(rows, cols, meta.total_mines)
+    page = PageTick(driver, rows, cols, settle_timeout=settle_timeout)
+
+    ticks = clicks = 0
+    pending = []
+    status = "timeout"
+    t_start = time.perf_counter()
+
+    while ticks < max_ticks and time.perf_counter() - t_start < time_limit:
+        t_tick = time.perf_counter()
+        with tracer.span("page"):
+            res = page.run(pending)
+        if pending and res is not None:
+            tracer.record("settle", t_tick, res.settle_ms / 1000.0)
+        pending = []
+        if res is None or len(res.classes) != rows * cols:
+            time.sleep(0.05)
+            continue
+        if res.status in ("win", "loss"):
+            status = res.status
+            break
+
+        with tracer.span("parse"):
+            read_board_from_snapshot(res.classes, board)
+
+        with tracer.span("solve"):
+            actions, _ = solver(board.field, board.mine, total_mines=board.total_mines, tiles=board.tiles)
+        ticks += 1
+
+        if not actions:
+            status = "stuck"
+            break
+
+        pending = [(a.r, a.c) for a in actions]
+        clicks += len(actions)
+        tracer.record("tick", t_tick, time.perf_counter() - t_tick)
+
+    return GameResult(
+        status=status,
+        ticks=ticks,
+        clicks=clicks,
+        duration=time.perf_counter() - t_start,
+        round_trips=page.round_trips,
+        samples=tracer.samples(),
+    )
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from adapters.selenium.controller import OVERLAY_JS
+
+# Весь тик на стороне страницы, один execute_async_script:
+#   1) клики прошлого тика (mousedown+mouseup+click — игра реагирует на mousedown)
+#   2) подсветка (msOverlay), если codes не null
+#   3) ждём, пока кликнутые клетки не сменят класс (или игра не кончится), не дольше settle_ms
+#   4) статус смайлика, счётчик мин и className всех клеток
+TICK_JS = OVERLAY_JS + """
+function msFaceStatus() {
+  const face = document.getElementById('top_area_face');
+  if (!face) return 'unknown';
+  const cls = (face.className || '').toLowerCase();
+  if (cls.includes('hdd_top-area-face-win')) return 'win';
+  if (cls.includes('hdd_top-area-face-loss') || cls.includes('hdd_top-area-face-lose')) return 'loss';
+  if (cls.includes('hdd_top-area-face-unpressed')) return 'playing';
+  return 'unknown';
+}
+
+function msMinesLeft() {
+  let v = 0;
+  for (const k of ['100', '10', '1']) {
+    const el = document.getElementById('top_area_mines_' + k);
+    const m = el ? /hdd_top-area-num(\\d)/.exec(el.className || '') : null;
+    v += (m ? parseInt(m[1], 10) : 0) * parseInt(k, 10);
+  }
+  return v;
+}
+
+function msTick(clicks, codes, cols, rows, settleMs, done) {
+  const t0 = performance.now();
+  const area = document.getElementById('AreaBlock');
+  if (!area) return done(null);
+
+  const clicked = [];
+  for (const [x, y] of clicks) {
+    const el = area.querySelector(`[data-x="${x}"][data-y="${y}"]`);
+    if (!el) continue;
+    const before = el.className;
+    const rect = el.getBoundingClientRect();
+    const opts = {bubbles: true, cancelable: true, view: window, button: 0,
+                  clientX: rect.left + rect.width / 2, clientY: rect.top + rect.height / 2};
+    el.dispatchEvent(new MouseEvent('mousedown', opts));
+    el.dispatchEvent(new MouseEvent('mouseup', opts));
+    el.dispatchEvent(new MouseEvent('click', opts));
+    clicked.push([el, before]);
+  }
+
+  const dirty = codes === null ? 0 : msOverlay(codes, cols, rows);
+
+  const finish = (settled) => {
+    const els = area.querySelectorAll('[data-x][data-y]');
+    const classes = new Array(rows * cols).fill('');
+    for (let i = 0; i < els.length; i++) {
+      const x = parseInt(els[i].dataset.x, 10);
+      const y = parseInt(els[i].dataset.y, 10);
+      if (x >= 0 && x < cols && y >= 0 && y < rows) classes[y * cols + x] = els[i].className || '';
+    }
+    done({status: msFaceStatus(), mines_left: msMinesLeft(), classes, clicked: clicked.length,
+          dirty, settled, settle_ms: performance.now() - t0});
+  };
+
+  const poll = () => {
+    const moved = clicked.every(([el, before]) => el.className !== before);
+    if (moved || msFaceStatus() !== 'playing') return finish(true);
+    if (performance.now() - t0 >= settleMs) return finish(false);
+    setTimeout(poll, 2);
+  };
+  if (clicked.length) poll(); else finish(true);
+}
+"""
+
+
+@dataclass
+class TickResult:
+    status: str          # "playing" | "win" | "loss" | "unknown"
+    mines_left: int      # счётчик мин на странице
+    classes: List[str]   # className клеток, [r*cols + c] — вход read_board_from_snapshot
+    clicked: int         # сколько кликов прошлого тика дошло до клеток
+    settled: bool        # кликнутые клетки сменили класс до таймаута
+    settle_ms: float     # время в странице от кликов до снятия классов
+    dirty: int           # сколько клеток оверлея перерисовано (-1 — оверлей не встал)
+
+
+class PageTick:
+    """
+    Один тик Selenium-цикла = один round trip: клики и подсветка, решённые на прошлом тике,
+    применяются в начале скрипта, а возвращается уже новое состояние (после settle в странице).
+    Подсветка, не изменившаяся с прошлой отправки, не пересылается.
+    """
+
+    def __init__(self, driver: WebDriver, rows: int, cols: int, settle_timeout: float = 0.5):
+        self.driver = driver
+        self.rows = rows
+        self.cols = cols
+        self.settle_ms = settle_timeout * 1000.0
+        self._sent_codes: Optional[str] = None
+        self.round_trips = 0
+        # скрипт ждёт settle внутри страницы — таймаут async-скрипта должен быть больше
+        driver.set_script_timeout(max(5.0, settle_timeout * 4))
+
+    def run(self, clicks: Sequence[Tuple[int, int]] = (), codes: Optional[str] = None) -> Optional[TickResult]:
+        """clicks — клетки (r, c); codes — encode_highlight(...) или None (подсветку не трогать)."""
+        if codes is not None and codes == self._sent_codes:
+            codes = None
+        res = self.driver.execute_async_script(
+            TICK_JS + "msTick(arguments[0], arguments[1], arguments[2], arguments[3], arguments[4], "
+                      "arguments[arguments.length - 1]);",
+            [[c, r] for r, c in clicks], codes, self.cols, self.rows, self.settle_ms,
+        )
+        self.round_trips += 1
+        if res is None:
+            return None
+        if codes is not None and res["dirty"] >= 0:
+            self._sent_codes = codes
+        return TickResult(
+            status=res["status"],
+            mines_left=int(res["mines_left"]),
+            classes=res["classes"],
+            clicked=int(res["clicked"]),
+            settled=bool(res["settled"]),
+            settle_ms=float(res["settle_ms"]),
+            dirty=int(res["dirty"]),
+        )
+
+    def forget_highlight(self):
+        """Оверлей очищен снаружи (clear_highlights) — следующую подсветку отправить целиком."""
+        self._sent_codes = None
@@ -1,23 +1,27 @@
-import cv2
-from typing import List, Tuple, Optional
+from typing import Iterable, List, Optional, Set, Tuple
 
 from adapters.vision.detect_fields import Detection
+from core.types import OPEN_UNKNOWN, BoardState, CellChange
 
 
 def update_board_from_grid(
     grid_rgb: List[List],          # [ROWS][COLS] numpy RGB
     detection: Detection,
-    field_prev: Optional[List[List[int]]] = None,
-    mine_prev: Optional[List[List[int]]] = None,
-) -> Tuple[List[List[int]], List[List[int]]]:
+    board: BoardState,
+    strict: bool = False,
+    only: Optional[Iterable[Tuple[int, int]]] = None,
+    unread: Optional[Set[Tuple[int, int]]] = None,
+) -> List[CellChange]:
     """
-    Обновляет field/mine по новому кадру, но НЕ перерспознаёт клетки,
-    которые в прошлой итерации уже были открыты (field_prev[r][c] != -1).
+    Обновляет board.field/board.mine на месте по новому кадру, но НЕ перерспознаёт клетки,
+    которые уже открыты (field[r][c] >= 0). Возвращает изменения (r, c, v).
 
     Это защищает от hover/подсветки и ускоряет работу.
 
     field:
       -1 закрыта (трава)
+      -2 кликнута, цифра ещё не прочитана (BoardState.speculate); если на кадре она
+         всё ещё закрыта — откат: field = mine = -1, в changes (r, c, -1)
        0 открыта пустая
       1..8 цифра
 
@@ -25,43 +29,87 @@ def update_board_from_grid(
       -1 неизвестно
        0 точно не мина (открыто)
        1 считаем миной (внутренне)
+
+    strict — первый кадр: нераспознанная цифра = RuntimeError (раньше так было при field_prev=None).
+    only — перечитать только эти клетки (r, c) (частичный захват); None — все закрытые.
+    unread — если задан, нераспознанные клетки складываются сюда (и в strict тоже), а не RuntimeError:
+             вызывающий их перечитает (reread_cells).
     """
-    ROWS = len(grid_rgb)
-    COLS = len(grid_rgb[0]) if ROWS else 0
+    field, mine = board.field, board.mine
+    changes: List[CellChange] = []
 
-    # Если это первый кадр — создаём новые матрицы
-    if field_prev is None:
-        field = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+    # 1) Уже открытые клетки НЕ перераспознаём — собираем только закрытые (и кликнутые без цифры)
+    if only is None:
+        todo = [(r, c) for r, row in enumerate(grid_rgb) for c in range(len(row)) if field[r][c] < 0]
     else:
-        field = [row[:] for row in field_prev]
+        todo = [(r, c) for r, c in only if field[r][c] < 0]
 
-    if mine_prev is None:
-        mine = [[-1 for _ in range(COLS)] for _ in range(ROWS)]
-    else:
-        mine = [row[:] for row in mine_prev]
+    # 2) Распознаём их одним батчем (centroid — одно матричное умножение на все)
+    results = detection.classify_cells([grid_rgb[r][c] for r, c in todo])
 
-    for r, row in enumerate(grid_rgb):
-        for c, cell_rgb in enumerate(row):
-            # 1) Если клетка уже открыта — НЕ обновляем её
-            if field_prev is not None and field_prev[r][c] != -1:
+    for (r, c), (num, conf) in zip(todo, results):
+        # Если цифра не распознана — лучше оставить как было (обычно из-за hover),
+        # а не падать
+        if num == -3:
+            if unread is not None:
+                unread.add((r, c))
+                continue
+            if not strict:
                 continue
+            raise RuntimeError(f"Unrecognized digit at {(r, c)}: conf={conf:.3f}")
 
-            # 2) Иначе распознаём
-            cell_bgr = cv2.cvtColor(cell_rgb, cv2.COLOR_RGB2BGR)
-            label, num, meta = detection.classify_cell(cell_bgr)
+        if num == -1:
+            if field[r][c] == OPEN_UNKNOWN:
+                field[r][c] = -1
+                mine[r][c] = -1
+                changes.append((r, c, -1))
+            continue
 
-            # Если цифра не распознана — лучше оставить как было (обычно из-за hover),
-            # а не падать
-            if num == -3:
-                # если раньше что-то было — оставим
-                if field_prev is not None:
-                    continue
-                raise RuntimeError(f"Unrecognized digit at {(r, c)}: {meta}")
+        field[r][c] = int(num)
+        # открытая клетка => точно не мина
+        mine[r][c] = 0
+        changes.append((r, c, int(num)))
 
-            field[r][c] = int(num)
+    board.touch(changes)
+    return changes
+
+
+def reread_cells(
+    grid_rgb: List[List],
+    detection: Detection,
+    board: BoardState,
+    cells: Iterable[Tuple[int, int]],
+) -> Tuple[List[CellChange], Set[Tuple[int, int]]]:
+    """
+    Принудительно перечитать клетки (в том числе уже открытые — кеш мог запомнить неверную цифру).
+    Отметки мин на закрытых клетках из списка сбрасываются: их выводили из подозрительных цифр.
+    Возвращает (изменения, клетки которые снова не распознались).
+    """
+    field, mine = board.field, board.mine
+    cells = list(cells)
+    changes: List[CellChange] = []
+    unread: Set[Tuple[int, int]] = set()
 
-            # открытая клетка => точно не мина
-            if num != -1:
-                mine[r][c] = 0
+    results = detection.classify_cells([grid_rgb[r][c] for r, c in cells])
+    for (r, c), (num, conf) in zip(cells, results):
+        if num == -3:
+            unread.add((r, c))
+            continue
+
+        if num == -1:
+            # открытая клетка обратно закрыться не может — верим кешу
+            if field[r][c] == OPEN_UNKNOWN:
+                field[r][c] = -1
+                changes.append((r, c, -1))
+            if field[r][c] == -1:
+                mine[r][c] = -1
+            continue
+
+        if field[r][c] != num:
+            field[r][c] = int(num)
+            changes.append((r, c, int(num)))
+        mine[r][c] = 0
 
-    return field, mine
+    # тайлы перепроверяют и клетки со сброшенными отметками
+    board.touch((r, c, field[r][c]) for r, c in cells)
+    return changes, unread
@@ -0,0 +1,152 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from adapters.vision.detect_fields import hex_to_rgb, load_digit_sprites
+
+# метки как у Detection.classify_cell: -1 закрыта, 0 пустая, 1..8 цифра
+PROTO_CELL = 45
+
+
+class CentroidClassifier:
+    """
+    Батч-классификатор клеток без порогов: каждая клетка -> вектор size x size x 3 (центр, INTER_AREA),
+    все клетки тика сравниваются со всеми прототипами одним матричным умножением
+    (||x - p||^2 = ||x||^2 - 2 x·p + ||p||^2). Метка — у ближайшего прототипа.
+
+    Уверенность: 1 - d_best / d_other, где d_other — ближайший прототип ДРУГОЙ метки.
+    0 — клетка ровно посередине между классами, 1 — совпала с прототипом.
+
+    Прототипы: фон травы/открытой клетки обоих оттенков шахматки и спрайты цифр из images/
+    (со сдвигами и hover-подсветкой), плюс клетки из записей (add_samples / add_recording).
+    """
+
+    def __init__(
+        self,
+        grass_hex: Sequence[str] = ("#AAD751", "#A2D149"),
+        open_hex: Sequence[str] = ("#D7B899", "#E5C29F"),
+        images_dir: Optional[str] = None,  # None — images/ в корне проекта (detect_fields.IMAGES_DIR)
+        size: int = 10,
+        pad_frac: float = 0.12,
+        jitter_px: Tuple[int, ...] = (-2, 0, 2),
+    ):
+        self.size = int(size)
+        self.pad_frac = float(pad_frac)
+        self._vecs: List[np.ndarray] = []
+        self._labels: List[int] = []
+
+        self._add_palette_prototypes(grass_hex, open_hex, images_dir, jitter_px)
+        self._build()
+
+    # -------------------- признаки --------------------
+
+    def features(self, cells_rgb: Sequence[np.ndarray]) -> np.ndarray:
+        """(N, size*size*3) float32 в 0..1 — центр каждой клетки, уменьшенный до size x size."""
+        s = self.size
+        out = np.empty((len(cells_rgb), s * s * 3), dtype=np.float32)
+        for i, cell in enumerate(cells_rgb):
+            h, w = cell.shape[:2]
+            py = int(h * self.pad_frac)
+            px = int(w * self.pad_frac)
+            roi = cell[py:h - py, px:w - px, :3]
+            out[i] = cv2.resize(roi, (s, s), interpolation=cv2.INTER_AREA).reshape(-1)
+        out *= 1.0 / 255.0
+        return out
+
+    # -------------------- прототипы --------------------
+
+    def _add_palette_prototypes(self, grass_hex, open_hex, images_dir, jitter_px):
+        sprites = load_digit_sprites(images_dir)
+        cells: List[np.ndarray] = []
+        labels: List[int] = []
+
+        def add(img: np.ndarray, label: int):
+            for hover in (False, True):
+                x = img * 0.85 + 255.0 * 0.15 if hover else img
+                cells.append(np.clip(x, 0, 255).astype(np.uint8))
+                labels.append(label)
+
+        for hx in grass_hex:
+            add(np.full((PROTO_CELL, PROTO_CELL, 3), hex_to_rgb(hx), dtype=np.float32), -1)
+
+        for hx in open_hex:
+            base = np.full((PROTO_CELL, PROTO_CELL, 3), hex_to_rgb(hx), dtype=np.float32)
+            add(base, 0)
+            for d, variants in sprites.items():
+                for spr in variants:
+                    spr = cv2.resize(spr, (PROTO_CELL, PROTO_CELL), interpolation=cv2.INTER_AREA)
+                    for dy in jitter_px:
+                        for dx in jitter_px:
+                            s = np.roll(spr, (dy, dx), axis=(0, 1))
+                            a = s[:, :, 3:4]
+                            add(base * (1 - a) + s[:, :, :3] * 255.0 * a, d)
+
+        self._vecs.append(self.features(cells))
+        self._labels.extend(labels)
+
+    def add_samples(self, cells_rgb: Sequence[np.ndarray], labels: Sequence[int]):
+        """Реальные клетки с известной меткой (например, из записи) — как дополнительные прототипы."""
+        keep = [i for i, v in enumerate(labels) if -1 <= v <= 8]
+        if not keep:
+            return
+        self._vecs.append(self.features([cells_rgb[i] for i in keep]))
+        self._labels.extend(int(labels[i]) for i in keep)
+        self._build()
+
+    def add_recording(self, path: str, per_label: int = 50):
+        """
+        Клетки из записи Recorder (meta.field — что тогда распознали), не больше per_label на метку.
+        Берём только тики без ошибок распознавания (field записан).
+        """
+        from adapters.vision.get_field import split_grid_np
+        from adapters.vision.recorder import Recording
+
+        counts: Dict[int, int] = {}
+        cells: List[np.ndarray] = []
+        labels: List[int] = []
+        with Recording(path) as rec:
+            for tick in rec:
+                field = tick.meta.get("field")
+                if field is None:
+                    continue
+                grid = split_grid_np(tick.img, tick.meta["cols"], tick.meta["rows"])
+                for r, row in enumerate(grid):
+                    for c, cell in enumerate(row):
+                        v = field[r][c]
+                        if counts.get(v, 0) >= per_label:
+                            continue
+                        counts[v] = counts.get(v, 0) + 1
+                        cells.append(np.array(cell))
+                        labels.append(v)
+        self.add_samples(cells, labels)
+
+    def _build(self):
+        labels = np.asarray(self._labels, dtype=np.int32)
+        # прототипы отсортированы по метке: минимум по классу — один np.minimum.reduceat
+        order = np.argsort(labels, kind="stable")
+        self.protos = np.ascontiguousarray(np.concatenate(self._vecs, axis=0)[order])
+        self.proto_labels = labels[order]
+        self.proto_sq = (self.protos * self.protos).sum(axis=1)
+        self.classes, self._class_start = np.unique(self.proto_labels, return_index=True)
+
+    # -------------------- классификация --------------------
+
+    def classify(self, cells_rgb: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """(labels int32 (N,), conf float32 (N,)) для всех клеток сразу."""
+        if len(cells_rgb) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        x = self.features(cells_rgb)
+        d2 = (x * x).sum(axis=1)[:, None] - 2.0 * (x @ self.protos.T) + self.proto_sq[None, :]
+        np.maximum(d2, 0.0, out=d2)
+
+        per_class = np.minimum.reduceat(d2, self._class_start, axis=1)  # (N, K)
+
+        order = np.argsort(per_class, axis=1)
+        rows = np.arange(len(x))
+        best = np.sqrt(per_class[rows, order[:, 0]])
+        other = np.sqrt(per_class[rows, order[:, 1]]) if len(self.classes) > 1 else best + 1.0
+        conf = 1.0 - best / np.maximum(other, 1e-6)
+
+        return self.classes[order[:, 0]].astype(np.int32), conf.astype(np.float32)
@@ -1,9 +1,16 @@
-import time
-import pyautogui
-from typing import Tuple
+from typing import Iterable, Optional, Tuple
 
-# Если увести мышь в левый верхний угол — pyautogui выбросит исключение и остановит скрипт.
-pyautogui.FAILSAFE = True
+from adapters.vision.input_backend import InputBackend, make_backend
+
+_default_backend: Optional[InputBackend] = None
+
+
+def get_default_backend() -> InputBackend:
+    """pyautogui-бэкенд по умолчанию — создаём лениво, чтобы импорт clicker не требовал дисплея."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = make_backend("pyautogui", click_budget=0.0)
+    return _default_backend
 
 
 def rc_to_xy(
@@ -18,30 +25,61 @@ def rc_to_xy(
     return x, y
 
 
+def action_button(action) -> str:
+    # В новой архитектуре лучше использовать kind="open".
+    # Но поддержим и старые "left/right" на всякий.
+    kind = getattr(action, "kind", "open")
+
+    if kind in ("open", "left"):
+        return "left"
+    if kind == "right":
+        return "right"
+    raise ValueError(f"Unknown action kind: {kind}")
+
+
 def click_action(
     action,
     LEFT: int, TOP: int, WIDTH: int, HEIGHT: int,
     COLS: int, ROWS: int,
     pre_delay: float = 0.1,
-    post_delay: float = 0.1
+    post_delay: float = 0.1,
+    backend: Optional[InputBackend] = None,
 ):
     """
     Кликает по клетке action.r/action.c (Action из core/types.py),
     переводя координаты клетки в экранные x/y.
+    pre_delay/post_delay оставлены для совместимости: вместе они — бюджет одного клика.
     """
-    time.sleep(pre_delay)
-
+    backend = backend or get_default_backend()
     x, y = rc_to_xy(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, action.r, action.c)
 
-    # В новой архитектуре лучше использовать kind="open".
-    # Но поддержим и старые "left/right" на всякий.
-    kind = getattr(action, "kind", "open")
+    budget = backend.click_budget
+    backend.click_budget = max(budget, pre_delay + post_delay)
+    try:
+        backend.click(x, y, button=action_button(action))
+    finally:
+        backend.click_budget = budget
 
-    if kind in ("open", "left"):
-        pyautogui.click(x, y, button="left")
-    elif kind == "right":
-        pyautogui.click(x, y, button="right")
-    else:
-        raise ValueError(f"Unknown action kind: {kind}")
 
-    time.sleep(post_delay)
+def click_cells(
+    actions: Iterable,
+    LEFT: int, TOP: int, WIDTH: int, HEIGHT: int,
+    COLS: int, ROWS: int,
+    backend: InputBackend,
+):
+    """
+    Пачка кликов «по этим клеткам» одним вызовом бэкенда (темп — backend.click_budget).
+    Подряд идущие клики одной кнопкой уходят одной пачкой.
+    """
+    batch = []
+    button = None
+    for a in actions:
+        b = action_button(a)
+        if button is not None and b != button:
+            backend.click_many(batch, button=button)
+            batch = []
+        button = b
+        batch.append(rc_to_xy(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, a.r, a.c))
+
+    if batch:
+        backend.click_many(batch, button=button)
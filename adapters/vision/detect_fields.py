@@ -1,6 +1,13 @@
 import json
+import os
+from typing import Dict, List, Optional
+
 import cv2
 import numpy as np
+from PIL import Image
+
+# спрайты цифр в корне проекта — не зависит от текущего каталога
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "images")
 
 
 def hex_to_bgr(hex_color: str) -> np.ndarray:
@@ -12,6 +19,32 @@ def hex_to_bgr(hex_color: str) -> np.ndarray:
     return np.array([b, g, r], dtype=np.uint8)
 
 
+def hex_to_rgb(hex_color: str) -> np.ndarray:
+    """'#RRGGBB' -> np.array([R,G,B], dtype=np.float32)"""
+    return hex_to_bgr(hex_color)[::-1].astype(np.float32)
+
+
+def load_digit_sprites(images_dir: Optional[str] = None) -> Dict[int, List[np.ndarray]]:
+    """
+    {digit: [RGBA float32 0..1, ...]} — спрайты из images/ (d.png и варианты вроде 5_2.png).
+    images_dir=None — IMAGES_DIR.
+    """
+    images_dir = images_dir or IMAGES_DIR
+    sprites: Dict[int, List[np.ndarray]] = {}
+    for name in sorted(os.listdir(images_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() != ".png" or not stem[:1].isdigit():
+            continue
+        d = int(stem.split("_")[0])
+        if not 1 <= d <= 8:
+            continue
+
+        # PIL понимает palette+transparency, cv2 — нет
+        rgba = np.asarray(Image.open(os.path.join(images_dir, name)).convert("RGBA"), dtype=np.float32) / 255.0
+        sprites.setdefault(d, []).append(rgba)
+    return sprites
+
+
 class Detection:
     """
     Быстрый детект клетки:
@@ -46,6 +79,10 @@ class Detection:
         # Цвет цифры (по HSV)
         digit_min_ratio: float = 0.010,  # порог доли пикселей цифры (среди НЕ-фона)
         valid_min_v: int = 30,           # чуть ниже, чтобы не терять тонкие штрихи
+
+        # "rules" — пороги выше, по клетке; "centroid" — батч nearest-centroid (adapters/vision/centroid.py)
+        backend: str = "rules",
+        centroid_min_conf: float = 0.15,  # ниже — считаем нераспознанной (-3), как у rules
     ):
         self.center_pad_frac = center_pad_frac
         self.digit_pad_frac = digit_pad_frac
@@ -60,7 +97,9 @@ class Detection:
         self.digit_min_ratio = float(digit_min_ratio)
         self.valid_min_v = int(valid_min_v)
 
-        # фоновые цвета в BGR
+        # фоновые цвета: hex оставляем для BoardLocator, BGR — для масок
+        self.grass_hex = tuple(grass_hex)
+        self.open_hex = tuple(open_hex)
         self.grass_bgr = [hex_to_bgr(c) for c in grass_hex]
         self.open_bgr = [hex_to_bgr(c) for c in open_hex]
         self.bg_bgr = self.grass_bgr + self.open_bgr
@@ -68,9 +107,28 @@ class Detection:
         # HSV диапазоны цифр
         self.digit_hsv_ranges = self.load_digit_hsv_ranges(digit_ranges_path)
 
+        if backend not in ("rules", "centroid"):
+            raise ValueError(f"Unknown detection backend: {backend}")
+        self.backend = backend
+        self.centroid_min_conf = float(centroid_min_conf)
+        self.centroid = None
+        if backend == "centroid":
+            from adapters.vision.centroid import CentroidClassifier
+            self.centroid = CentroidClassifier(grass_hex=grass_hex, open_hex=open_hex)
+
     # -------------------- helpers --------------------
 
     def load_digit_hsv_ranges(self, path: str):
+        """
+        Берём скомпилированный .bin (utils/calibrate_color.py), если он есть и не старее json,
+        иначе парсим json как раньше.
+        """
+        bin_path = path if path.endswith(".bin") else os.path.splitext(path)[0] + ".bin"
+        if os.path.exists(bin_path) and (
+            bin_path == path or not os.path.exists(path) or os.path.getmtime(bin_path) >= os.path.getmtime(path)
+        ):
+            return self.load_digit_hsv_ranges_bin(bin_path)
+
         with open(path, "r", encoding="utf-8") as f:
             raw = json.load(f)
 
@@ -84,6 +142,17 @@ class Detection:
                 ranges[d].append((low, high))
         return ranges
 
+    def load_digit_hsv_ranges_bin(self, path: str):
+        raw = np.fromfile(path, dtype=np.uint8)
+        if raw[:4].tobytes() != b"HSV1":
+            raise ValueError(f"Not a compiled HSV ranges file: {path}")
+        rows = raw[4:].reshape(-1, 7)
+
+        ranges = {}
+        for row in rows:
+            ranges.setdefault(int(row[0]), []).append((row[1:4], row[4:7]))
+        return ranges
+
     def crop_center(self, img_bgr: np.ndarray, pad_frac: float) -> np.ndarray:
         h, w = img_bgr.shape[:2]
         px = int(w * pad_frac)
@@ -235,3 +304,21 @@ class Detection:
             "digit_color_ratio": ratio,
             "ratios": ratios_all,
         }
+
+    def classify_cells(self, cells_rgb: list) -> list:
+        """
+        Все клетки тика разом (RGB, как из split_grid_np) -> [(num, conf)].
+        num как у classify_cell (-1 | 0 | 1..8 | -3). У rules conf = 1.0, у -3 — 0.0.
+        """
+        if self.centroid is not None:
+            labels, conf = self.centroid.classify(cells_rgb)
+            return [
+                (int(n) if c >= self.centroid_min_conf else -3, float(c))
+                for n, c in zip(labels, conf)
+            ]
+
+        out = []
+        for cell_rgb in cells_rgb:
+            _, num, _ = self.classify_cell(cv2.cvtColor(cell_rgb, cv2.COLOR_RGB2BGR))
+            out.append((int(num), 0.0 if num == -3 else 1.0))
+        return out
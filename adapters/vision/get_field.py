@@ -12,6 +12,17 @@ def screenshot_region(left: int, top:int, width:int, height:int) -> Image.Image:
         img = Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
         return img
 
+def screenshot_full(monitor: int = 1):
+    """
+    Скрин всего монитора для поиска поля.
+    Возвращает (numpy RGB, (left, top) монитора в экранных координатах).
+    """
+    with mss() as sct:
+        mon = sct.monitors[monitor]
+        shot = sct.grab(mon)
+        img = Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+        return np.asarray(img), (mon["left"], mon["top"])
+
 def split_grid_np(img: Image.Image, cols: int, rows: int):
     arr = np.asarray(img)  # shape: (h, w, 3) или (h, w, 4)
     h, w = arr.shape[:2]
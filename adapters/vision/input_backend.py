@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+from typing import Iterable, List, Optional, Tuple
+
+# Куда уводим мышь перед захватом, чтобы hover не портил распознавание
+PARK_XY = (1, 1)
+
+
+class FailSafeException(Exception):
+    """
+    Мышь в углу экрана — аварийная остановка (как pyautogui.FailSafeException).
+    Не RuntimeError: цикл vision пропускает RuntimeError как «плохой тик», а это должно его прервать.
+    """
+
+
+class InputBackend:
+    """
+    Общий интерфейс ввода. Темп задаётся одним бюджетом на клик (click_budget, сек):
+    после клика досыпаем только остаток бюджета, без отдельных pre/post задержек.
+    """
+
+    name = "base"
+
+    def __init__(self, click_budget: float = 0.01):
+        self.click_budget = float(click_budget)
+        self.parked = False
+
+        self.clicks = 0
+        self.busy = 0.0          # время внутри click()/click_many(), включая темп
+        self.first_click_t: Optional[float] = None
+        self.last_click_t: Optional[float] = None
+
+    # -------------------- низкий уровень (переопределяют наследники) --------------------
+
+    def _move(self, x: int, y: int):
+        raise NotImplementedError
+
+    def _click(self, x: int, y: int, button: str):
+        raise NotImplementedError
+
+    # -------------------- api --------------------
+
+    def move(self, x: int, y: int):
+        self._move(x, y)
+        self.parked = (x, y) == PARK_XY
+
+    def park(self):
+        """Увести мышь с поля (один раз после пачки кликов, а не перед каждым захватом)."""
+        if not self.parked:
+            self.move(*PARK_XY)
+
+    def _pace(self, t0: float):
+        """Досыпаем остаток бюджета клика и считаем статистику."""
+        left = self.click_budget - (time.perf_counter() - t0)
+        if left > 0:
+            time.sleep(left)
+
+        t1 = time.perf_counter()
+        self.clicks += 1
+        self.busy += t1 - t0
+        if self.first_click_t is None:
+            self.first_click_t = t0
+        self.last_click_t = t1
+
+    def click(self, x: int, y: int, button: str = "left"):
+        t0 = time.perf_counter()
+        self._click(x, y, button)
+        self.parked = False
+        self._pace(t0)
+
+    def click_many(self, points: Iterable[Tuple[int, int]], button: str = "left"):
+        for x, y in points:
+            self.click(x, y, button)
+
+    # -------------------- статистика --------------------
+
+    @property
+    def clicks_per_sec(self) -> float:
+        """Темп самих кликов (время внутри click)."""
+        return self.clicks / self.busy if self.busy > 0 else 0.0
+
+    @property
+    def wall_clicks_per_sec(self) -> float:
+        """Клики в секунду по стене — с захватом/распознаванием между пачками."""
+        if self.first_click_t is None or self.last_click_t == self.first_click_t:
+            return 0.0
+        return self.clicks / (self.last_click_t - self.first_click_t)
+
+    def report(self):
+        print(f"input[{self.name}]: clicks={self.clicks} "
+              f"{self.clicks_per_sec:.1f} clicks/s (click time), "
+              f"{self.wall_clicks_per_sec:.1f} clicks/s (wall), budget={self.click_budget * 1000:.1f}ms")
+
+
+class PyAutoGuiBackend(InputBackend):
+    """Текущий вариант через pyautogui, но без его глобальной PAUSE поверх нашего темпа."""
+
+    name = "pyautogui"
+
+    def __init__(self, click_budget: float = 0.01):
+        super().__init__(click_budget)
+        import pyautogui
+
+        # Если увести мышь в левый верхний угол — pyautogui выбросит исключение и остановит скрипт.
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0.0
+        self._pg = pyautogui
+
+    def _move(self, x, y):
+        self._pg.moveTo(x, y)
+
+    def _click(self, x, y, button):
+        self._pg.click(x, y, button=button)
+
+
+class XTestBackend(InputBackend):
+    """
+    Быстрый ввод через X11 XTest (python-xlib): один sync на клик, без pyautogui-обвязки.
+    Только Linux/X11 (или XWayland).
+    """
+
+    name = "xtest"
+
+    _BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+    def __init__(self, click_budget: float = 0.005, display: Optional[str] = None):
+        super().__init__(click_budget)
+        from Xlib import X, display as xdisplay
+        from Xlib.ext import xtest
+
+        from Xlib.error import DisplayError
+
+        self._X = X
+        self._xtest = xtest
+        try:
+            self._d = xdisplay.Display(display)
+        except (DisplayError, OSError) as e:
+            raise RuntimeError(f"XTest: cannot open display {display or os.environ.get('DISPLAY')}: {e}")
+        if not self._d.has_extension("XTEST"):
+            self._d.close()
+            raise RuntimeError("XTest: X server has no XTEST extension")
+        scr = self._d.screen()
+        self._root = scr.root
+        w, h = scr.width_in_pixels, scr.height_in_pixels
+        self._corners = {(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)}
+
+    def _failsafe(self):
+        """Как pyautogui.FAILSAFE: мышь в любом углу экрана — стоп (один round trip к X-серверу)."""
+        p = self._root.query_pointer()
+        if (p.root_x, p.root_y) in self._corners:
+            raise FailSafeException(f"Mouse moved to a screen corner ({p.root_x}, {p.root_y}): fail-safe stop")
+
+    def _motion(self, x, y):
+        self._xtest.fake_input(self._d, self._X.MotionNotify, x=int(x), y=int(y))
+
+    def _move(self, x, y):
+        self._failsafe()
+        self._motion(x, y)
+        self._d.sync()
+
+    def _click(self, x, y, button):
+        b = self._BUTTONS[button]
+        self._failsafe()
+        self._motion(x, y)
+        self._xtest.fake_input(self._d, self._X.ButtonPress, b)
+        self._xtest.fake_input(self._d, self._X.ButtonRelease, b)
+        self._d.sync()
+
+    def click_many(self, points, button: str = "left"):
+        # одна пачка событий — один flush; темп всё равно держим по бюджету
+        b = self._BUTTONS[button]
+        for x, y in points:
+            t0 = time.perf_counter()
+            self._failsafe()
+            self._motion(x, y)
+            self._xtest.fake_input(self._d, self._X.ButtonPress, b)
+            self._xtest.fake_input(self._d, self._X.ButtonRelease, b)
+            self._d.flush()
+            self._pace(t0)
+        self._d.sync()
+        self.parked = False
+
+
+class RecordingBackend(InputBackend):
+    """Заглушка для тестов/replay: ничего не двигает, только пишет события."""
+
+    name = "recording"
+
+    def __init__(self, click_budget: float = 0.0):
+        super().__init__(click_budget)
+        self.events: List[Tuple[str, int, int, str]] = []
+
+    def _move(self, x, y):
+        self.events.append(("move", int(x), int(y), ""))
+
+    def _click(self, x, y, button):
+        self.events.append(("click", int(x), int(y), button))
+
+
+def make_backend(name: str = "auto", click_budget: Optional[float] = None) -> InputBackend:
+    """
+    name: "auto" | "xtest" | "pyautogui" | "recording"
+    auto — XTest, если есть X-дисплей и python-xlib, иначе pyautogui.
+    Оба останавливаются, если увести мышь в угол экрана (FailSafeException / pyautogui.FailSafeException).
+    """
+    kw = {} if click_budget is None else {"click_budget": click_budget}
+
+    if name == "recording":
+        return RecordingBackend(**kw)
+    if name == "pyautogui":
+        return PyAutoGuiBackend(**kw)
+    if name == "xtest":
+        return XTestBackend(**kw)
+
+    if name == "auto":
+        if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+            try:
+                return XTestBackend(**kw)
+            except (ImportError, RuntimeError) as e:
+                # нет python-xlib, дисплей не открылся или нет XTEST
+                print(f"xtest unavailable ({e}); using pyautogui")
+        return PyAutoGuiBackend(**kw)
+
+    raise ValueError(f"Unknown input backend: {name}")
@@ -0,0 +1,276 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from adapters.vision.detect_fields import hex_to_rgb
+
+
+@dataclass(frozen=True)
+class BoardGeometry:
+    left: int
+    top: int
+    width: int
+    height: int
+    cols: int
+    rows: int
+
+    @property
+    def cell_w(self) -> float:
+        return self.width / self.cols
+
+    @property
+    def cell_h(self) -> float:
+        return self.height / self.rows
+
+    def as_area(self) -> Tuple[int, int, int, int]:
+        """(LEFT, TOP, WIDTH, HEIGHT) — как в пресетах vision_main.pixel_area."""
+        return self.left, self.top, self.width, self.height
+
+
+def palette_index(arr_rgb: np.ndarray, palette_rgb: Sequence[np.ndarray], thr: int) -> np.ndarray:
+    """
+    Для каждого пикселя — индекс ближайшего цвета палитры (если ближе thr), иначе -1.
+    """
+    arr = arr_rgb[:, :, :3].astype(np.int32)
+    h, w = arr.shape[:2]
+    best_d2 = np.full((h, w), 10**9, dtype=np.int32)
+    best_i = np.full((h, w), -1, dtype=np.int8)
+
+    for i, color in enumerate(palette_rgb):
+        diff = arr - color.astype(np.int32)
+        d2 = (diff * diff).sum(axis=2)
+        closer = d2 < best_d2
+        best_d2[closer] = d2[closer]
+        best_i[closer] = i
+
+    best_i[best_d2 > thr * thr] = -1
+    return best_i
+
+
+def find_board_rect(idx: np.ndarray, close_px: int = 9, min_area: int = 400) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Прямоугольник поля по маске палитры: закрываем дырки (цифры, кайма, hover)
+    морфологией и берём самую большую связную область.
+    Возвращает (x0, y0, x1, y1), x1/y1 не включительно.
+    """
+    mask = (idx >= 0).astype(np.uint8)
+    if not mask.any():
+        return None
+
+    kernel = np.ones((close_px, close_px), dtype=np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=4)
+    if n <= 1:
+        return None
+
+    # 0 — фон
+    best = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    if stats[best, cv2.CC_STAT_AREA] < min_area:
+        return None
+
+    x = int(stats[best, cv2.CC_STAT_LEFT])
+    y = int(stats[best, cv2.CC_STAT_TOP])
+    w = int(stats[best, cv2.CC_STAT_WIDTH])
+    h = int(stats[best, cv2.CC_STAT_HEIGHT])
+    return x, y, x + w, y + h
+
+
+def _complete_runs(line: np.ndarray) -> List[int]:
+    """
+    Длины отрезков одного цвета палитры, ограниченных с обеих сторон другим цветом палитры.
+    Отрезки, касающиеся «чужих» пикселей (цифры, hover), выкидываем — они не про период.
+    """
+    runs: List[Tuple[int, int]] = []
+    start = 0
+    for i in range(1, len(line) + 1):
+        if i == len(line) or line[i] != line[start]:
+            runs.append((int(line[start]), i - start))
+            start = i
+
+    out = []
+    for k in range(1, len(runs) - 1):
+        v, n = runs[k]
+        if v >= 0 and runs[k - 1][0] >= 0 and runs[k + 1][0] >= 0:
+            out.append(n)
+    return out
+
+
+def estimate_cell_size(idx_board: np.ndarray, axis: int, lines: int = 12) -> Optional[float]:
+    """
+    Период шахматки вдоль оси (axis=1 — по горизонтали, 0 — по вертикали).
+    Берём несколько линий сканирования и медиану длин полных отрезков.
+    """
+    if axis == 0:
+        idx_board = idx_board.T
+    h = idx_board.shape[0]
+    if h == 0:
+        return None
+
+    runs: List[int] = []
+    for y in np.linspace(0, h - 1, num=min(lines, h)).astype(int):
+        runs.extend(_complete_runs(idx_board[y]))
+
+    if not runs:
+        return None
+    return float(np.median(runs))
+
+
+def locate_board(
+    arr_rgb: np.ndarray,
+    grass_hex=("#AAD751", "#A2D149"),
+    open_hex=("#D7B899", "#E5C29F"),
+    color_thr: int = 25,
+    offset: Tuple[int, int] = (0, 0),
+) -> Optional[BoardGeometry]:
+    """
+    Полный поиск поля на скриншоте (numpy RGB). offset — экранные координаты (0, 0) скрина.
+    Работает и на сохранённых файлах: locate_board(np.asarray(Image.open(path))).
+    """
+    palette = [hex_to_rgb(c) for c in tuple(grass_hex) + tuple(open_hex)]
+    idx = palette_index(arr_rgb, palette, color_thr)
+
+    rect = find_board_rect(idx)
+    if rect is None:
+        return None
+    x0, y0, x1, y1 = rect
+    board = idx[y0:y1, x0:x1]
+
+    cell_w = estimate_cell_size(board, axis=1)
+    cell_h = estimate_cell_size(board, axis=0)
+    if cell_w is None and cell_h is None:
+        return None
+    # клетки квадратные — если по одной оси не вышло, берём другую
+    cell_w = cell_w or cell_h
+    cell_h = cell_h or cell_w
+
+    width, height = x1 - x0, y1 - y0
+    cols = max(1, int(round(width / cell_w)))
+    rows = max(1, int(round(height / cell_h)))
+
+    return BoardGeometry(
+        left=int(offset[0] + x0), top=int(offset[1] + y0),
+        width=int(width), height=int(height),
+        cols=cols, rows=rows,
+    )
+
+
+class BoardLocator:
+    """
+    Находит поле на экране и кеширует геометрию.
+    Полный скан экрана — только при старте или когда дешёвая проверка (probe) не прошла.
+    """
+
+    def __init__(
+        self,
+        grab_full: Optional[Callable[[], Tuple[np.ndarray, Tuple[int, int]]]] = None,
+        grass_hex=("#AAD751", "#A2D149"),
+        open_hex=("#D7B899", "#E5C29F"),
+        color_thr: int = 25,
+        probe_inset: float = 0.15,
+    ):
+        self.grab_full = grab_full
+        self.grass_hex = tuple(grass_hex)
+        self.open_hex = tuple(open_hex)
+        self.color_thr = int(color_thr)
+        self.probe_inset = float(probe_inset)
+
+        self.palette = [hex_to_rgb(c) for c in self.grass_hex + self.open_hex]
+        self.geometry: Optional[BoardGeometry] = None
+        self.full_scans = 0
+
+    def locate(self, force: bool = False) -> BoardGeometry:
+        if self.geometry is not None and not force:
+            return self.geometry
+
+        if self.grab_full is None:
+            raise RuntimeError("BoardLocator: grab_full is not set")
+
+        arr, offset = self.grab_full()
+        geom = locate_board(arr, self.grass_hex, self.open_hex, self.color_thr, offset=offset)
+        self.full_scans += 1
+        if geom is None:
+            raise RuntimeError("BoardLocator: board not found on screen")
+
+        self.geometry = geom
+        return geom
+
+    def invalidate(self):
+        self.geometry = None
+
+    def _probe_points(self, r: int, c: int, cell_w: float, cell_h: float) -> List[Tuple[int, int]]:
+        # углы клетки (не центр — там цифра), по диагонали внутрь на probe_inset
+        k = self.probe_inset
+        pts = []
+        for fy in (k, 1 - k):
+            for fx in (k, 1 - k):
+                pts.append((int((r + fy) * cell_h), int((c + fx) * cell_w)))
+        return pts
+
+    def probe(self, region_rgb: np.ndarray) -> bool:
+        """
+        Дешёвая проверка кеша по уже снятому кадру поля (без скана экрана).
+        Для клеток по периметру: 4 угла клетки — один цвет палитры,
+        соседние по строке/столбцу клетки — разного цвета (шахматка на месте).
+        Сдвиг окна или смена масштаба ломают хотя бы одно из условий.
+        """
+        geom = self.geometry
+        if geom is None:
+            return False
+
+        h, w = region_rgb.shape[:2]
+        if (w, h) != (geom.width, geom.height):
+            return False
+
+        cell_w = w / geom.cols
+        cell_h = h / geom.rows
+
+        cells = {(0, c) for c in range(geom.cols)} | {(geom.rows - 1, c) for c in range(geom.cols)}
+        cells |= {(r, 0) for r in range(geom.rows)} | {(r, geom.cols - 1) for r in range(geom.rows)}
+
+        pts = []
+        order = sorted(cells)
+        for r, c in order:
+            pts.extend(self._probe_points(r, c, cell_w, cell_h))
+        ys = np.array([p[0] for p in pts])
+        xs = np.array([p[1] for p in pts])
+        samples = region_rgb[ys, xs][None, :, :3]
+        idx = palette_index(samples, self.palette, self.color_thr)[0].reshape(len(order), 4)
+
+        color_of = {}
+        bad = 0
+        for (r, c), corners in zip(order, idx):
+            vals = set(int(v) for v in corners if v >= 0)
+            # hover/анимация может испортить пару клеток — не повод пересканировать экран
+            if len(vals) != 1:
+                bad += 1
+                continue
+            color_of[(r, c)] = vals.pop()
+
+        if bad > max(1, len(order) // 4):
+            return False
+
+        for (r, c), v in color_of.items():
+            for rr, cc in ((r, c + 1), (r + 1, c)):
+                if color_of.get((rr, cc)) == v:
+                    return False
+        return True
+
+
+if __name__ == "__main__":
+    # Оффлайн-проверка на сохранённом скриншоте:
+    #   python -m adapters.vision.locator screen.png
+    import sys
+    from PIL import Image
+
+    for path in sys.argv[1:] or ["region.png"]:
+        arr = np.asarray(Image.open(path).convert("RGB"))
+        geom = locate_board(arr)
+        print(path, "->", geom)
+        if geom is not None:
+            loc = BoardLocator()
+            loc.geometry = geom
+            crop = arr[geom.top:geom.top + geom.height, geom.left:geom.left + geom.width]
+            print("probe:", loc.probe(crop))
@@ -0,0 +1,176 @@
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from adapters.vision.get_field import screenshot_region
+from adapters.vision.settle import cell_box
+from core.solver import neighbors8
+from core.types import BoardState
+
+Box = Tuple[int, int, int, int]  # r0, c0, r1, c1 (клетки, r1/c1 не включительно)
+
+
+def flood_extent(board: BoardState, clicked: Sequence[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    """
+    Клетки, которые могут измениться после кликов: сами клетки и всё, куда может дойти flood-fill.
+    Заливка идёт только через нули. Клетка точно не ноль, если рядом отмеченная мина или
+    открытая цифра, у которой ещё есть мины и все её закрытые клетки — соседи этой клетки;
+    дальше таких клеток не расширяемся (сами они открыться могут).
+    """
+    rows, cols = board.rows, board.cols
+    field, mine = board.field, board.mine
+
+    def may_be_zero(r, c):
+        nbs = set(neighbors8(r, c, rows, cols))
+        for rr, cc in nbs:
+            if mine[rr][cc] == 1:
+                return False
+        for rr, cc in nbs:
+            v = field[rr][cc]
+            if not 1 <= v <= 8:
+                continue
+            need = v
+            unknown = []
+            for r2, c2 in neighbors8(rr, cc, rows, cols):
+                if mine[r2][c2] == 1:
+                    need -= 1
+                elif field[r2][c2] == -1 and (r2, c2) != (r, c):
+                    unknown.append((r2, c2))
+            if need > 0 and all(u in nbs for u in unknown):
+                return False
+        return True
+
+    out: Set[Tuple[int, int]] = set()
+    stack = [(r, c) for r, c in clicked if field[r][c] == -1]
+    while stack:
+        r, c = stack.pop()
+        if (r, c) in out:
+            continue
+        out.add((r, c))
+        if not may_be_zero(r, c):
+            continue
+        for rr, cc in neighbors8(r, c, rows, cols):
+            if (rr, cc) not in out and field[rr][cc] == -1 and mine[rr][cc] != 1:
+                stack.append((rr, cc))
+    return out
+
+
+def cell_boxes(cells: Set[Tuple[int, int]]) -> List[Box]:
+    """
+    Клетки -> прямоугольники: связные (8-соседство) группы, их bounding box'ы,
+    пересекающиеся/соприкасающиеся box'ы сливаются.
+    """
+    boxes: List[Box] = []
+    left = set(cells)
+    while left:
+        r, c = left.pop()
+        r0, c0, r1, c1 = r, c, r + 1, c + 1
+        stack = [(r, c)]
+        while stack:
+            r, c = stack.pop()
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nb = (r + dr, c + dc)
+                    if nb in left:
+                        left.discard(nb)
+                        stack.append(nb)
+                        r0, c0 = min(r0, nb[0]), min(c0, nb[1])
+                        r1, c1 = max(r1, nb[0] + 1), max(c1, nb[1] + 1)
+        boxes.append((r0, c0, r1, c1))
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    boxes.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def paste_cells(img: np.ndarray, area, cells: Set[Tuple[int, int]], grab: Callable = screenshot_region) -> int:
+    """Снять прямоугольники клеток (cell_boxes) и вклеить в кадр img всей области. Возвращает байты захвата."""
+    LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area
+    n = 0
+    for r0, c0, r1, c1 in cell_boxes(cells):
+        x0, y0, _, _ = cell_box(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, r0, c0)
+        _, _, x1, y1 = cell_box(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, r1 - 1, c1 - 1)
+        sub = np.asarray(grab(x0, y0, x1 - x0, y1 - y0))[:, :, :3]
+        img[y0 - TOP:y1 - TOP, x0 - LEFT:x1 - LEFT] = sub
+        n += sub.size
+    return n
+
+
+class PartialCapture:
+    """
+    Захват только той части поля, что могла измениться с прошлого тика.
+
+    Держит последний полный кадр области; после кликов expect() считает, какие клетки могли
+    измениться (flood_extent), capture() снимает только их прямоугольники и вклеивает в кадр.
+    Полный захват — на первом тике, после invalidate() и раз в full_every тиков (страховка
+    от анимаций/ручных кликов).
+    """
+
+    def __init__(self, full_every: int = 20, grab: Callable = screenshot_region):
+        self.full_every = int(full_every)
+        self.grab = grab
+        self._img: Optional[np.ndarray] = None
+        self._area = None
+        self._pending: Optional[Set[Tuple[int, int]]] = None
+        self._since_full = 0
+
+        self.ticks = 0
+        self.full = 0
+        self.bytes = 0
+        self.full_bytes = 0
+
+    def invalidate(self):
+        self._img = None
+        self._pending = None
+
+    def expect(self, board: BoardState, clicked: Sequence[Tuple[int, int]]):
+        """После кликов: что перечитать на следующем тике (накапливается, если тиков без захвата несколько)."""
+        cells = flood_extent(board, clicked)
+        self._pending = cells if self._pending is None else self._pending | cells
+
+    def capture(self, area) -> Tuple[np.ndarray, Optional[Set[Tuple[int, int]]]]:
+        """
+        (кадр RGB всей области, клетки которые перечитать | None — перечитать все закрытые).
+        """
+        LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area
+        self.ticks += 1
+        full_size = WIDTH * HEIGHT * 3
+        self.full_bytes += full_size
+
+        need_full = (
+            self._img is None
+            or self._area != area
+            or self._pending is None
+            or self._since_full + 1 >= self.full_every
+        )
+        if need_full:
+            self._img = np.array(self.grab(LEFT, TOP, WIDTH, HEIGHT))[:, :, :3]
+            self._area = area
+            self._pending = None
+            self._since_full = 0
+            self.full += 1
+            self.bytes += full_size
+            return self._img, None
+
+        cells = self._pending
+        self._pending = set()
+        self._since_full += 1
+        self.bytes += paste_cells(self._img, area, cells, self.grab)
+        return self._img, cells
+
+    def report(self, name: str = "partial capture"):
+        if self.ticks:
+            print(f"{name}: ticks={self.ticks} full={self.full} "
+                  f"bytes/tick={self.bytes / self.ticks / 1024:.1f}KiB "
+                  f"({self.bytes / max(1, self.full_bytes) * 100:.1f}% of full captures)")
@@ -0,0 +1,280 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field as dc_field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.types import Action
+
+
+@dataclass
+class Frame:
+    seq: int
+    epoch: int          # номер «поколения» доски: растёт после каждой пачки кликов
+    t_capture: float
+    img: np.ndarray
+
+
+@dataclass
+class Plan:
+    epoch: int
+    frame_seq: int
+    actions: List[Action]
+    t_ready: float
+
+
+class FrameBuffer:
+    """
+    Двойной буфер: захват пишет в свободный слот, воркер всегда читает последний кадр.
+    Необработанный кадр просто перезаписывается более свежим (считаем такие в overwritten).
+    """
+
+    def __init__(self):
+        self._slots: List[Optional[Frame]] = [None, None]
+        self._latest = -1
+        self._cond = threading.Condition()
+        self.overwritten = 0
+        self._consumed_seq = -1
+
+    def pending(self) -> bool:
+        """Есть опубликованный, но ещё не взятый воркером кадр."""
+        with self._cond:
+            fr = self._slots[self._latest] if self._latest >= 0 else None
+            return fr is not None and fr.seq > self._consumed_seq
+
+    def publish(self, frame: Frame):
+        with self._cond:
+            if self._latest >= 0:
+                prev = self._slots[self._latest]
+                if prev is not None and prev.seq > self._consumed_seq:
+                    self.overwritten += 1
+            slot = 1 - self._latest if self._latest >= 0 else 0
+            self._slots[slot] = frame
+            self._latest = slot
+            self._cond.notify_all()
+
+    def take_latest(self, after_seq: int, min_epoch: int, timeout: float = 0.5) -> Optional[Frame]:
+        """Ждёт кадр новее after_seq и не старше min_epoch."""
+        with self._cond:
+            deadline = time.perf_counter() + timeout
+            while True:
+                fr = self._slots[self._latest] if self._latest >= 0 else None
+                if fr is not None and fr.seq > after_seq and fr.epoch >= min_epoch:
+                    self._consumed_seq = fr.seq
+                    return fr
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    return None
+                self._cond.wait(left)
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, dt: float):
+        self.count += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+@dataclass
+class PipelineStats:
+    stages: Dict[str, StageStats] = dc_field(default_factory=dict)
+    plan_depth_max: int = 0
+    stale_frames: int = 0
+    stale_plans: int = 0
+    errors: int = 0
+
+    def add(self, stage: str, dt: float):
+        self.stages.setdefault(stage, StageStats()).add(dt)
+
+
+class VisionPipeline:
+    """
+    capture-поток -> FrameBuffer -> worker (распознавание + solver) -> очередь планов (1) -> input-поток.
+
+    Против «кликов по старой доске»:
+      - после каждой пачки кликов epoch += 1;
+      - кадры, начатые до конца кликов, несут старый epoch и воркером не берутся;
+      - план с epoch != текущего input-поток выкидывает;
+      - воркер не решает снова, пока его план не исполнен (backpressure).
+    OpenCV/NumPy отпускают GIL, поэтому захват и распознавание реально идут параллельно.
+    """
+
+    def __init__(
+        self,
+        grab: Callable[[], np.ndarray],
+        solve: Callable[[np.ndarray], List[Action]],
+        execute: Callable[[List[Action]], None],
+        park: Optional[Callable[[], None]] = None,
+        max_actions: int = 5,
+        settle_delay: float = 0.02,
+    ):
+        self.grab = grab
+        self.solve = solve
+        self.execute = execute
+        self.park = park
+        self.max_actions = max_actions
+        self.settle_delay = settle_delay
+
+        self.frames = FrameBuffer()
+        self.plans: "queue.Queue[Plan]" = queue.Queue(maxsize=1)
+        self.stats = PipelineStats()
+
+        self._epoch = 0
+        self._clicking = threading.Event()
+        self._executed = threading.Condition()
+        self._stop = threading.Event()
+        self._seq = 0
+        self._last_epoch = -1
+        self._plans_done = 0
+        self.stop_reason = ""
+        self._error: Optional[Exception] = None  # упавший фоновый поток — пробрасывает run()
+
+    # -------------------- threads --------------------
+
+    def _guarded(self, loop: Callable[[], None]):
+        """Фоновый поток: исключение останавливает весь конвейер, а не молча убивает поток."""
+        try:
+            loop()
+        except Exception as e:
+            self._error = e
+            self.stop_reason = f"{threading.current_thread().name} failed: {e}"
+            self._stop.set()
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            epoch = self._epoch
+            # держим не больше одного кадра «впрок», иначе захват съедает CPU воркера
+            if self._clicking.is_set() or (self.frames.pending() and self._last_epoch == epoch):
+                time.sleep(0.001)
+                continue
+
+            t0 = time.perf_counter()
+            img = self.grab()
+            t1 = time.perf_counter()
+            self.stats.add("capture", t1 - t0)
+
+            # пока снимали, успели кликнуть — кадр уже не про текущую доску
+            if self._clicking.is_set() or epoch != self._epoch:
+                self.stats.stale_frames += 1
+                continue
+
+            self._seq += 1
+            self._last_epoch = epoch
+            self.frames.publish(Frame(seq=self._seq, epoch=epoch, t_capture=t1, img=img))
+
+    def _worker_loop(self):
+        last_seq = 0
+        while not self._stop.is_set():
+            epoch = self._epoch
+            fr = self.frames.take_latest(last_seq, min_epoch=epoch)
+            if fr is None:
+                continue
+            last_seq = fr.seq
+
+            t0 = time.perf_counter()
+            try:
+                actions = self.solve(fr.img)
+            except RuntimeError as e:
+                # hover/артефакт — просто ждём следующий кадр
+                self.stats.errors += 1
+                print("WARN:", e)
+                continue
+            t1 = time.perf_counter()
+            self.stats.add("solve", t1 - t0)
+            self.stats.add("frame_age", t0 - fr.t_capture)
+
+            if not actions:
+                self.stop_reason = "No actions"
+                self._stop.set()
+                return
+
+            # input-поток мог умереть, не забрав прошлый план: не висим в put после stop
+            plan = Plan(epoch=fr.epoch, frame_seq=fr.seq, actions=actions[:self.max_actions], t_ready=t1)
+            while not self._stop.is_set():
+                try:
+                    self.plans.put(plan, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if self._stop.is_set():
+                return
+            self.stats.plan_depth_max = max(self.stats.plan_depth_max, self.plans.qsize())
+
+            # backpressure: ждём, пока input-поток не исполнит (или не выкинет) план
+            with self._executed:
+                while self._epoch == fr.epoch and not self._stop.is_set():
+                    self._executed.wait(0.1)
+
+    def _input_loop(self, max_plans: int):
+        while not self._stop.is_set():
+            try:
+                plan = self.plans.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if plan.epoch != self._epoch:
+                self.stats.stale_plans += 1
+                continue
+
+            t0 = time.perf_counter()
+            self.stats.add("queue_wait", t0 - plan.t_ready)
+            self._clicking.set()
+            try:
+                self.execute(plan.actions)
+                if self.park is not None:
+                    self.park()
+                time.sleep(self.settle_delay)
+            finally:
+                with self._executed:
+                    self._epoch += 1
+                    self._executed.notify_all()
+                self._clicking.clear()
+            self.stats.add("click", time.perf_counter() - t0)
+
+            self._plans_done += 1
+            if self._plans_done >= max_plans:
+                self.stop_reason = "Reached max plans"
+                self._stop.set()
+
+    # -------------------- api --------------------
+
+    def run(self, max_plans: int = 1000) -> PipelineStats:
+        threads = [
+            threading.Thread(target=self._guarded, args=(self._capture_loop,), name="capture", daemon=True),
+            threading.Thread(target=self._guarded, args=(self._worker_loop,), name="worker", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        # input — в текущем потоке: pyautogui.FAILSAFE бросает исключение именно здесь
+        try:
+            self._input_loop(max_plans)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join(timeout=2.0)
+
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def report(self):
+        s = self.stats
+        print("pipeline:", self.stop_reason or "stopped",
+              f"plans={self._plans_done} frames={self._seq}")
+        for name, st in s.stages.items():
+            print(f"  {name:<10} n={st.count:<5} mean={st.mean * 1000:.2f}ms max={st.max * 1000:.2f}ms")
+        print(f"  queues: plan_depth_max={s.plan_depth_max} frames_overwritten={self.frames.overwritten} "
+              f"stale_frames={s.stale_frames} stale_plans={s.stale_plans} errors={s.errors}")
@@ -0,0 +1,154 @@
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+# Формат файла записи (append-only, little-endian):
+#   MAGIC
+#   запись = REC_HEADER + zlib(кадр RGB uint8) + json(meta)
+# Если процесс упал посреди записи — хвост просто не читается (reader проверяет длины),
+# а Recorder при дозаписи его обрезает.
+MAGIC = b"MSREC\x00\x01\x00"
+REC_HEADER = struct.Struct("<IIdHHBII")  # rec_len, tick, t, h, w, ch, img_len, meta_len
+
+
+@dataclass
+class RecordedTick:
+    tick: int
+    t: float
+    img: np.ndarray      # RGB (h, w, ch)
+    meta: dict           # field, mine, actions, cols, rows, total_mines (+ error, если тик не решился)
+
+
+def action_to_dict(a) -> dict:
+    return {"kind": a.kind, "r": a.r, "c": a.c, "reason": a.reason, "risk": getattr(a, "risk", None)}
+
+
+class Recorder:
+    """
+    Пишет каждый захваченный кадр поля + результат распознавания и solver'а.
+    Используется как контекст-менеджер или через close().
+    Существующий файл дописывается: недописанный хвост обрезается, tick продолжается с последней записи.
+    """
+
+    def __init__(self, path: str, level: int = 1):
+        self.path = path
+        self.level = level
+        self.tick = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with Recording(path) as old:
+                end = old.end
+                if len(old):
+                    self.tick = old.tick_at(len(old) - 1) + 1
+            # как CorpusWriter: иначе новые записи лягут за мусор и reader их не найдёт
+            if end < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            self._f = open(path, "ab")
+        else:
+            self._f = open(path, "wb")
+            self._f.write(MAGIC)
+            self._f.flush()
+
+    def write(self, img, field, mine, actions, cols: int, rows: int, total_mines: Optional[int] = None,
+              error: Optional[str] = None):
+        """
+        error — тик, на котором распознавание/solver упали: кадр пишем с field=None и текстом ошибки,
+        как раз такие кадры и нужны для replay.
+        """
+        arr = np.ascontiguousarray(np.asarray(img)[:, :, :3], dtype=np.uint8)
+        h, w, ch = arr.shape
+        img_bytes = zlib.compress(arr.tobytes(), self.level)
+        meta = {
+            "field": field,
+            "mine": mine,
+            "actions": [action_to_dict(a) for a in actions],
+            "cols": cols,
+            "rows": rows,
+            "total_mines": total_mines,
+        }
+        if error is not None:
+            meta["error"] = error
+        meta = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+
+        rec_len = REC_HEADER.size + len(img_bytes) + len(meta)
+        self._f.write(REC_HEADER.pack(rec_len, self.tick, time.time(), h, w, ch, len(img_bytes), len(meta)))
+        self._f.write(img_bytes)
+        self._f.write(meta)
+        self._f.flush()
+        self.tick += 1
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """
+    Чтение записи через mmap: при открытии строим только индекс смещений,
+    кадры распаковываются лениво при обращении.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a recording: {path}")
+        self.end = len(MAGIC)  # конец последней целой записи
+        self.offsets: List[int] = self._build_index()
+
+    def _build_index(self) -> List[int]:
+        offsets = []
+        pos = len(MAGIC)
+        end = len(self._mm)
+        while pos + REC_HEADER.size <= end:
+            rec_len = REC_HEADER.unpack_from(self._mm, pos)[0]
+            if rec_len < REC_HEADER.size or pos + rec_len > end:
+                break  # недописанный хвост
+            offsets.append(pos)
+            pos += rec_len
+        self.end = pos
+        return offsets
+
+    def tick_at(self, i: int) -> int:
+        """tick записи i — только заголовок, без распаковки кадра."""
+        return REC_HEADER.unpack_from(self._mm, self.offsets[i])[1]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, i: int) -> RecordedTick:
+        pos = self.offsets[i]
+        _, tick, t, h, w, ch, img_len, meta_len = REC_HEADER.unpack_from(self._mm, pos)
+        p = pos + REC_HEADER.size
+        raw = zlib.decompress(self._mm[p:p + img_len])
+        img = np.frombuffer(raw, dtype=np.uint8).reshape(h, w, ch)
+        p += img_len
+        meta = json.loads(self._mm[p:p + meta_len].decode("utf-8"))
+        return RecordedTick(tick=tick, t=t, img=img, meta=meta)
+
+    def __iter__(self) -> Iterator[RecordedTick]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,58 @@
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from adapters.vision.get_field import screenshot_region
+
+
+def cell_box(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, r: int, c: int) -> Tuple[int, int, int, int]:
+    """Экранный прямоугольник клетки (x0, y0, x1, y1), x1/y1 не включительно."""
+    cell_w = WIDTH / COLS
+    cell_h = HEIGHT / ROWS
+    x0 = int(round(LEFT + c * cell_w))
+    y0 = int(round(TOP + r * cell_h))
+    x1 = int(round(LEFT + (c + 1) * cell_w))
+    y1 = int(round(TOP + (r + 1) * cell_h))
+    return x0, y0, x1, y1
+
+
+def cells_signature(arr: np.ndarray, boxes: Sequence[Tuple[int, int, int, int]], origin: Tuple[int, int],
+                    step: int = 3) -> List[np.ndarray]:
+    """
+    Прореженные (каждый step-й пиксель) кропы клеток из кадра arr, снятого с левого верхнего угла origin.
+    """
+    ox, oy = origin
+    out = []
+    for x0, y0, x1, y1 in boxes:
+        out.append(arr[y0 - oy:y1 - oy:step, x0 - ox:x1 - ox:step, :3].astype(np.int16))
+    return out
+
+
+def signatures_close(a: List[np.ndarray], b: List[np.ndarray], thr: float = 4.0) -> bool:
+    """Одинаковы ли сигнатуры с точностью до шума: средняя |разница| по каждой клетке <= thr."""
+    if a is None or b is None or len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if x.shape != y.shape or float(np.abs(x - y).mean()) > thr:
+            return False
+    return True
+
+
+def make_cells_probe(area, cells: Sequence[Tuple[int, int]], step: int = 3) -> Callable[[], List[np.ndarray]]:
+    """
+    probe для SettleDetector: снимает только bounding box кликнутых клеток (а не всё поле)
+    и возвращает их сигнатуру.
+    """
+    LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area
+    boxes = [cell_box(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, r, c) for r, c in cells]
+    bx0 = min(b[0] for b in boxes)
+    by0 = min(b[1] for b in boxes)
+    bx1 = max(b[2] for b in boxes)
+    by1 = max(b[3] for b in boxes)
+
+    def probe():
+        arr = np.asarray(screenshot_region(bx0, by0, bx1 - bx0, by1 - by0))
+        return cells_signature(arr, boxes, (bx0, by0), step=step)
+
+    return probe
+
@@ -0,0 +1,214 @@
+"""
+Единая точка входа:
+
+    python -m cli vision   --preset medium [--pipelined] [--record run.msrec] [--input auto] [--budget 0.02]
+                           [--detector rules|centroid]
+                           [--dump-interval 1.0] [--trace trace.json] [--corpus positions.mspos]
+                           [--profile fast|balanced|strongest] [--no-speculative] [--solver-service ADDR]
+    python -m cli selenium --mode highlight [--tick-sleep 0.2] [--dump-interval 1.0] [--trace trace.json]
+                           [--corpus positions.mspos] [--profile fast|balanced|strongest]
+                           [--attach 127.0.0.1:9222] [--chrome-profile DIR] [--solver-service ADDR]
+    python -m cli farm --serve-replica --sessions 4 --games 25
+    python -m cli calibrate [--images images] [--out digit_hsv_ranges.json] [--compile-only]
+    python -m cli bench detection [--boards 20 ...]
+    python -m cli bench replay run.msrec
+    python -m cli bench selenium [--games 20 --seed 1]
+    python -m cli bench driver [--repeat 3]
+    python -m cli bench startup [--repeat 5]
+    python -m cli solver serve [--address /tmp/ms-solver.sock] [--workers N]
+    python -m cli solver bench [--clients 16 --games 40]
+
+Адаптеры (cv2, pyautogui, selenium, tabulate) импортируются только внутри нужной подкоманды.
+--import-only: загрузить модули подкоманды и выйти (так меряется холодный старт).
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def cmd_vision(args):
+    import vision_main
+    if args.import_only:
+        return
+    if args.pipelined:
+        vision_main.run_game_pipelined(args.preset, pre_start_delay=args.delay, record_path=args.record,
+                                       input_backend=args.input, click_budget=args.budget,
+                                       detector=args.detector, profile=args.profile,
+                                       solver_service=args.solver_service)
+    else:
+        vision_main.run_game(args.preset, save_debug=args.save_debug, pre_start_delay=args.delay,
+                             record_path=args.record, input_backend=args.input, click_budget=args.budget,
+                             dump_interval=args.dump_interval, trace_path=args.trace, detector=args.detector,
+                             corpus_path=args.corpus, speculative=args.speculative, profile=args.profile,
+                             solver_service=args.solver_service)
+
+
+def cmd_selenium(args):
+    import selenium_main
+    if args.import_only:
+        return
+    selenium_main.run(mode=args.mode, tick_sleep=args.tick_sleep,
+                      dump_interval=args.dump_interval, trace_path=args.trace, corpus_path=args.corpus,
+                      profile=args.profile, debugger_address=args.attach, profile_dir=args.chrome_profile,
+                      solver_service=args.solver_service)
+
+
+def cmd_farm(args, rest):
+    import selenium_farm
+    if args.import_only:
+        return
+    selenium_farm.main(rest)
+
+
+def cmd_solver(args, rest):
+    from utils import solver_service
+    if args.import_only:
+        return
+    solver_service.main(rest)
+
+
+def cmd_calibrate(args):
+    from utils import calibrate_color
+    if args.import_only:
+        return
+    if args.compile_only:
+        calibrate_color.compile_json(args.out)
+    else:
+        calibrate_color.calibrate_from_alpha(images_dir=args.images, out_json=args.out)
+
+
+def cmd_bench(args, rest):
+    if args.what == "detection":
+        from utils import bench_detection
+        if not args.import_only:
+            bench_detection.main(rest)
+    elif args.what == "replay":
+        from utils import replay_vision
+        if not args.import_only:
+            res = replay_vision.replay(rest[0], verbose="-v" in rest[1:])
+            print(f"ticks={res['ticks']} {res['ticks_per_sec']:.1f} ticks/s "
+                  f"read={res['read_ms']:.2f}ms solve={res['solve_ms']:.2f}ms errors={res['errors']}")
+    elif args.what == "selenium":
+        from utils import bench_selenium_e2e
+        if not args.import_only:
+            bench_selenium_e2e.main(rest)
+    elif args.what == "driver":
+        from utils import bench_selenium_startup
+        if not args.import_only:
+            bench_selenium_startup.main(rest)
+    elif args.what == "startup":
+        bench_startup(rest)
+    else:
+        raise SystemExit(f"unknown bench: {args.what}")
+
+
+# -------------------- cold start --------------------
+
+STARTUP_TARGETS = {
+    "python": [],
+    "vision": ["vision"],
+    "selenium": ["selenium"],
+    "farm": ["farm"],
+    "solver": ["solver"],
+    "calibrate": ["calibrate"],
+    "bench detection": ["bench", "detection"],
+    "bench replay": ["bench", "replay"],
+    "bench selenium": ["bench", "selenium"],
+    "bench driver": ["bench", "driver"],
+}
+
+
+def bench_startup(argv):
+    ap = argparse.ArgumentParser(prog="cli bench startup")
+    ap.add_argument("--repeat", type=int, default=5)
+    a = ap.parse_args(argv)
+
+    print(f"cold start, {a.repeat} runs each (new interpreter per run):")
+    for name, sub in STARTUP_TARGETS.items():
+        cmd = [sys.executable, "-c", "pass"] if not sub else [sys.executable, "-m", "cli", "--import-only", *sub]
+        times = []
+        err = ""
+        for _ in range(a.repeat):
+            t0 = time.perf_counter()
+            p = subprocess.run(cmd, capture_output=True, text=True)
+            times.append(time.perf_counter() - t0)
+            if p.returncode != 0:
+                err = (p.stderr.strip().splitlines() or ["?"])[-1]
+                break
+        if err:
+            print(f"  {name:<16} FAILED: {err}")
+        else:
+            print(f"  {name:<16} min={min(times) * 1000:7.1f}ms median={statistics.median(times) * 1000:7.1f}ms")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m cli")
+    ap.add_argument("--import-only", action="store_true", help="загрузить модули подкоманды и выйти")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    v = sub.add_parser("vision")
+    v.add_argument("--preset", default="medium", choices=["small", "medium", "hard", "auto"])
+    v.add_argument("--pipelined", action="store_true")
+    v.add_argument("--record", default=None)
+    v.add_argument("--input", default="auto", choices=["auto", "xtest", "pyautogui", "recording"])
+    v.add_argument("--budget", type=float, default=0.02, help="секунд на один клик")
+    v.add_argument("--detector", default="rules", choices=["rules", "centroid"],
+                   help="centroid — только по выбору, пока не померен на записях "
+                        "(python -m utils.bench_detection --eval-recording run.msrec)")
+    v.add_argument("--delay", type=float, default=2.0)
+    v.add_argument("--save-debug", action="store_true")
+    v.add_argument("--dump-interval", type=float, default=1.0, help="печать поля раз в N сек, 0 — выкл")
+    v.add_argument("--trace", default=None, help="Chrome trace JSON со спанами стадий")
+    v.add_argument("--corpus", default=None, help="дописывать позиции solver'а в корпус (.mspos)")
+    v.add_argument("--profile", default="balanced", choices=["fast", "balanced", "strongest"],
+                   help="профиль solver'а (core/strategies.py)")
+    v.add_argument("--no-speculative", dest="speculative", action="store_false",
+                   help="по 5 кликов за тик вместо всех безопасных клеток одного solve")
+    v.add_argument("--solver-service", default=None, metavar="ADDR",
+                   help="решать в solver-сервисе (Unix socket или host:port), а не в этом процессе")
+
+    s = sub.add_parser("selenium")
+    s.add_argument("--mode", default="highlight", choices=["highlight", "auto"])
+    s.add_argument("--tick-sleep", type=float, default=0.2)
+    s.add_argument("--dump-interval", type=float, default=1.0, help="печать поля раз в N сек, 0 — выкл")
+    s.add_argument("--trace", default=None, help="Chrome trace JSON со спанами стадий")
+    s.add_argument("--corpus", default=None, help="дописывать позиции solver'а в корпус (.mspos)")
+    s.add_argument("--profile", default="balanced", choices=["fast", "balanced", "strongest"],
+                   help="профиль solver'а (core/strategies.py)")
+    s.add_argument("--attach", default=None, metavar="HOST:PORT",
+                   help="подключиться к запущенному Chrome (--remote-debugging-port) вместо запуска")
+    s.add_argument("--chrome-profile", default=None, help="каталог профиля Chrome (иначе MS_CHROME_PROFILE / ./chrome_profile)")
+    s.add_argument("--solver-service", default=None, metavar="ADDR",
+                   help="решать в solver-сервисе (Unix socket или host:port), а не в этом процессе")
+
+    sub.add_parser("farm", add_help=False)  # аргументы разбирает selenium_farm.main
+    sub.add_parser("solver", add_help=False)  # serve | bench, аргументы разбирает utils/solver_service.main
+
+    c = sub.add_parser("calibrate")
+    c.add_argument("--images", default="images")
+    c.add_argument("--out", default="digit_hsv_ranges.json")
+    c.add_argument("--compile-only", action="store_true", help="только собрать .bin из готового json")
+
+    b = sub.add_parser("bench")
+    b.add_argument("what", choices=["detection", "replay", "selenium", "driver", "startup"])
+
+    args, rest = ap.parse_known_args(argv)
+    if args.cmd == "bench":
+        cmd_bench(args, rest)
+        return
+    if args.cmd == "farm":
+        cmd_farm(args, rest)
+        return
+    if args.cmd == "solver":
+        cmd_solver(args, rest)
+        return
+    if rest:
+        ap.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    {"vision": cmd_vision, "selenium": cmd_selenium, "calibrate": cmd_calibrate}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import random
+from typing import Any, Iterable, List, Optional, Sequence
+
+from core.types import OPEN_UNKNOWN
+
+# состояния клетки в хеше: field OPEN_UNKNOWN (-2), -1, 0..8 -> индекс 0..10
+_MIN_STATE = OPEN_UNKNOWN
+_STATES = 8 - _MIN_STATE + 1
+
+
+def _slot(v: int) -> int:
+    if not _MIN_STATE <= v <= 8:
+        raise ValueError(f"BoardHash: field value {v} out of range {_MIN_STATE}..8")
+    return v - _MIN_STATE
+
+
+class BoardHash:
+    """
+    Zobrist-хеш поля: XOR случайных 64-битных ключей (клетка, значение).
+    Обновляется инкрементально по changes (r, c, v) — O(изменений), а не O(площади).
+
+    mine в хеш не входит: это производная solver'а от истории field (детерминированная),
+    так что одинаковый field после того же solver'а даёт тот же mine.
+    """
+
+    def __init__(self, rows: int, cols: int, seed: int = 0x5EED):
+        self.rows = rows
+        self.cols = cols
+        rng = random.Random(seed)
+        self._keys: List[int] = [rng.getrandbits(64) for _ in range(rows * cols * _STATES)]
+        self.prev: List[int] = [-1] * (rows * cols)  # значение field, которое сейчас в хеше
+        # полностью закрытая доска
+        self.value = 0
+        for i in range(rows * cols):
+            self.value ^= self._keys[i * _STATES + _slot(-1)]
+
+    def update(self, changes: Iterable[Sequence[int]]) -> int:
+        keys, prev = self._keys, self.prev
+        h = self.value
+        for r, c, v in changes:
+            i = r * self.cols + c
+            old = prev[i]
+            if old == v:
+                continue
+            h ^= keys[i * _STATES + _slot(old)] ^ keys[i * _STATES + _slot(v)]
+            prev[i] = v
+        self.value = h
+        return h
+
+
+class SolveMemo:
+    """
+    Мемо перед solver'ом: если отпечаток доски тот же, что при последнем решении,
+    отдаём сохранённый результат (actions, наборы подсветки и т.п.) без solve/highlight.
+    Храним одну последнюю запись — в highlight-режиме доска либо та же, либо новая.
+    """
+
+    def __init__(self, rows: int, cols: int):
+        self.hash = BoardHash(rows, cols)
+        self._key: Optional[int] = None
+        self._value: Any = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, changes: Iterable[Sequence[int]]) -> Optional[Any]:
+        """Учитывает changes этого тика и возвращает кеш, если доска не изменилась (иначе None)."""
+        h = self.hash.update(changes)
+        if self._key == h:
+            self.hits += 1
+            return self._value
+        self.misses += 1
+        return None
+
+    def store(self, value: Any):
+        self._key = self.hash.value
+        self._value = value
+
+    def report(self, name: str = "solve memo"):
+        n = self.hits + self.misses
+        if n:
+            print(f"{name}: hits={self.hits}/{n} ({self.hits / n * 100:.1f}%)")
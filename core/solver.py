@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Tuple
+import time
+from dataclasses import dataclass, field as dc_field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from core.tiles import TileIndex
 from core.types import Action  # поправь путь под свою структуру
 
 
@@ -27,39 +29,126 @@ class Constraint:
     need: int
 
 
-def build_constraints(field: List[List[int]], mine: List[List[int]]) -> List[Constraint]:
+@dataclass
+class SolverStats:
+    """
+    Что делал solver_step на одном тике (заполняется, только если передан stats=SolverStats()).
+    Время — секунды, суммарно по всем итерациям propagate.
+    """
+    constraints: int = 0                                      # ограничений на первой итерации
+    components: List[int] = dc_field(default_factory=list)    # размеры компонент фронтира (закрытых клеток), по убыванию
+    iters: int = 0                                            # итераций propagate_deterministic
+    max_iters: int = 0
+    basic_safe: int = 0                                       # новых safe-клеток от apply_basic_rules
+    basic_mines: int = 0                                      # новых мин от apply_basic_rules
+    subset_safe: int = 0
+    subset_mines: int = 0
+    t_build: float = 0.0
+    t_basic: float = 0.0
+    t_subset: float = 0.0
+    t_guess: float = 0.0
+    t_total: float = 0.0
+    guess: bool = False                                       # результат — догадка (safe-клеток нет)
+    guess_risk: Optional[float] = None
+    strategies: Dict[str, float] = dc_field(default_factory=dict)  # секунды по стратегиям (core/strategies.Solver)
+
+    def summary(self) -> str:
+        comps = self.components[:5]
+        more = f"+{len(self.components) - 5}" if len(self.components) > 5 else ""
+        return (f"cons={self.constraints} comps={comps}{more} iters={self.iters}/{self.max_iters} "
+                f"basic={self.basic_safe}s/{self.basic_mines}m subset={self.subset_safe}s/{self.subset_mines}m "
+                f"ms: build={self.t_build * 1000:.2f} basic={self.t_basic * 1000:.2f} "
+                f"subset={self.t_subset * 1000:.2f} guess={self.t_guess * 1000:.2f} "
+                f"total={self.t_total * 1000:.2f}"
+                + (f" GUESS risk={self.guess_risk:.3f}" if self.guess and self.guess_risk is not None else "")
+                + "".join(f" {k}={v * 1000:.2f}" for k, v in self.strategies.items()))
+
+
+def split_components(cons: List[Constraint]) -> List[Tuple[List[Tuple[int, int]], List[Constraint]]]:
+    """Компоненты фронтира: (закрытые клетки, их ограничения); клетки связаны, если есть общее ограничение."""
+    parent: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for cst in cons:
+        it = iter(cst.U)
+        first = next(it)
+        parent.setdefault(first, first)
+        root = find(first)
+        for cell in it:
+            parent.setdefault(cell, cell)
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    groups: Dict[Tuple[int, int], Tuple[List[Tuple[int, int]], List[Constraint]]] = {}
+    for cell in parent:
+        groups.setdefault(find(cell), ([], []))[0].append(cell)
+    for cst in cons:
+        groups[find(next(iter(cst.U)))][1].append(cst)
+    return list(groups.values())
+
+
+def frontier_components(cons: List[Constraint]) -> List[int]:
+    """Размеры компонент фронтира (закрытых клеток), по убыванию."""
+    return sorted((len(cells) for cells, _ in split_components(cons)), reverse=True)
+
+
+def _all_cells(rows: int, cols: int):
+    for r in range(rows):
+        for c in range(cols):
+            yield r, c
+
+
+def build_constraints(
+    field: List[List[int]],
+    mine: List[List[int]],
+    cells: Optional[Iterable[Tuple[int, int]]] = None,
+    bad: Optional[Set[Tuple[int, int]]] = None,
+) -> List[Constraint]:
+    """
+    cells — какие клетки смотреть (фронтир из TileIndex); None — вся доска.
+    bad — если задан, цифры с противоречием складываются сюда и пропускаются, вместо RuntimeError.
+    """
     rows = len(field)
     cols = len(field[0]) if rows else 0
 
     cons: List[Constraint] = []
-    for r in range(rows):
-        for c in range(cols):
-            v = field[r][c]
-            if not (1 <= v <= 8):
-                continue
+    for r, c in (cells if cells is not None else _all_cells(rows, cols)):
+        v = field[r][c]
+        if not (1 <= v <= 8):
+            continue
 
-            U: Set[Tuple[int, int]] = set()
-            m = 0
+        U: Set[Tuple[int, int]] = set()
+        m = 0
 
-            for rr, cc in neighbors8(r, c, rows, cols):
-                if mine[rr][cc] == 1:
-                    m += 1
-                elif field[rr][cc] == -1 and mine[rr][cc] != 1:
-                    U.add((rr, cc))
+        for rr, cc in neighbors8(r, c, rows, cols):
+            if mine[rr][cc] == 1:
+                m += 1
+            elif field[rr][cc] == -1 and mine[rr][cc] != 1:
+                U.add((rr, cc))
 
-            need = v - m
+        need = v - m
+        if need < 0 or need > len(U):
+            if bad is not None:
+                bad.add((r, c))
+                continue
             if need < 0:
                 raise RuntimeError(f"Contradiction at {(r, c)}: m={m} > v={v}")
-            if need > len(U):
-                raise RuntimeError(f"Contradiction at {(r, c)}: need={need} > u={len(U)}")
+            raise RuntimeError(f"Contradiction at {(r, c)}: need={need} > u={len(U)}")
 
-            if U:
-                cons.append(Constraint(r=r, c=c, v=v, U=U, need=need))
+        if U:
+            cons.append(Constraint(r=r, c=c, v=v, U=U, need=need))
 
     return cons
 
 
-def apply_basic_rules(cons: List[Constraint], mine: List[List[int]]) -> Tuple[bool, Set[Tuple[int, int]]]:
+def apply_basic_rules(cons: List[Constraint], mine: List[List[int]],
+                      stats: Optional[SolverStats] = None) -> Tuple[bool, Set[Tuple[int, int]]]:
     safe: Set[Tuple[int, int]] = set()
     changed_mines = False
 
@@ -71,23 +160,35 @@ def apply_basic_rules(cons: List[Constraint], mine: List[List[int]]) -> Tuple[bo
                 if mine[rr][cc] != 1:
                     mine[rr][cc] = 1
                     changed_mines = True
+                    if stats is not None:
+                        stats.basic_mines += 1
 
     return changed_mines, safe
 
 
-def apply_subset_rule(cons: List[Constraint], mine: List[List[int]]) -> Tuple[bool, Set[Tuple[int, int]]]:
+def apply_subset_rule(cons: List[Constraint], mine: List[List[int]],
+                      bad: Optional[Set[Tuple[int, int]]] = None,
+                      stats: Optional[SolverStats] = None) -> Tuple[bool, Set[Tuple[int, int]]]:
     safe: Set[Tuple[int, int]] = set()
     changed_mines = False
 
-    n = len(cons)
-    for i in range(n):
-        A = cons[i]
-        for j in range(n):
-            if i == j:
-                continue
+    # клетка -> индексы ограничений, где она есть: надмножество A обязано делить с A клетку,
+    # так что вместо всех пар смотрим только соседей по клеткам
+    by_cell: Dict[Tuple[int, int], List[int]] = {}
+    for i, cst in enumerate(cons):
+        for cell in cst.U:
+            by_cell.setdefault(cell, []).append(i)
+
+    for i, A in enumerate(cons):
+        cand: Set[int] = set()
+        for cell in A.U:
+            cand.update(by_cell[cell])
+        cand.discard(i)
+
+        for j in sorted(cand):
             B = cons[j]
 
-            if not A.U.issubset(B.U):
+            if len(A.U) >= len(B.U) or not A.U.issubset(B.U):
                 continue
 
             D = B.U - A.U
@@ -96,6 +197,10 @@ def apply_subset_rule(cons: List[Constraint], mine: List[List[int]]) -> Tuple[bo
 
             k = B.need - A.need
             if k < 0 or k > len(D):
+                if bad is not None:
+                    bad.add((A.r, A.c))
+                    bad.add((B.r, B.c))
+                    continue
                 raise RuntimeError(
                     f"Subset contradiction: {(A.r, A.c)} ⊆ {(B.r, B.c)} "
                     f"but k={k}, |D|={len(D)}"
@@ -108,19 +213,49 @@ def apply_subset_rule(cons: List[Constraint], mine: List[List[int]]) -> Tuple[bo
                     if mine[rr][cc] != 1:
                         mine[rr][cc] = 1
                         changed_mines = True
+                        if stats is not None:
+                            stats.subset_mines += 1
 
     return changed_mines, safe
 
 
-def propagate_deterministic(field: List[List[int]], mine: List[List[int]], max_iters: int = 50) -> Tuple[bool, Set[Tuple[int, int]]]:
+def propagate_deterministic(
+    field: List[List[int]],
+    mine: List[List[int]],
+    max_iters: int = 50,
+    cells: Optional[List[Tuple[int, int]]] = None,
+    bad: Optional[Set[Tuple[int, int]]] = None,
+    stats: Optional[SolverStats] = None,
+) -> Tuple[bool, Set[Tuple[int, int]]]:
     overall_changed = False
     overall_safe: Set[Tuple[int, int]] = set()
-
-    for _ in range(max_iters):
-        cons = build_constraints(field, mine)
-
-        changed1, safe1 = apply_basic_rules(cons, mine)
-        changed2, safe2 = apply_subset_rule(cons, mine)
+    if stats is not None:
+        stats.max_iters = max_iters
+
+    for it in range(max_iters):
+        if stats is None:
+            # отмеченные мины фронтир не расширяют — список цифр между итерациями тот же
+            cons = build_constraints(field, mine, cells, bad)
+            changed1, safe1 = apply_basic_rules(cons, mine)
+            changed2, safe2 = apply_subset_rule(cons, mine, bad)
+        else:
+            t0 = time.perf_counter()
+            cons = build_constraints(field, mine, cells, bad)
+            t1 = time.perf_counter()
+            changed1, safe1 = apply_basic_rules(cons, mine, stats)
+            t2 = time.perf_counter()
+            changed2, safe2 = apply_subset_rule(cons, mine, bad, stats)
+            t3 = time.perf_counter()
+
+            stats.iters = it + 1
+            stats.t_build += t1 - t0
+            stats.t_basic += t2 - t1
+            stats.t_subset += t3 - t2
+            if it == 0:
+                stats.constraints = len(cons)
+                stats.components = frontier_components(cons)
+            stats.basic_safe += len(safe1 - overall_safe)
+            stats.subset_safe += len(safe2 - overall_safe - safe1)
 
         overall_safe |= safe1
         overall_safe |= safe2
@@ -137,8 +272,10 @@ def estimate_risk_map(
     field: List[List[int]],
     mine: List[List[int]],
     total_mines: Optional[int] = None,
+    cells: Optional[List[Tuple[int, int]]] = None,
+    bad: Optional[Set[Tuple[int, int]]] = None,
 ) -> Dict[Tuple[int, int], float]:
-    cons = build_constraints(field, mine)
+    cons = build_constraints(field, mine, cells, bad)
     rows = len(field)
     cols = len(field[0]) if rows else 0
 
@@ -161,8 +298,10 @@ def estimate_risk_map(
     return risk
 
 
-def pick_min_risk_action(field: List[List[int]], mine: List[List[int]], total_mines: Optional[int]) -> Optional[Action]:
-    risk = estimate_risk_map(field, mine, total_mines=total_mines)
+def pick_min_risk_action(field: List[List[int]], mine: List[List[int]], total_mines: Optional[int],
+                         cells: Optional[List[Tuple[int, int]]] = None,
+                         bad: Optional[Set[Tuple[int, int]]] = None) -> Optional[Action]:
+    risk = estimate_risk_map(field, mine, total_mines=total_mines, cells=cells, bad=bad)
     if not risk:
         return None
 
@@ -170,17 +309,112 @@ def pick_min_risk_action(field: List[List[int]], mine: List[List[int]], total_mi
     return Action(kind="open", r=r, c=c, reason="MIN-RISK guess", risk=float(p))
 
 
+# Веса для разрешения почти-ничьих по риску (см. score_guesses)
+GUESS_RISK_EPS = 0.02
+W_RESOLVE = 0.05
+W_EDGE = 0.02
+# доля мин среди закрытых клеток, когда total_mines неизвестен (стандартные уровни: 0.12 / 0.16 / 0.21)
+DEFAULT_MINE_DENSITY = 0.16
+
+
+def score_guesses(
+    field: List[List[int]],
+    mine: List[List[int]],
+    risk: Dict[Tuple[int, int], float],
+    eps: float = GUESS_RISK_EPS,
+    prior: float = DEFAULT_MINE_DENSITY,
+) -> List[Tuple[float, float, Tuple[int, int]]]:
+    """
+    Кандидаты с риском не хуже min_risk + eps и их «полезность», одним проходом по карте риска:
+      p_zero   — вероятность, что клетка окажется 0 и откроет область (все закрытые соседи без мин,
+                 по той же карте риска, соседи считаются независимыми);
+      resolves — сколько ограничений (цифр) содержат клетку: её значение что-то доразрешит;
+      edge     — у угловых/краевых клеток меньше соседей, они чаще нули.
+    Закрытые соседи, которых нет в карте риска (total_mines неизвестен — карта только по фронтиру),
+    считаются с риском prior, а не 0: иначе неисследованные клетки выглядят слишком выгодными.
+    Возвращает [(score, risk, cell)], лучшие первыми.
+    """
+    if not risk:
+        return []
+    rows = len(field)
+    cols = len(field[0]) if rows else 0
+
+    p_min = min(risk.values())
+    cands = [cell for cell, p in risk.items() if p <= p_min + eps]
+
+    out = []
+    for r, c in cands:
+        p_zero = 1.0 - risk[(r, c)]
+        resolves = 0
+        n_nb = 0
+        for rr, cc in neighbors8(r, c, rows, cols):
+            n_nb += 1
+            if mine[rr][cc] == 1:
+                p_zero = 0.0
+            elif field[rr][cc] == -1:
+                p_zero *= 1.0 - risk.get((rr, cc), prior)
+            elif 1 <= field[rr][cc] <= 8:
+                resolves += 1
+
+        score = p_zero + W_RESOLVE * resolves / 8.0 + W_EDGE * (8 - n_nb) / 5.0
+        out.append((score, risk[(r, c)], (r, c)))
+
+    out.sort(key=lambda t: (-t[0], t[1], t[2]))
+    return out
+
+
+def pick_guess_action(field: List[List[int]], mine: List[List[int]], total_mines: Optional[int],
+                      cells: Optional[List[Tuple[int, int]]] = None,
+                      bad: Optional[Set[Tuple[int, int]]] = None) -> Optional[Action]:
+    """Как pick_min_risk_action, но из почти равных по риску выбирает ту, что вероятнее откроет больше."""
+    risk = estimate_risk_map(field, mine, total_mines=total_mines, cells=cells, bad=bad)
+    scored = score_guesses(field, mine, risk)
+    if not scored:
+        return None
+
+    _, p, (r, c) = scored[0]
+    return Action(kind="open", r=r, c=c, reason="MIN-RISK guess (info)", risk=float(p))
+
+
+GUESS_PICKERS = {
+    "min-risk": pick_min_risk_action,
+    "info": pick_guess_action,
+}
+
+
 def solver_step(
     field: List[List[int]],
     mine: List[List[int]],
     total_mines: Optional[int] = None,
+    guess: str = "min-risk",
+    tiles: Optional[TileIndex] = None,
+    bad: Optional[Set[Tuple[int, int]]] = None,
+    stats: Optional[SolverStats] = None,
 ) -> Tuple[List[Action], bool]:
     """
     Универсальный solver без UI:
     - возвращает список safe действий (open r,c)
-    - если safe нет, возвращает один min-risk guess
+    - если safe нет, возвращает один guess:
+        guess="min-risk" — клетка с минимальным риском (по умолчанию)
+        guess="info"     — min-risk, почти-ничьи разрешаются по шансу открыть область (score_guesses);
+                           в симуляторе не лучше min-risk сверх шума, поэтому только по выбору
+    tiles — TileIndex доски (BoardState.tiles): ограничения строятся только по активным тайлам.
+    bad — set: вместо RuntimeError сюда попадают цифры с противоречием (обычно неверно распознанные),
+          остальная доска решается как обычно; safe-клетки рядом с ними не отдаём.
+    stats — SolverStats, если нужно знать, что делал solver (по правилам, время, догадка);
+            None — ничего не меряем.
     """
-    changed, safe = propagate_deterministic(field, mine)
+    t_start = time.perf_counter() if stats is not None else 0.0
+    cells = tiles.active_digits(field, mine) if tiles is not None else None
+    changed, safe = propagate_deterministic(field, mine, cells=cells, bad=bad, stats=stats)
+    if tiles is not None and changed:
+        tiles.touch_active()
+
+    if bad:
+        rows = len(field)
+        cols = len(field[0]) if rows else 0
+        near_bad = {nb for r, c in bad for nb in neighbors8(r, c, rows, cols)}
+        safe -= near_bad
 
     actions: List[Action] = []
     for (r, c) in sorted(safe):
@@ -188,8 +422,17 @@ def solver_step(
             actions.append(Action(kind="open", r=r, c=c, reason="SAFE (deterministic)"))
 
     if not actions:
-        guess = pick_min_risk_action(field, mine, total_mines=total_mines)
-        if guess is not None:
-            actions.append(guess)
-
+        t_guess = time.perf_counter() if stats is not None else 0.0
+        if tiles is not None and changed:
+            cells = tiles.active_digits(field, mine)
+        act = GUESS_PICKERS[guess](field, mine, total_mines=total_mines, cells=cells, bad=bad)
+        if act is not None:
+            actions.append(act)
+        if stats is not None:
+            stats.t_guess = time.perf_counter() - t_guess
+            stats.guess = act is not None
+            stats.guess_risk = act.risk if act is not None else None
+
+    if stats is not None:
+        stats.t_total = time.perf_counter() - t_start
     return actions, changed
@@ -0,0 +1,502 @@
+"""
+Реестр стратегий solver'а и автоматический выбор цепочки под бюджет тика.
+
+Стратегии двух видов:
+  deduce — находят безопасные клетки / мины без риска (propagate_deterministic и т.п.);
+  guess  — выбирают одну клетку, когда безопасных нет (min-risk, info, exact).
+У каждой есть оценка стоимости в мс по доске (площадь, число цифр фронтира, размеры компонент).
+
+Профиль — две упорядоченные цепочки:
+  deduce от дешёвой к сильной: следующая запускается, только если предыдущие не нашли safe-клеток
+         и её оценка влезает в остаток бюджета (первая запускается всегда);
+  guess  от сильной к дешёвой: берётся первая, что влезает в бюджет и что-то вернула
+         (последняя — запасная, без проверки бюджета).
+
+    solver = make_solver("strongest")
+    actions, changed = solver(board.field, board.mine, total_mines=..., tiles=board.tiles)
+"""
+import time
+from dataclasses import dataclass
+from math import comb
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.solver import (
+    GUESS_PICKERS,
+    Constraint,
+    SolverStats,
+    apply_basic_rules,
+    build_constraints,
+    neighbors8,
+    propagate_deterministic,
+    score_guesses,
+    split_components,
+)
+from core.tiles import TileIndex
+from core.types import Action
+
+Cell = Tuple[int, int]
+
+# перебор компоненты фронтира: больше ENUM_MAX_CELLS клеток не берём вообще,
+# внутри — не больше узлов, чем влезает в остаток бюджета (ENUM_NODES_PER_MS)
+ENUM_MAX_CELLS = 40
+ENUM_NODES_PER_MS = 800
+
+# грубые оценки стоимости, мс (expert 30x16 на CPython)
+COST_PER_DIGIT = 0.004      # build_constraints + basic, на цифру фронтира
+COST_PER_CELL = 0.0006      # проход по всей доске (карта риска, неизвестные клетки)
+COST_PER_NODE = 1.0 / ENUM_NODES_PER_MS
+
+
+# -------------------- контекст тика --------------------
+
+@dataclass
+class TickContext:
+    """Всё, что стратегии видят на тике. Компоненты фронтира считаются лениво и только если нужны."""
+    field: List[List[int]]
+    mine: List[List[int]]
+    total_mines: Optional[int]
+    cells: Optional[List[Cell]]         # цифры активных тайлов (None — вся доска)
+    bad: Optional[Set[Cell]]
+    stats: Optional[SolverStats]
+    deadline: float                      # perf_counter(), после которого бюджета нет
+    _cons: Optional[List[Constraint]] = None
+    _groups: Optional[list] = None
+
+    @property
+    def area(self) -> int:
+        return len(self.field) * (len(self.field[0]) if self.field else 0)
+
+    def left_ms(self) -> float:
+        return (self.deadline - time.perf_counter()) * 1000.0
+
+    def constraints(self) -> List[Constraint]:
+        if self._cons is None:
+            self._cons = build_constraints(self.field, self.mine, self.cells, self.bad)
+        return self._cons
+
+    def groups(self) -> list:
+        """[(клетки, ограничения)] компонент фронтира по текущей доске."""
+        if self._groups is None:
+            self._groups = split_components(self.constraints())
+        return self._groups
+
+    def invalidate(self):
+        """Стратегия отметила мины — ограничения и компоненты устарели."""
+        self._cons = None
+        self._groups = None
+
+
+@dataclass(frozen=True)
+class Strategy:
+    name: str
+    kind: str                                   # "deduce" | "guess"
+    run: Callable[[TickContext], object]        # deduce -> (changed, safe); guess -> Optional[Action]
+    cost_ms: Callable[[TickContext], float]
+    reason: str = "SAFE (deterministic)"        # reason у safe-действий (для deduce)
+
+
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def register_strategy(name: str, kind: str, cost_ms: Callable[[TickContext], float],
+                      reason: str = "SAFE (deterministic)"):
+    """Декоратор: добавить стратегию в реестр (имя должно быть новым)."""
+    if kind not in ("deduce", "guess"):
+        raise ValueError(f"Unknown strategy kind: {kind}")
+
+    def deco(fn):
+        if name in STRATEGIES:
+            raise ValueError(f"Strategy already registered: {name}")
+        STRATEGIES[name] = Strategy(name=name, kind=kind, run=fn, cost_ms=cost_ms, reason=reason)
+        return fn
+    return deco
+
+
+# -------------------- перебор компонент --------------------
+
+def enumerate_component(
+    cells: List[Cell],
+    cons: List[Constraint],
+    max_nodes: int,
+) -> Optional[Tuple[Dict[int, int], Dict[int, List[int]]]]:
+    """
+    Все расстановки мин в компоненте, согласные с её ограничениями (перебор с отсечениями).
+    Возвращает ({k: число решений с k минами}, {k: [в скольких из них мина в cells[i]]})
+    или None, если не уложились в max_nodes.
+    """
+    # порядок обхода — по ограничениям, чтобы они закрывались как можно раньше
+    order: List[Cell] = []
+    seen: Set[Cell] = set()
+    for cst in sorted(cons, key=lambda c: (c.r, c.c)):
+        for cell in sorted(cst.U):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+    idx = {cell: i for i, cell in enumerate(order)}
+    n = len(order)
+
+    need = [cst.need for cst in cons]
+    left = [len(cst.U) for cst in cons]
+    have = [0] * len(cons)
+    cell_cons: List[List[int]] = [[] for _ in range(n)]
+    for j, cst in enumerate(cons):
+        for cell in cst.U:
+            cell_cons[idx[cell]].append(j)
+
+    counts: Dict[int, int] = {}
+    per_cell: Dict[int, List[int]] = {}
+    assign = [0] * n
+    nodes = 0
+
+    def dfs(i: int, k: int) -> bool:
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            return False
+        if i == n:
+            counts[k] = counts.get(k, 0) + 1
+            pc = per_cell.get(k)
+            if pc is None:
+                pc = per_cell[k] = [0] * n
+            for t in range(n):
+                pc[t] += assign[t]
+            return True
+
+        js = cell_cons[i]
+        for v in (0, 1):
+            ok = True
+            for j in js:
+                h = have[j] + v
+                if h > need[j] or h + left[j] - 1 < need[j]:
+                    ok = False
+                    break
+            if not ok:
+                continue
+            for j in js:
+                have[j] += v
+                left[j] -= 1
+            assign[i] = v
+            alive = dfs(i + 1, k + v)
+            for j in js:
+                have[j] -= v
+                left[j] += 1
+            assign[i] = 0
+            if not alive:
+                return False
+        return True
+
+    if not dfs(0, 0):
+        return None
+
+    # обратно в порядок cells
+    perm = [idx[cell] for cell in cells]
+    return counts, {k: [pc[p] for p in perm] for k, pc in per_cell.items()}
+
+
+def _digits(ctx: TickContext) -> float:
+    """Сколько цифр смотреть: фронтир тайлов или (без тайлов) грубо четверть доски."""
+    return len(ctx.cells) if ctx.cells is not None else ctx.area / 4
+
+
+def _enum_nodes(ctx: TickContext) -> int:
+    return max(1, int(ctx.left_ms() * ENUM_NODES_PER_MS))
+
+
+def _enum_cost(ctx: TickContext) -> float:
+    """Оценка перебора: по ~1.35^n узлов на компоненту (отсечения режут 2^n); слишком большие — бесконечно."""
+    total = 0.0
+    for cells, _ in ctx.groups():
+        if len(cells) > ENUM_MAX_CELLS:
+            return float("inf")
+        total += 1.35 ** len(cells)
+    return COST_PER_DIGIT * len(ctx.constraints()) + COST_PER_NODE * total
+
+
+# -------------------- deduce --------------------
+
+@register_strategy("basic", "deduce", lambda ctx: COST_PER_DIGIT * _digits(ctx))
+def deduce_basic(ctx: TickContext):
+    """Только тривиальные правила (need == 0 / need == |U|) до неподвижной точки."""
+    stats = ctx.stats
+    changed = False
+    safe: Set[Cell] = set()
+    while True:
+        t0 = time.perf_counter() if stats is not None else 0.0
+        cons = build_constraints(ctx.field, ctx.mine, ctx.cells, ctx.bad)
+        t1 = time.perf_counter() if stats is not None else 0.0
+        ch, s = apply_basic_rules(cons, ctx.mine, stats)
+        if stats is not None:
+            if not stats.iters:
+                stats.constraints = len(cons)
+            stats.iters += 1
+            stats.t_build += t1 - t0
+            stats.t_basic += time.perf_counter() - t1
+            stats.basic_safe += len(s - safe)
+        safe |= s
+        if not ch:
+            return changed, safe
+        changed = True
+
+
+@register_strategy("propagate", "deduce", lambda ctx: 4 * COST_PER_DIGIT * _digits(ctx))
+def deduce_propagate(ctx: TickContext):
+    """Базовые правила + правило подмножеств (propagate_deterministic, как в solver_step)."""
+    return propagate_deterministic(ctx.field, ctx.mine, cells=ctx.cells, bad=ctx.bad, stats=ctx.stats)
+
+
+@register_strategy("enumerate", "deduce",
+                   lambda ctx: sum(COST_PER_NODE * 1.35 ** len(cells)
+                                   for cells, _ in ctx.groups() if len(cells) <= ENUM_MAX_CELLS),
+                   reason="SAFE (enumeration)")
+def deduce_enumerate(ctx: TickContext):
+    """
+    Полный перебор каждой компоненты фронтира (не больше ENUM_MAX_CELLS клеток):
+    клетка без мины во всех решениях — safe, с миной во всех — мина. Видит то, что не ловят
+    пары ограничений (цепочки из трёх и больше цифр).
+    """
+    changed = False
+    safe: Set[Cell] = set()
+    for cells, cons in ctx.groups():
+        if len(cells) > ENUM_MAX_CELLS:
+            continue
+        res = enumerate_component(cells, cons, _enum_nodes(ctx))
+        if res is None:
+            break  # бюджет кончился
+        counts, per_cell = res
+        total = sum(counts.values())
+        if not total:
+            continue
+        for i, (r, c) in enumerate(cells):
+            m = sum(pc[i] for pc in per_cell.values())
+            if m == 0:
+                safe.add((r, c))
+            elif m == total and ctx.mine[r][c] != 1:
+                ctx.mine[r][c] = 1
+                changed = True
+    return changed, safe
+
+
+# -------------------- guess --------------------
+
+def _picker(name: str):
+    pick = GUESS_PICKERS[name]
+    return lambda ctx: pick(ctx.field, ctx.mine, total_mines=ctx.total_mines, cells=ctx.cells, bad=ctx.bad)
+
+
+register_strategy("min-risk", "guess", lambda ctx: COST_PER_CELL * ctx.area)(_picker("min-risk"))
+register_strategy("info", "guess", lambda ctx: 1.5 * COST_PER_CELL * ctx.area)(_picker("info"))
+
+
+def exact_risk_map(ctx: TickContext) -> Optional[Dict[Cell, float]]:
+    """
+    Точные вероятности мины: перебор всех компонент фронтира, склейка по числу мин
+    и вес C(клеток вне фронтира, мин вне фронтира), если известно total_mines.
+    None — какая-то компонента слишком большая / бюджет кончился / доска противоречива.
+    """
+    field, mine = ctx.field, ctx.mine
+    groups = ctx.groups()
+    enum = []
+    for cells, cons in groups:
+        if len(cells) > ENUM_MAX_CELLS:
+            return None
+        res = enumerate_component(cells, cons, _enum_nodes(ctx))
+        if res is None or not res[0]:
+            return None
+        enum.append((cells, res[0], res[1]))
+
+    frontier = {cell for cells, _, _ in enum for cell in cells}
+    rows, cols = len(field), len(field[0]) if field else 0
+    others = [(r, c) for r in range(rows) for c in range(cols)
+              if field[r][c] == -1 and mine[r][c] != 1 and (r, c) not in frontier]
+
+    if ctx.total_mines is None:
+        # без общего числа мин компоненты независимы, вне фронтира риска не знаем
+        risk: Dict[Cell, float] = {}
+        for cells, counts, per_cell in enum:
+            total = sum(counts.values())
+            for i, cell in enumerate(cells):
+                risk[cell] = sum(pc[i] for pc in per_cell.values()) / total
+        return risk
+
+    flagged = sum(1 for r in range(rows) for c in range(cols) if mine[r][c] == 1)
+    mines_left = ctx.total_mines - flagged
+    n_o = len(others)
+
+    def convolve(a: Dict[int, int], b: Dict[int, int]) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        for ka, va in a.items():
+            for kb, vb in b.items():
+                out[ka + kb] = out.get(ka + kb, 0) + va * vb
+        return out
+
+    def w(k: int) -> int:
+        rest = mines_left - k
+        return comb(n_o, rest) if 0 <= rest <= n_o else 0
+
+    # распределение числа мин по всем компонентам, кроме i: префиксы и суффиксы свёрток
+    m = len(enum)
+    prefix = [{0: 1}]
+    for _, counts, _ in enum:
+        prefix.append(convolve(prefix[-1], counts))
+    suffix = [{0: 1}]
+    for _, counts, _ in reversed(enum):
+        suffix.append(convolve(suffix[-1], counts))
+    suffix.reverse()
+
+    z = sum(v * w(k) for k, v in prefix[m].items())
+    if z == 0:
+        return None
+
+    risk = {}
+    for i, (cells, counts, per_cell) in enumerate(enum):
+        rest = convolve(prefix[i], suffix[i + 1])
+        for t, cell in enumerate(cells):
+            num = 0
+            for k, pc in per_cell.items():
+                if pc[t]:
+                    num += pc[t] * sum(v * w(k + j) for j, v in rest.items())
+            risk[cell] = num / z
+
+    if n_o:
+        num = sum(v * w(k) * (mines_left - k) for k, v in prefix[m].items())
+        p_other = num / (z * n_o)
+        for cell in others:
+            risk[cell] = p_other
+    return risk
+
+
+@register_strategy("exact", "guess", lambda ctx: _enum_cost(ctx) + COST_PER_CELL * ctx.area)
+def guess_exact(ctx: TickContext) -> Optional[Action]:
+    """min-risk по точным вероятностям (exact_risk_map), почти-ничьи — как у info (score_guesses)."""
+    risk = exact_risk_map(ctx)
+    if not risk:
+        return None
+    scored = score_guesses(ctx.field, ctx.mine, risk)
+    _, p, (r, c) = scored[0]
+    return Action(kind="open", r=r, c=c, reason="MIN-RISK guess (exact)", risk=float(p))
+
+
+# -------------------- профили --------------------
+
+@dataclass(frozen=True)
+class Profile:
+    deduce: Tuple[str, ...]
+    guess: Tuple[str, ...]
+    budget_ms: float            # бюджет solver'а на тик
+
+
+PROFILES: Dict[str, Profile] = {
+    # быстрее всего: без правила подмножеств, догадка — просто минимальный риск
+    "fast": Profile(deduce=("basic",), guess=("min-risk",), budget_ms=2.0),
+    # как solver_step по умолчанию
+    "balanced": Profile(deduce=("propagate",), guess=("min-risk",), budget_ms=20.0),
+    # перебор компонент, когда пары ограничений ничего не дали, и точные вероятности для догадки
+    "strongest": Profile(deduce=("propagate", "enumerate"), guess=("exact", "info"), budget_ms=50.0),
+}
+
+
+class Solver:
+    """
+    solver_step с цепочкой стратегий профиля. Вызывается так же, как solver_step (без guess=).
+    usage — сколько раз какая стратегия дала результат (для report()).
+    """
+
+    def __init__(self, profile: str = "balanced", budget_ms: Optional[float] = None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown solver profile: {profile} (known: {', '.join(PROFILES)})")
+        self.profile = profile
+        self.spec = PROFILES[profile]
+        self.budget_ms = self.spec.budget_ms if budget_ms is None else float(budget_ms)
+        for name in self.spec.deduce + self.spec.guess:
+            if name not in STRATEGIES:
+                raise ValueError(f"Profile {profile}: unknown strategy {name}")
+        self.usage: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def select(self, ctx: TickContext, names: Tuple[str, ...], mandatory: bool) -> List[str]:
+        """Стратегии из names, чья оценка влезает в остаток бюджета (mandatory — первая всегда)."""
+        out = []
+        for i, name in enumerate(names):
+            if (mandatory and i == 0) or STRATEGIES[name].cost_ms(ctx) <= ctx.left_ms():
+                out.append(name)
+            else:
+                self.skipped[name] = self.skipped.get(name, 0) + 1
+        return out
+
+    def __call__(
+        self,
+        field: List[List[int]],
+        mine: List[List[int]],
+        total_mines: Optional[int] = None,
+        tiles: Optional[TileIndex] = None,
+        bad: Optional[Set[Cell]] = None,
+        stats: Optional[SolverStats] = None,
+    ) -> Tuple[List[Action], bool]:
+        t_start = time.perf_counter()
+        rows = len(field)
+        cols = len(field[0]) if rows else 0
+        cells = tiles.active_digits(field, mine) if tiles is not None else None
+        ctx = TickContext(field, mine, total_mines, cells, bad, stats,
+                          deadline=t_start + self.budget_ms / 1000.0)
+
+        # deduce: от дешёвой к сильной, пока safe-клеток нет
+        changed = False
+        actions: List[Action] = []
+        for i, name in enumerate(self.spec.deduce):
+            if i > 0 and name not in self.select(ctx, (name,), mandatory=False):
+                continue
+            st = STRATEGIES[name]
+            t0 = time.perf_counter()
+            ch, safe = st.run(ctx)
+            if stats is not None:
+                stats.strategies[name] = time.perf_counter() - t0
+            if ch:
+                changed = True
+                ctx.invalidate()
+            # bad пополняется внутри стратегий — соседей противоречий считаем после run, как solver_step
+            if bad:
+                safe = safe - {nb for r, c in bad for nb in neighbors8(r, c, rows, cols)}
+            for r, c in sorted(safe):
+                if field[r][c] == -1 and mine[r][c] != 1:
+                    actions.append(Action(kind="open", r=r, c=c, reason=st.reason))
+            if actions:
+                self.usage[name] = self.usage.get(name, 0) + 1
+                break
+
+        if tiles is not None and changed:
+            tiles.touch_active()
+            ctx.cells = tiles.active_digits(field, mine)
+            ctx.invalidate()
+
+        if not actions:
+            t_guess = time.perf_counter()
+            chain = list(self.spec.guess)
+            allowed = self.select(ctx, tuple(chain[:-1]), mandatory=False) + chain[-1:]
+            act = None
+            for name in allowed:
+                t0 = time.perf_counter()
+                act = STRATEGIES[name].run(ctx)
+                if stats is not None:
+                    stats.strategies[name] = time.perf_counter() - t0
+                if act is not None:
+                    self.usage[name] = self.usage.get(name, 0) + 1
+                    actions.append(act)
+                    break
+            if stats is not None:
+                stats.t_guess = time.perf_counter() - t_guess
+                stats.guess = act is not None
+                stats.guess_risk = act.risk if act is not None else None
+
+        if stats is not None:
+            stats.t_total = time.perf_counter() - t_start
+        return actions, changed
+
+    def report(self):
+        used = " ".join(f"{k}={v}" for k, v in sorted(self.usage.items()))
+        skipped = " ".join(f"{k}={v}" for k, v in sorted(self.skipped.items()))
+        print(f"solver profile {self.profile} (budget {self.budget_ms:g}ms): used {used or '-'}"
+              + (f"; over budget {skipped}" if skipped else ""))
+
+
+def make_solver(profile: str = "balanced", budget_ms: Optional[float] = None) -> Solver:
+    return Solver(profile, budget_ms)
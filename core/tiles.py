@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+# Доски меньше этого (в клетках) решаем целиком — на expert 30x16 тайлы ничего не дают
+TILED_MIN_CELLS = 2500
+DEFAULT_TILE = 16
+
+
+class TileIndex:
+    """
+    Поле режется на тайлы tile x tile. Для каждого тайла помним его фронтир — открытые цифры,
+    у которых есть закрытый неотмеченный сосед. Solver строит ограничения только по фронтиру,
+    поэтому время и память тика растут с размером фронтира, а не с площадью доски.
+
+    Тайлы пересчитываются лениво: только «грязные» (где что-то открылось, плюс соседние тайлы,
+    если клетка на границе) и активные (там solver мог отметить мины). Компоненты через границы
+    тайлов склеиваются сами: ограничение строится по всем 8 соседям цифры, а правило подмножеств
+    ищет пары через индекс клетка -> ограничения, а не внутри тайла.
+    """
+
+    def __init__(self, rows: int, cols: int, tile: int = DEFAULT_TILE):
+        self.rows = rows
+        self.cols = cols
+        self.tile = tile
+        self.trows = (rows + tile - 1) // tile
+        self.tcols = (cols + tile - 1) // tile
+        self.frontier: Dict[int, List[Tuple[int, int]]] = {}
+        self.dirty: Set[int] = set(range(self.trows * self.tcols))
+
+    def tile_of(self, r: int, c: int) -> int:
+        return (r // self.tile) * self.tcols + c // self.tile
+
+    def touch(self, cells: Iterable[Sequence[int]]):
+        """cells — (r, c, ...) изменившихся клеток (CellChange подходит как есть)."""
+        t = self.tile
+        for cell in cells:
+            r, c = cell[0], cell[1]
+            # соседи клетки на границе живут в соседнем тайле — его фронтир тоже мог измениться
+            for tr in {max(0, r - 1) // t, r // t, min(self.rows - 1, r + 1) // t}:
+                for tc in {max(0, c - 1) // t, c // t, min(self.cols - 1, c + 1) // t}:
+                    self.dirty.add(tr * self.tcols + tc)
+
+    def touch_active(self):
+        """Перепроверить активные тайлы на следующем refresh (solver мог отметить там мины)."""
+        self.dirty.update(self.frontier)
+
+    def mark_all(self):
+        self.dirty = set(range(self.trows * self.tcols))
+
+    def _scan(self, tid: int, field: List[List[int]], mine: List[List[int]]) -> List[Tuple[int, int]]:
+        rows, cols, t = self.rows, self.cols, self.tile
+        r0 = (tid // self.tcols) * t
+        c0 = (tid % self.tcols) * t
+        out = []
+        for r in range(r0, min(rows, r0 + t)):
+            frow = field[r]
+            for c in range(c0, min(cols, c0 + t)):
+                if not 1 <= frow[c] <= 8:
+                    continue
+                found = False
+                for rr in range(max(0, r - 1), min(rows, r + 2)):
+                    for cc in range(max(0, c - 1), min(cols, c + 2)):
+                        if field[rr][cc] == -1 and mine[rr][cc] != 1:
+                            found = True
+                            break
+                    if found:
+                        break
+                if found:
+                    out.append((r, c))
+        return out
+
+    def refresh(self, field: List[List[int]], mine: List[List[int]]):
+        for tid in self.dirty:
+            cells = self._scan(tid, field, mine)
+            if cells:
+                self.frontier[tid] = cells
+            else:
+                self.frontier.pop(tid, None)
+        self.dirty.clear()
+
+    def active_digits(self, field: List[List[int]], mine: List[List[int]]) -> List[Tuple[int, int]]:
+        """Цифры фронтира во всех активных тайлах, в порядке строк (как у полного прохода)."""
+        self.refresh(field, mine)
+        out = [cell for cells in self.frontier.values() for cell in cells]
+        out.sort()
+        return out
+
+    @property
+    def active_tiles(self) -> int:
+        return len(self.frontier)
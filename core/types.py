@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
+
+from core.tiles import DEFAULT_TILE, TILED_MIN_CELLS, TileIndex
 
 @dataclass(frozen=True)
 class Action:
@@ -9,10 +11,53 @@ class Action:
     reason: str
     risk: Optional[float] = None  # для min-risk
 
+# (r, c, новое значение field) — что изменилось на доске за тик
+CellChange = Tuple[int, int, int]
+
+# кликнули, но цифру ещё не видели (спекулятивное исполнение): не мина, не цифра, не закрыта
+OPEN_UNKNOWN = -2
+
 @dataclass
 class BoardState:
     rows: int
     cols: int
     total_mines: Optional[int]
-    field: List[List[int]]  # -1 closed, 0 empty, 1..8 digits
+    field: List[List[int]]  # -1 closed, -2 clicked/not read yet (OPEN_UNKNOWN), 0 empty, 1..8 digits
     mine: List[List[int]]   # -1 unknown, 0 not mine/open, 1 mine (internal)
+    tiles: Optional[TileIndex] = None  # фронтир по тайлам для больших досок (передаётся в solver_step)
+
+    @classmethod
+    def new(cls, rows: int, cols: int, total_mines: Optional[int] = None,
+            tile: Optional[int] = None) -> "BoardState":
+        """
+        Полностью закрытая доска. Читатели дальше обновляют её на месте.
+        tile — размер тайла; None — тайлы только для досок от TILED_MIN_CELLS клеток, 0 — без тайлов.
+        """
+        if tile is None:
+            tile = DEFAULT_TILE if rows * cols >= TILED_MIN_CELLS else 0
+        return cls(
+            rows=rows,
+            cols=cols,
+            total_mines=total_mines,
+            field=[[-1] * cols for _ in range(rows)],
+            mine=[[-1] * cols for _ in range(rows)],
+            tiles=TileIndex(rows, cols, tile) if tile else None,
+        )
+
+    def touch(self, changes: Iterable[CellChange]):
+        """Сообщить тайлам, какие клетки изменились (читатели зовут после обновления field)."""
+        if self.tiles is not None:
+            self.tiles.touch(changes)
+
+    def speculate(self, cells: Iterable[Tuple[int, int]]):
+        """
+        Оптимистично считаем кликнутые клетки открытыми: field = OPEN_UNKNOWN, mine = 0.
+        Следующее чтение кадра узнаёт их цифры; если клетка на экране всё ещё закрыта — откат в -1.
+        """
+        changes = []
+        for r, c in cells:
+            if self.field[r][c] == -1:
+                self.field[r][c] = OPEN_UNKNOWN
+                self.mine[r][c] = 0
+                changes.append((r, c, OPEN_UNKNOWN))
+        self.touch(changes)
@@ -0,0 +1,159 @@
+"""
+Несколько headless-сессий Selenium параллельно, каждая в своём процессе и со своим временным профилем.
+Играют без участия человека и считают games/hour, win rate и задержки по стадиям.
+
+    python selenium_farm.py --serve-replica --sessions 4 --games 25
+    python selenium_farm.py --url "https://minesweeper.online/new-game" --sessions 2 --games 10
+    python selenium_farm.py --serve-replica --sessions 8 --solver-service /tmp/ms-solver.sock   # общий solver
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from utils.tracing import histograms_from_samples, print_histograms
+
+
+def run_session(session_id: int, url: str, games: int, headless: bool = True, time_limit: float = 300.0,
+                solver_service: str = None, stealth: bool = True) -> dict:
+    """
+    Тело воркера: свой профиль во временном каталоге, свой драйвер, games игр подряд.
+    solver_service — решать в общем solver-сервисе (своё соединение на сессию), а не в процессе сессии.
+    stealth — CDP stealth в make_driver; локальной реплике не нужен.
+    Возвращает только простые типы (идёт обратно через pickle).
+    """
+    # импорт внутри воркера: родителю selenium не нужен
+    from adapters.selenium.create_driver import make_driver
+    from adapters.selenium.session import play_game
+    from selenium.common.exceptions import WebDriverException
+
+    solver = None
+    if solver_service:
+        from utils.solver_service import SolverClient
+        solver = SolverClient(solver_service)
+
+    profile_dir = tempfile.mkdtemp(prefix=f"ms_profile_{session_id}_")
+    results = []
+    samples: Dict[str, List[float]] = {}
+    errors = 0
+    t0 = time.perf_counter()
+
+    driver = make_driver(url, profile_dir=profile_dir, headless=headless, stealth=stealth)
+    try:
+        for g in range(games):
+            try:
+                # первая игра уже на свежей странице, дальше — через смайлик
+                res = play_game(driver, new_game=g > 0, time_limit=time_limit, solver=solver)
+            except (RuntimeError, WebDriverException) as e:
+                errors += 1
+                print(f"[session {session_id}] game {g}: {e}")
+                try:
+                    driver.get(url)
+                except WebDriverException as e:
+                    print(f"[session {session_id}] browser is gone, stopping: {e}")
+                    break
+                continue
+
+            results.append({"status": res.status, "ticks": res.ticks, "clicks": res.clicks,
+                            "duration": res.duration})
+            for name, xs in res.samples.items():
+                samples.setdefault(name, []).extend(xs)
+    finally:
+        driver.quit()
+        if solver is not None:
+            solver.close()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return {
+        "session": session_id,
+        "games": results,
+        "errors": errors,
+        "wall": time.perf_counter() - t0,
+        "samples": samples,
+    }
+
+
+def aggregate(sessions: List[dict], wall: float) -> dict:
+    games = [g for s in sessions for g in s["games"]]
+    wins = sum(1 for g in games if g["status"] == "win")
+    samples: Dict[str, List[float]] = {}
+    for s in sessions:
+        for name, xs in s["samples"].items():
+            samples.setdefault(name, []).extend(xs)
+
+    by_status: Dict[str, int] = {}
+    for g in games:
+        by_status[g["status"]] = by_status.get(g["status"], 0) + 1
+
+    return {
+        "games": len(games),
+        "wins": wins,
+        "win_rate": wins / len(games) if games else 0.0,
+        "games_per_hour": len(games) * 3600.0 / wall if wall > 0 else 0.0,
+        "by_status": by_status,
+        "errors": sum(s["errors"] for s in sessions),
+        "wall": wall,
+        "stages": histograms_from_samples(samples),
+    }
+
+
+def run_farm(url: str, sessions: int = 2, games: int = 10, headless: bool = True, time_limit: float = 300.0,
+             solver_service: str = None, stealth: bool = True) -> dict:
+    t0 = time.perf_counter()
+    done = []
+    with ProcessPoolExecutor(max_workers=sessions) as ex:
+        futs = [ex.submit(run_session, i, url, games, headless, time_limit, solver_service, stealth) for i in range(sessions)]
+        for fut in as_completed(futs):
+            res = fut.result()
+            n = len(res["games"])
+            w = sum(1 for g in res["games"] if g["status"] == "win")
+            print(f"[session {res['session']}] games={n} wins={w} errors={res['errors']} wall={res['wall']:.1f}s")
+            done.append(res)
+    return aggregate(done, time.perf_counter() - t0)
+
+
+def print_report(agg: dict):
+    print(f"games={agg['games']} wins={agg['wins']} win_rate={agg['win_rate'] * 100:.1f}% "
+          f"games/hour={agg['games_per_hour']:.0f} errors={agg['errors']} wall={agg['wall']:.1f}s")
+    print("by status:", agg["by_status"])
+    print_histograms(agg["stages"], "stages over all sessions")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="selenium_farm")
+    ap.add_argument("--url", default=None, help="страница игры; без --serve-replica обязателен")
+    ap.add_argument("--serve-replica", action="store_true", help="поднять replica/ на localhost и играть в неё")
+    ap.add_argument("--rows", type=int, default=16)
+    ap.add_argument("--cols", type=int, default=30)
+    ap.add_argument("--mines", type=int, default=99)
+    ap.add_argument("--sessions", type=int, default=2)
+    ap.add_argument("--games", type=int, default=10, help="игр на одну сессию")
+    ap.add_argument("--time-limit", type=float, default=300.0, help="секунд на одну игру")
+    ap.add_argument("--headed", action="store_true", help="с окнами браузера (отладка)")
+    ap.add_argument("--solver-service", default=None, metavar="ADDR",
+                    help="общий solver-сервис (python -m utils.solver_service serve) для всех сессий")
+    a = ap.parse_args(argv)
+
+    server = None
+    url = a.url
+    if a.serve_replica:
+        from utils.replica_server import serve
+        server, base = serve()
+        url = f"{base}?rows={a.rows}&cols={a.cols}&mines={a.mines}"
+        print("Serving replica:", url)
+    if not url:
+        ap.error("--url or --serve-replica is required")
+
+    try:
+        agg = run_farm(url, sessions=a.sessions, games=a.games, headless=not a.headed, time_limit=a.time_limit,
+                       solver_service=a.solver_service, stealth=not a.serve_replica)
+    finally:
+        if server is not None:
+            server.shutdown()
+    print_report(agg)
+
+
+if __name__ == "__main__":
+    main()
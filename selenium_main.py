@@ -1,39 +1,21 @@
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
 
-from adapters.selenium.create_driver import make_driver
-from core.solver import solver_step
-from utils.debug_prints import print_field, print_mines, print_actions
+from adapters.selenium.create_driver import detach_driver, make_driver
+from core.memo import SolveMemo
+from core.strategies import make_solver
+from core.types import BoardState
+from utils.corpus import CorpusWriter, pack_cells
+from utils.debug_prints import BoardDumper
+from utils.tracing import TRACER
 
 from adapters.selenium.discovery import discover_board_meta
-from adapters.selenium.snapshot import get_class_snapshot
 from adapters.selenium.board_reader import read_board_from_snapshot
-from adapters.selenium.controller import click_action, highlight_cells, clear_highlights
+from adapters.selenium.controller import clear_highlights, encode_highlight
+from adapters.selenium.tick import PageTick
 
 START_URL = "https://minesweeper.online/new-game"
 
 
-def get_game_status(driver) -> str:
-    """
-    "playing" | "win" | "loss" | "unknown"
-    """
-    try:
-        el = driver.find_element(By.ID, "top_area_face")
-    except NoSuchElementException:
-        return "unknown"
-
-    cls = (el.get_attribute("class") or "").lower()
-    if "hdd_top-area-face-win" in cls:
-        return "win"
-    if "hdd_top-area-face-loss" in cls or "hdd_top-area-face-lose" in cls:
-        return "loss"
-    if "hdd_top-area-face-unpressed" in cls:
-        return "playing"
-    return "unknown"
-
-
 def wait_for_user_ready() -> bool:
     """
     Возвращает False если пользователь хочет выйти.
@@ -42,101 +24,161 @@ def wait_for_user_ready() -> bool:
     return cmd != "q"
 
 
-def run(mode: str = "highlight", tick_sleep: float = 0.2, click_sleep: float = 0.01):
+def run(mode: str = "highlight", tick_sleep: float = 0.2, click_sleep: float = 0.0,
+        dump_interval: float = 1.0, trace_path: str = None, corpus_path: str = None,
+        profile: str = "balanced", debugger_address: str = None, profile_dir: str = None,
+        solver_service: str = None):
     """
     mode:
-      - "auto"      : кликает сам
+      - "auto"      : кликает сам; клики уходят со следующим тиком, страница сама ждёт,
+                      пока кликнутые клетки не сменят класс (не дольше max(tick_sleep, 0.5) с)
       - "highlight" : подсветка, ты кликаешь сам, бот обновляет каждые tick_sleep
+    Один тик — один round trip в браузер (PageTick), а не status + snapshot + highlight + N кликов.
+    dump_interval: печать поля не чаще раза в N секунд (0 — не печатать)
+    trace_path: куда сохранить Chrome trace JSON со спанами стадий
+    corpus_path: куда дописывать позиции solver'а (utils/corpus.py), с дедупликацией
+    profile: профиль solver'а — "fast" | "balanced" | "strongest" (core/strategies.py)
+    debugger_address: "host:port" уже запущенного Chrome — подключиться, а не запускать новый
+                      (python -m adapters.selenium.create_driver launch); браузер тогда не закрываем
+    profile_dir: каталог профиля Chrome (None — DEFAULT_PROFILE_DIR / MS_CHROME_PROFILE)
+    solver_service: адрес solver-сервиса (python -m utils.solver_service serve) вместо своего solver'а
     """
-    driver = make_driver(START_URL)
+    if solver_service:
+        from utils.solver_service import SolverClient
+        solver = SolverClient(solver_service, profile)
+    else:
+        solver = make_solver(profile)
+    t_launch = time.perf_counter()
+    driver = make_driver(START_URL, profile_dir=profile_dir, debugger_address=debugger_address)
+    t_driver = time.perf_counter() - t_launch
+    dumper = BoardDumper(interval=dump_interval, enabled=dump_interval > 0)
+    corpus = CorpusWriter(corpus_path, profile) if corpus_path else None
 
     print("Browser opened. Choose a game manually (URL can change).")
     if not wait_for_user_ready():
-        driver.quit()
+        detach_driver(driver) if debugger_address else driver.quit()
         return
 
+    t_ready = time.perf_counter()
     meta = discover_board_meta(driver)
     rows, cols, total_mines = meta.rows, meta.cols, meta.total_mines
     print(f"Detected board: {cols}x{rows}, total_mines={total_mines}")
 
-    field = None
-    mine = None
+    board = BoardState.new(rows, cols, total_mines)
 
-    # для highlight-режима: чтобы не чистить всё поле каждый тик
-    prev_highlight = set()
+    # весь обмен со страницей за тик — один execute_async_script (adapters/selenium/tick.py):
+    # клики и подсветка, решённые на прошлом тике, едут вместе со следующим чтением доски
+    page = PageTick(driver, rows, cols, settle_timeout=max(tick_sleep, 0.5))
+    clicks = []
+    codes = None
+    # для highlight-режима: прошлый snapshot и мемо solve+highlight по отпечатку доски
+    prev_snapshot = None
+    memo = SolveMemo(rows, cols)
 
     while True:
-        status = get_game_status(driver)
-        if status in ("win", "loss"):
-            print(f"Game finished: {status}.")
+        trips = page.round_trips
+        with TRACER.span("tick") as sp_tick:
+            res = page.run(clicks, codes)
+        if t_ready is not None and res is not None:
+            # запуск/подключение + (после Enter) discover и первый тик; ожидание Enter не считаем
+            print(f"startup: driver {t_driver:.2f}s, ready->first tick {time.perf_counter() - t_ready:.2f}s"
+                  + (" (attached)" if debugger_address else ""))
+            t_ready = None
+        if clicks and res is not None:
+            TRACER.record("settle", sp_tick.t0, res.settle_ms / 1000.0)
+            print("settle:", round(res.settle_ms / 1000.0, 4), "" if res.settled else "TIMEOUT")
+        clicks, codes = [], None
+
+        if res is not None and res.status in ("win", "loss"):
+            print(f"Game finished: {res.status}.")
             clear_highlights(driver)
-            prev_highlight.clear()
-
-            field = None
-            mine = None
+            page.forget_highlight()
 
             if not wait_for_user_ready():
                 break
 
             meta = discover_board_meta(driver)
             rows, cols, total_mines = meta.rows, meta.cols, meta.total_mines
+            board = BoardState.new(rows, cols, total_mines)
+            page = PageTick(driver, rows, cols, settle_timeout=max(tick_sleep, 0.5))
+            prev_snapshot = None
+            memo = SolveMemo(rows, cols)
             print(f"Detected board: {cols}x{rows}, total_mines={total_mines}")
             continue
 
-        t0 = time.time()
-
-        # 1) Быстрый snapshot всех классов клеток
-        snapshot = get_class_snapshot(driver, rows, cols)
+        snapshot = res.classes if res is not None else None
         if snapshot is None or len(snapshot) != rows * cols:
             # если страница ещё не готова/перерендер — просто подождём
             time.sleep(tick_sleep)
             continue
 
-        t_snapshot = time.time()
+        # Обновляем доску на месте (открытые клетки не перечитываем), changes — новые открытые клетки.
+        # Тот же snapshot, что в прошлый тик, — разбирать нечего.
+        with TRACER.span("parse") as sp_read:
+            changes = [] if snapshot == prev_snapshot else read_board_from_snapshot(snapshot, board)
+        prev_snapshot = snapshot
+        field, mine = board.field, board.mine
 
-        # 2) Парсим в field/mine (с кешем открытых клеток)
-        field, mine = read_board_from_snapshot(snapshot, rows, cols, field_prev=field, mine_prev=mine)
-        t_read = time.time()
+        # highlight: доска не изменилась — solver и подсветка уже сделаны, тик стоит только один round trip
+        if mode == "highlight" and memo.lookup(changes) is not None:
+            time.sleep(tick_sleep)
+            continue
 
-        # 3) Solver
-        actions, changed = solver_step(field, mine, total_mines=total_mines)
-        t_solve = time.time()
+        # Solver
+        packed = pack_cells(field, mine) if corpus is not None else None
+        with TRACER.span("solve") as sp_solve:
+            actions, changed = solver(field, mine, total_mines=total_mines, tiles=board.tiles)
+        if corpus is not None:
+            corpus.add(field, mine, total_mines, actions, packed=packed)
 
-        # debug
-        print_field(field)
-        print_mines(mine)
-        print_actions(actions, limit=10)
+        # debug — вне горячего пути, с ограничением частоты
+        dumper.submit(field, mine, actions)
 
-        # safe / mines (internal)
+        # safe / mines (internal); в браузер уйдёт со следующим тиком
         safe_cells = [(a.r, a.c) for a in actions if "SAFE" in (a.reason or "")]
         mine_cells = [(r, c) for r in range(rows) for c in range(cols) if mine[r][c] == 1]
         risk_cells = [(a.r, a.c) for a in actions if
                       (getattr(a, "risk", None) is not None) or ("MIN-RISK" in (a.reason or ""))]
+        codes = encode_highlight(safe_cells, mine_cells, risk_cells, rows, cols)
 
-        highlight_cells(driver, safe_cells, mine_cells, risk_cells, prev_highlight)
-        t_high = time.time()
+        if mode == "highlight":
+            memo.store((actions, safe_cells, mine_cells, risk_cells))
 
-        # тайминги
+        # тайминги: tick — весь round trip (клики + подсветка + settle + чтение)
         print("timing:",
-              "snapshot", round(t_snapshot - t0, 4),
-              "read", round(t_read - t_snapshot, 4),
-              "solve", round(t_solve - t_read, 4),
-              "highlight", round(t_high - t_solve, 4))
+              "tick", round(sp_tick.dur, 4),
+              "read", round(sp_read.dur, 4),
+              "solve", round(sp_solve.dur, 4),
+              "round_trips", page.round_trips - trips)
 
         if mode != "highlight":
             # AUTO
             if not actions:
+                page.run((), codes)
                 print("No actions. Stop.")
                 break
 
-            for a in actions:
-                click_action(driver, a)  # JS click by data-x/data-y
+            # JS click by data-x/data-y — в начале следующего тика
+            clicks = [(a.r, a.c) for a in actions]
+            if click_sleep:
                 time.sleep(click_sleep)
+            continue
 
-        # маленькая пауза чтобы DOM успел обновиться
-        time.sleep(tick_sleep)
-
-    driver.quit()
+        # highlight: новая подсветка уходит следующим тиком сразу, без паузы;
+        # пауза — на тиках, где доска не изменилась (memo выше)
+
+    memo.report()
+    solver.report()
+    TRACER.report("selenium stages")
+    if trace_path:
+        TRACER.export_chrome(trace_path)
+        print("Saved trace:", trace_path)
+    dumper.close()
+    if corpus is not None:
+        corpus.close()
+        corpus.report()
+    # подключённый браузер живёт дальше — следующий запуск снова подключится
+    detach_driver(driver) if debugger_address else driver.quit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import argparse
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from adapters.vision.detect_fields import Detection
+from adapters.vision.get_field import split_grid_np
+from utils.synth_board import load_digit_sprites, render_board
+
+# порядок строк/столбцов матрицы ошибок; -3 — «цифра не распознана»
+LABELS = [-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, -3]
+
+
+def confusion_matrix(truth: List[int], pred: List[int]) -> np.ndarray:
+    pos = {v: i for i, v in enumerate(LABELS)}
+    m = np.zeros((len(LABELS), len(LABELS)), dtype=np.int64)
+    for t, p in zip(truth, pred):
+        m[pos[t], pos.get(p, pos[-3])] += 1
+    return m
+
+
+def print_confusion(m: np.ndarray):
+    head = "true\\pred " + " ".join(f"{v:>5}" for v in LABELS)
+    print(head)
+    for i, v in enumerate(LABELS):
+        if m[i].sum() == 0:
+            continue
+        print(f"{v:>9} " + " ".join(f"{x:>5}" for x in m[i]))
+
+
+def per_cell_classifier(detection: Detection) -> Callable[[List[np.ndarray]], List[int]]:
+    def run(cells_rgb):
+        out = []
+        for cell_rgb in cells_rgb:
+            cell_bgr = cv2.cvtColor(cell_rgb, cv2.COLOR_RGB2BGR)
+            _, num, _ = detection.classify_cell(cell_bgr)
+            out.append(int(num))
+        return out
+    return run
+
+
+def bench(
+    classify: Callable[[List[np.ndarray]], List[int]],
+    boards: int = 20,
+    rows: int = 14,
+    cols: int = 18,
+    cell: int = 30,
+    seed: int = 0,
+    scale: float = 1.0,
+    hover_prob: float = 0.03,
+    jitter_px: int = 2,
+) -> Dict:
+    """
+    Рендерит boards синтетических полей и прогоняет classify(список клеток RGB) -> список num.
+    Рендер — вне замера. Возвращает метрики и матрицу ошибок.
+    """
+    sprites = load_digit_sprites()
+    truth: List[int] = []
+    pred: List[int] = []
+    t_total = 0.0
+
+    for b in range(boards):
+        img, labels = render_board(rows, cols, cell=cell, seed=seed + b, sprites=sprites,
+                                   jitter_px=jitter_px, scale=scale, hover_prob=hover_prob)
+
+        t0 = time.perf_counter()
+        grid = split_grid_np(img, cols, rows)
+        cells = [cell_rgb for row in grid for cell_rgb in row]
+        out = classify(cells)
+        t_total += time.perf_counter() - t0
+
+        truth.extend(v for row in labels for v in row)
+        pred.extend(out)
+
+    return metrics(truth, pred, t_total, boards)
+
+
+def metrics(truth: List[int], pred: List[int], t_total: float, boards: int) -> Dict:
+    n = len(truth)
+    m = confusion_matrix(truth, pred)
+    return {
+        "cells": n,
+        "accuracy": float(np.trace(m)) / n if n else 0.0,
+        "us_per_cell": 1e6 * t_total / max(1, n),
+        "cells_per_sec": n / t_total if t_total > 0 else 0.0,
+        "boards_per_sec": boards / t_total if t_total > 0 else 0.0,
+        "confusion": m,
+    }
+
+
+def bench_recording(classify: Callable[[List[np.ndarray]], List[int]], path: str,
+                    max_ticks: Optional[int] = None) -> Dict:
+    """
+    Те же метрики на клетках из записи Recorder (реальные кадры, а не отрендеренные из спрайтов).
+    Истина — meta.field тика: что бот тогда принял (распознавание + согласованность с solver'ом);
+    тики без field и клетки вне -1..8 (OPEN_UNKNOWN и т.п.) пропускаются.
+    """
+    from adapters.vision.recorder import Recording
+
+    truth: List[int] = []
+    pred: List[int] = []
+    t_total = 0.0
+    boards = 0
+    with Recording(path) as rec:
+        for i, tick in enumerate(rec):
+            if max_ticks is not None and i >= max_ticks:
+                break
+            field = tick.meta.get("field")
+            if field is None:
+                continue
+            grid = split_grid_np(tick.img, tick.meta["cols"], tick.meta["rows"])
+            cells, labels = [], []
+            for r, row in enumerate(grid):
+                for c, cell in enumerate(row):
+                    if -1 <= field[r][c] <= 8:
+                        cells.append(cell)
+                        labels.append(field[r][c])
+
+            t0 = time.perf_counter()
+            out = classify(cells)
+            t_total += time.perf_counter() - t0
+            truth.extend(labels)
+            pred.extend(out)
+            boards += 1
+    return metrics(truth, pred, t_total, boards)
+
+
+def report(name: str, res: Dict):
+    print(f"[{name}] cells={res['cells']} acc={res['accuracy']:.4f} "
+          f"{res['us_per_cell']:.1f}us/cell {res['cells_per_sec']:.0f} cells/s {res['boards_per_sec']:.1f} boards/s")
+    print_confusion(res["confusion"])
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Detection accuracy/latency on synthetic boards")
+    ap.add_argument("--boards", type=int, default=20)
+    ap.add_argument("--rows", type=int, default=14)
+    ap.add_argument("--cols", type=int, default=18)
+    ap.add_argument("--cell", type=int, default=30)
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--hover", type=float, default=0.03)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--recording", default=None, help="добавить клетки из записи в прототипы centroid")
+    ap.add_argument("--eval-recording", nargs="+", default=None, metavar="RUN.msrec",
+                    help="мерить ещё и на клетках записей Recorder (не на тех, что в --recording)")
+    ap.add_argument("--max-ticks", type=int, default=None, help="тиков на запись для --eval-recording")
+    args = ap.parse_args(argv)
+
+    kw = dict(boards=args.boards, rows=args.rows, cols=args.cols, cell=args.cell,
+              seed=args.seed, scale=args.scale, hover_prob=args.hover)
+
+    detection = Detection()
+    report("rules classify_cell", bench(per_cell_classifier(detection), **kw))
+
+    centroid = Detection(backend="centroid")
+    if args.recording:
+        centroid.centroid.add_recording(args.recording)
+    report("centroid classify_cells", bench(lambda cells: [int(n) for n, _ in centroid.classify_cells(cells)], **kw))
+
+    # синтетика рендерится из тех же спрайтов, что прототипы centroid, — реальные кадры обязательны
+    for path in args.eval_recording or ():
+        if args.recording and os.path.abspath(path) == os.path.abspath(args.recording):
+            print(f"WARN: {path} is also the centroid prototype source, its accuracy is optimistic")
+        report(f"rules @ {path}", bench_recording(per_cell_classifier(detection), path, args.max_ticks))
+        report(f"centroid @ {path}", bench_recording(
+            lambda cells: [int(n) for n, _ in centroid.classify_cells(cells)], path, args.max_ticks))
+
+
+if __name__ == "__main__":
+    # python -m utils.bench_detection --boards 50 --scale 0.8
+    # python -m utils.bench_detection --eval-recording run1.msrec run2.msrec   # + реальные клетки из записей
+    main()
@@ -0,0 +1,79 @@
+"""
+Сквозной бенчмарк Selenium-адаптера на локальной реплике (replica/index.html) в headless Chromium:
+discover_board_meta -> PageTick (клики + settle + классы, один round trip) -> read_board_from_snapshot -> solver_step.
+
+    python -m utils.bench_selenium_e2e --games 20 --seed 1 [--rows 16 --cols 30 --mines 99]
+
+С одинаковым --seed раскладки мин те же, так что прогоны до/после изменения сравнимы.
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+from typing import Dict, List
+
+from adapters.selenium.create_driver import make_driver
+from adapters.selenium.session import play_game
+from utils.replica_server import serve
+from utils.tracing import histograms_from_samples, print_histograms
+
+
+def bench(games: int = 20, seed: int = 1, rows: int = 16, cols: int = 30, mines: int = 99,
+          headless: bool = True) -> dict:
+    server, base = serve()
+    url = f"{base}?rows={rows}&cols={cols}&mines={mines}&seed={seed}"
+    profile_dir = tempfile.mkdtemp(prefix="ms_bench_")
+    driver = make_driver(url, profile_dir=profile_dir, headless=headless, stealth=False)
+
+    results = []
+    samples: Dict[str, List[float]] = {}
+    try:
+        for g in range(games):
+            res = play_game(driver, new_game=g > 0)
+            results.append(res)
+            for name, xs in res.samples.items():
+                samples.setdefault(name, []).extend(xs)
+    finally:
+        driver.quit()
+        server.shutdown()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    return {
+        "url": url,
+        "games": results,
+        "stages": histograms_from_samples(samples),
+    }
+
+
+def report(res: dict):
+    games = res["games"]
+    if not games:
+        return
+    wins = sum(1 for g in games if g.status == "win")
+    durs = sorted(g.duration * 1000.0 for g in games)
+    ticks = [g.ticks for g in games]
+
+    print(f"replica: {res['url']}")
+    print(f"games={len(games)} wins={wins} ({wins / len(games) * 100:.1f}%) "
+          f"ticks/game mean={statistics.mean(ticks):.1f} clicks/game mean={statistics.mean(g.clicks for g in games):.1f} "
+          f"round trips/tick={sum(g.round_trips for g in games) / max(1, sum(ticks)):.2f}")
+    print(f"per game (ms): p50={statistics.median(durs):.1f} "
+          f"p95={durs[min(len(durs) - 1, int(0.95 * len(durs)))]:.1f} max={durs[-1]:.1f}")
+    print_histograms(res["stages"], "per tick")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="bench_selenium_e2e")
+    ap.add_argument("--games", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--rows", type=int, default=16)
+    ap.add_argument("--cols", type=int, default=30)
+    ap.add_argument("--mines", type=int, default=99)
+    ap.add_argument("--headed", action="store_true")
+    a = ap.parse_args(argv)
+
+    report(bench(a.games, a.seed, a.rows, a.cols, a.mines, headless=not a.headed))
+
+
+if __name__ == "__main__":
+    main()
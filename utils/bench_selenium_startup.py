@@ -0,0 +1,92 @@
+"""
+Время от «хочу играть» до первого тика (PageTick) на локальной реплике, по способам получить драйвер:
+
+  cold       — make_driver как раньше: свежий Chrome + CDP stealth + переход на страницу
+  cold-plain — то же без stealth (реплике он не нужен)
+  pool       — BrowserPool прогрет заранее: acquire + discover + первый тик
+  attach     — Chrome уже запущен с --remote-debugging-port: подключение + discover + первый тик
+
+    python -m utils.bench_selenium_startup --repeat 3
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from adapters.selenium.create_driver import BrowserPool, detach_driver, launch_browser, make_driver
+from adapters.selenium.discovery import discover_board_meta
+from adapters.selenium.tick import PageTick
+from utils.replica_server import serve
+
+
+def first_tick(driver) -> float:
+    """discover + первый round trip; возвращает момент, когда тик вернулся."""
+    meta = discover_board_meta(driver)
+    if PageTick(driver, meta.rows, meta.cols).run() is None:
+        raise RuntimeError("first tick returned no board")
+    return time.perf_counter()
+
+
+def bench(repeat: int = 3, port: int = 9333, headless: bool = True) -> Dict[str, List[float]]:
+    server, url = serve()
+    out: Dict[str, List[float]] = {"cold": [], "cold-plain": [], "pool": [], "attach": []}
+    try:
+        for stealth, name in ((True, "cold"), (False, "cold-plain")):
+            for _ in range(repeat):
+                profile_dir = tempfile.mkdtemp(prefix="ms_startup_")
+                t0 = time.perf_counter()
+                driver = make_driver(url, profile_dir=profile_dir, headless=headless, stealth=stealth)
+                try:
+                    out[name].append(first_tick(driver) - t0)
+                finally:
+                    driver.quit()
+                    shutil.rmtree(profile_dir, ignore_errors=True)
+
+        with BrowserPool(size=1, url=url, headless=headless, refill=False) as pool:
+            # пул прогревается заранее (пока бот занят другим) — это время не считаем
+            pool.release(pool.acquire(timeout=60))
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                driver = pool.acquire(url, timeout=60)
+                try:
+                    out["pool"].append(first_tick(driver) - t0)
+                finally:
+                    pool.release(driver)
+
+        profile_dir = tempfile.mkdtemp(prefix="ms_attach_")
+        proc = launch_browser(port, profile_dir=profile_dir, url=url, headless=headless)
+        try:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                driver = make_driver(url, debugger_address=f"127.0.0.1:{port}", stealth=False)
+                out["attach"].append(first_tick(driver) - t0)
+                detach_driver(driver)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+            shutil.rmtree(profile_dir, ignore_errors=True)
+    finally:
+        server.shutdown()
+    return out
+
+
+def report(res: Dict[str, List[float]]):
+    print("launch -> first tick:")
+    for name, xs in res.items():
+        if xs:
+            print(f"  {name:<10} min={min(xs):6.2f}s median={statistics.median(xs):6.2f}s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="bench_selenium_startup")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--port", type=int, default=9333, help="remote debugging port для attach")
+    ap.add_argument("--headed", action="store_true")
+    a = ap.parse_args(argv)
+    report(bench(repeat=a.repeat, port=a.port, headless=not a.headed))
+
+
+if __name__ == "__main__":
+    main()
@@ -70,5 +70,31 @@ def calibrate_from_alpha(images_dir="images", digits=range(1, 9),
 
     print(f"\nSaved: {out_json}")
 
+    out_bin = os.path.splitext(out_json)[0] + ".bin"
+    save_ranges_bin(result, out_bin)
+    print(f"Saved: {out_bin}")
+
+# Бинарный артефакт для Detection: MAGIC + строки uint8 [digit, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi].
+# Грузится одним np.fromfile, без json и без сборки массивов по элементам.
+RANGES_MAGIC = b"HSV1"
+
+def save_ranges_bin(ranges_json: dict, out_bin: str):
+    rows = []
+    for k, lst in ranges_json.items():
+        for item in lst:
+            rows.append([int(k), *item["low"], *item["high"]])
+
+    with open(out_bin, "wb") as f:
+        f.write(RANGES_MAGIC)
+        f.write(np.array(rows, dtype=np.uint8).reshape(-1, 7).tobytes())
+
+def compile_json(json_path="digit_hsv_ranges.json"):
+    """Только пересобрать .bin из уже откалиброванного json (без картинок)."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    out_bin = os.path.splitext(json_path)[0] + ".bin"
+    save_ranges_bin(raw, out_bin)
+    print(f"Saved: {out_bin}")
+
 if __name__ == "__main__":
     calibrate_from_alpha(images_dir="../images", out_json="digit_hsv_ranges.json")
@@ -0,0 +1,306 @@
+"""
+Корпус позиций, которые видел solver_step: компактный бинарный append-only файл с дедупликацией.
+
+    python -m utils.corpus stats positions.mspos
+    python -m utils.corpus check positions.mspos     # прогнать тот же solver по корпусу и сравнить с записанным
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Формат (little-endian):
+#   MAGIC
+#   запись = REC_HEADER + имя solver'а (profile_len байт utf-8) + клетки (по 4 бита, ceil(rows*cols/2) байт)
+#            + n_actions * ACTION
+# Имя solver'а — профиль core/strategies.py ("balanced") или "guess:<политика>" для solver_step(guess=...):
+# check прогоняет позицию тем же solver'ом, что её записал.
+# Клетка: 0 закрыта, 1..9 открыта (field = код-1), 10 закрыта и отмечена миной (mine=1),
+# 11 кликнута, цифра ещё не прочитана (OPEN_UNKNOWN; в корпус не попадает, нужна solver-сервису).
+# Хвост, недописанный при падении, reader пропускает.
+# Версия 1 — без имени solver'а (REC_HEADER_V1), читается как профиль balanced.
+MAGIC = b"MSPOS\x00\x02\x00"
+MAGIC_V1 = b"MSPOS\x00\x01\x00"
+REC_HEADER = struct.Struct("<IQHHHHB")  # rec_len, pos_hash, rows, cols, total_mines, n_actions, profile_len
+REC_HEADER_V1 = struct.Struct("<IQHHHH")
+V1_PROFILE = "balanced"
+ACTION = struct.Struct("<HHBf")        # r, c, kind (0 safe, 1 guess), risk (nan — нет)
+NO_TOTAL = 0xFFFF
+
+CODE_CLOSED = 0
+CODE_MINE = 10
+CODE_OPEN_UNKNOWN = 11
+
+
+def pack_cells(field: List[List[int]], mine: List[List[int]]) -> bytes:
+    """field/mine -> по 4 бита на клетку (две клетки в байте, младшая тетрада — чётная клетка)."""
+    f = np.asarray(field, dtype=np.int8).reshape(-1)
+    m = np.asarray(mine, dtype=np.int8).reshape(-1)
+    codes = np.where(f >= 0, f + 1,
+                     np.where(m == 1, CODE_MINE, np.where(f == -2, CODE_OPEN_UNKNOWN, CODE_CLOSED))).astype(np.uint8)
+    if codes.size % 2:
+        codes = np.append(codes, np.uint8(0))
+    return (codes[0::2] | (codes[1::2] << 4)).tobytes()
+
+
+def unpack_cells(buf, rows: int, cols: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Обратно в (field, mine) int8 формы (rows, cols)."""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    codes = np.empty(b.size * 2, dtype=np.int8)
+    codes[0::2] = b & 0x0F
+    codes[1::2] = b >> 4
+    codes = codes[:rows * cols].reshape(rows, cols)
+
+    opened = (codes >= 1) & (codes <= 9)
+    pending = codes == CODE_OPEN_UNKNOWN
+    field = np.where(opened, codes - 1, np.where(pending, -2, -1)).astype(np.int8)
+    mine = np.where(opened | pending, 0, np.where(codes == CODE_MINE, 1, -1)).astype(np.int8)
+    return field, mine
+
+
+def position_hash(cells: bytes, rows: int, cols: int, total_mines: Optional[int]) -> int:
+    h = hashlib.blake2b(digest_size=8)
+    h.update(struct.pack("<HHH", rows, cols, NO_TOTAL if total_mines is None else total_mines))
+    h.update(cells)
+    return int.from_bytes(h.digest(), "little")
+
+
+@dataclass
+class Position:
+    pos_hash: int
+    field: np.ndarray          # int8 (rows, cols), -1 закрыта
+    mine: np.ndarray           # int8 (rows, cols), -1/0/1 как в BoardState
+    total_mines: Optional[int]
+    actions: List[Tuple[int, int, int, float]]  # (r, c, kind, risk)
+    profile: str = V1_PROFILE  # чем решали: профиль или "guess:<политика>"
+
+    @property
+    def rows(self) -> int:
+        return self.field.shape[0]
+
+    @property
+    def cols(self) -> int:
+        return self.field.shape[1]
+
+
+class CorpusWriter:
+    """
+    Дописывает позиции в конец файла. Одинаковые позиции (по хешу клеток+размеров+числа мин)
+    пишутся один раз, в том числе между запусками: хеши уже записанного читаются при открытии.
+    profile — имя solver'а для записей (профиль или "guess:<политика>"), add(profile=...) — на запись.
+    В файл версии 1 дописываем только balanced: другое имя там не сохранить.
+    """
+
+    def __init__(self, path: str, profile: str = V1_PROFILE):
+        self.path = path
+        self.profile = profile
+        self.seen: Set[int] = set()
+        self.version = 2
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with Corpus(path) as old:
+                self.seen.update(old.hashes())
+                end = old.end
+                self.version = old.version
+            # недописанный хвост обрезаем, чтобы новые записи не уехали за мусор
+            if end < os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            self._f = open(path, "ab")
+        else:
+            self._f = open(path, "wb")
+            self._f.write(MAGIC)
+            self._f.flush()
+        self.written = 0
+        self.duplicates = 0
+
+    def add(self, field, mine, total_mines: Optional[int], actions, packed: Optional[bytes] = None,
+            profile: Optional[str] = None) -> bool:
+        """
+        packed — pack_cells(field, mine), снятый ДО solver_step (solver дописывает mine на месте).
+        profile — имя solver'а этой позиции (None — self.profile).
+        Возвращает True, если позиция новая и записана.
+        """
+        name = (profile or self.profile).encode("utf-8")
+        if len(name) > 255:
+            raise ValueError(f"solver name too long for the corpus: {profile or self.profile}")
+        if self.version == 1 and name != V1_PROFILE.encode():
+            raise ValueError(f"{self.path} is a version 1 corpus (profile {V1_PROFILE} only); "
+                             f"write {profile or self.profile} positions to a new file")
+        rows = len(field)
+        cols = len(field[0]) if rows else 0
+        cells = packed if packed is not None else pack_cells(field, mine)
+        h = position_hash(cells, rows, cols, total_mines)
+        if h in self.seen:
+            self.duplicates += 1
+            return False
+        self.seen.add(h)
+
+        acts = b"".join(
+            ACTION.pack(a.r, a.c, 0 if a.risk is None else 1, float("nan") if a.risk is None else a.risk)
+            for a in actions
+        )
+        total = NO_TOTAL if total_mines is None else total_mines
+        if self.version == 1:
+            self._f.write(REC_HEADER_V1.pack(REC_HEADER_V1.size + len(cells) + len(acts), h, rows, cols,
+                                             total, len(actions)))
+        else:
+            self._f.write(REC_HEADER.pack(REC_HEADER.size + len(name) + len(cells) + len(acts), h, rows, cols,
+                                          total, len(actions), len(name)))
+            self._f.write(name)
+        self._f.write(cells)
+        self._f.write(acts)
+        self._f.flush()
+        self.written += 1
+        return True
+
+    def close(self):
+        self._f.close()
+
+    def report(self):
+        print(f"corpus: +{self.written} positions, {self.duplicates} duplicates skipped -> {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Corpus:
+    """Чтение через mmap: индекс смещений строится по заголовкам, клетки распаковываются лениво."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._mm[:len(MAGIC)]
+        if magic == MAGIC:
+            self.version, self._header = 2, REC_HEADER
+        elif magic == MAGIC_V1:
+            self.version, self._header = 1, REC_HEADER_V1
+        else:
+            raise ValueError(f"Not a position corpus: {path}")
+        self.offsets: List[int] = []
+        self.end = self._build_index()
+
+    def _build_index(self) -> int:
+        pos = len(MAGIC)
+        end = len(self._mm)
+        header = self._header
+        while pos + header.size <= end:
+            rec_len = header.unpack_from(self._mm, pos)[0]
+            if rec_len < header.size or pos + rec_len > end:
+                break  # недописанный хвост
+            self.offsets.append(pos)
+            pos += rec_len
+        return pos
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def hashes(self) -> Iterator[int]:
+        for pos in self.offsets:
+            yield self._header.unpack_from(self._mm, pos)[1]
+
+    def __getitem__(self, i: int) -> Position:
+        pos = self.offsets[i]
+        if self.version == 1:
+            _, h, rows, cols, total, n_act = REC_HEADER_V1.unpack_from(self._mm, pos)
+            profile, p = V1_PROFILE, pos + REC_HEADER_V1.size
+        else:
+            _, h, rows, cols, total, n_act, n_name = REC_HEADER.unpack_from(self._mm, pos)
+            p = pos + REC_HEADER.size
+            profile = self._mm[p:p + n_name].decode("utf-8", "replace")
+            p += n_name
+        n_bytes = (rows * cols + 1) // 2
+        field, mine = unpack_cells(self._mm[p:p + n_bytes], rows, cols)
+        p += n_bytes
+        actions = [ACTION.unpack_from(self._mm, p + k * ACTION.size) for k in range(n_act)]
+        return Position(h, field, mine, None if total == NO_TOTAL else total, actions, profile)
+
+    def __iter__(self) -> Iterator[Position]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def solver_for(profile: str):
+    """Имя solver'а из корпуса -> callable(field, mine, total_mines=...)."""
+    from core.solver import solver_step
+    from core.strategies import make_solver
+
+    if profile.startswith("guess:"):
+        guess = profile[len("guess:"):]
+        return lambda field, mine, total_mines=None: solver_step(field, mine, total_mines=total_mines, guess=guess)
+    return make_solver(profile)
+
+
+def check(path: str, verbose: bool = False) -> dict:
+    """Регрессия: каждая позиция корпуса — тем же solver'ом (профилем), что её записал, против записанных действий."""
+    solvers = {}
+    n = diff = errors = 0
+    t_solve = 0.0
+    with Corpus(path) as corpus:
+        for p in corpus:
+            n += 1
+            field, mine = p.field.tolist(), p.mine.tolist()
+            solver = solvers.get(p.profile)
+            if solver is None:
+                solver = solvers[p.profile] = solver_for(p.profile)
+            t0 = time.perf_counter()
+            try:
+                actions, _ = solver(field, mine, total_mines=p.total_mines)
+            except RuntimeError as e:
+                errors += 1
+                if verbose:
+                    print(f"[{p.pos_hash:016x}] WARN:", e)
+                continue
+            finally:
+                t_solve += time.perf_counter() - t0
+
+            got = sorted((a.r, a.c) for a in actions)
+            want = sorted((r, c) for r, c, _, _ in p.actions)
+            if got != want:
+                diff += 1
+                if verbose:
+                    print(f"[{p.pos_hash:016x}] {p.cols}x{p.rows} {p.profile}: recorded={want} now={got}")
+
+    return {"positions": n, "changed": diff, "errors": errors,
+            "solve_ms": 1000 * t_solve / max(1, n)}
+
+
+if __name__ == "__main__":
+    cmd, path = sys.argv[1], sys.argv[2]
+    if cmd == "stats":
+        with Corpus(path) as c:
+            sizes = {}
+            profiles = {}
+            for p in c:
+                sizes[(p.cols, p.rows)] = sizes.get((p.cols, p.rows), 0) + 1
+                profiles[p.profile] = profiles.get(p.profile, 0) + 1
+            print(f"{len(c)} positions, {os.path.getsize(path)} bytes (format v{c.version})")
+            for (w, h), k in sorted(sizes.items()):
+                print(f"  {w}x{h}: {k}")
+            for name, k in sorted(profiles.items()):
+                print(f"  {name}: {k}")
+    elif cmd == "check":
+        res = check(path, verbose="-v" in sys.argv[3:])
+        print(f"positions={res['positions']} changed={res['changed']} errors={res['errors']} "
+              f"solve={res['solve_ms']:.2f}ms/position")
+    else:
+        raise SystemExit(f"unknown command: {cmd}")
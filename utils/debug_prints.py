@@ -1,14 +1,22 @@
-from tabulate import tabulate
+import queue
+import threading
+import time
+
+
+def _tabulate(rows):
+    # tabulate грузим только когда реально печатаем поле — не на старте
+    from tabulate import tabulate
+    return tabulate(rows, tablefmt="plain", numalign="right")
 
 
 def print_field(field):
     print("FIELD:")
-    print(tabulate(field, tablefmt="plain", numalign="right"))
+    print(_tabulate(field))
 
 
 def print_mines(mine):
     print("\nINTERNAL MINES (1=mine, 0=not mine, -1=unknown):")
-    print(tabulate(mine, tablefmt="plain", numalign="right"))
+    print(_tabulate(mine))
 
 
 def print_actions(actions, limit=10):
@@ -24,3 +32,51 @@ def print_actions(actions, limit=10):
         else:
             print(a.kind, "cell", (a.r, a.c), f"risk={risk:.3f}", "-", a.reason)
 
+
+
+class BoardDumper:
+    """
+    Печать поля/мин/actions вне горячего цикла: не чаще раза в interval секунд,
+    в отдельном потоке. submit() на «лишних» тиках ничего не копирует и сразу выходит.
+    """
+
+    def __init__(self, interval: float = 1.0, enabled: bool = True, action_limit: int = 10):
+        self.interval = interval
+        self.enabled = enabled
+        self.action_limit = action_limit
+        self._last = 0.0
+        self._q = queue.Queue(maxsize=1)
+        self._thread = None
+        if enabled:
+            self._thread = threading.Thread(target=self._loop, name="board-dumper", daemon=True)
+            self._thread.start()
+
+    def submit(self, field, mine, actions):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+
+        item = ([row[:] for row in field], [row[:] for row in mine], list(actions))
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            pass  # прошлый дамп ещё печатается — этот пропускаем
+
+    def _loop(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            field, mine, actions = item
+            print_field(field)
+            print_mines(mine)
+            print_actions(actions, limit=self.action_limit)
+
+    def close(self):
+        if self._thread is not None:
+            self._q.put(None)
+            self._thread.join(timeout=2.0)
+            self._thread = None
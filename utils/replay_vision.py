@@ -0,0 +1,93 @@
+import sys
+import time
+
+import cv2  # noqa: F401  (update_board_from_grid его использует — грузим заранее, вне замера)
+
+from adapters.vision.board_reader import update_board_from_grid
+from adapters.vision.detect_fields import Detection
+from adapters.vision.get_field import split_grid_np
+from adapters.vision.recorder import Recording
+from core.solver import solver_step
+from core.types import BoardState
+
+
+def replay(path: str, detection: Detection = None, verbose: bool = False):
+    """
+    Прогоняет запись через split_grid_np -> update_board_from_grid -> solver_step
+    без экрана и мыши, так быстро как позволяет CPU.
+    Кеш открытых клеток ведём как в живом цикле (field/mine с прошлого тика).
+    Возвращает dict со временем по стадиям и числом расхождений с записью.
+    """
+    detection = detection or Detection()
+    t_split = t_read = t_solve = 0.0
+    mismatched_ticks = []
+    errors = 0
+    board = None
+
+    with Recording(path) as rec:
+        n = len(rec)
+        t_start = time.perf_counter()
+
+        for i in range(n):
+            tick = rec[i]
+            meta = tick.meta
+            cols, rows = meta["cols"], meta["rows"]
+
+            t0 = time.perf_counter()
+            grid = split_grid_np(tick.img, cols, rows)
+            t1 = time.perf_counter()
+            first = board is None or (board.rows, board.cols) != (rows, cols)
+            cur = BoardState.new(rows, cols, meta.get("total_mines")) if first else board
+            try:
+                update_board_from_grid(grid, detection, cur, strict=first)
+            except RuntimeError as e:
+                errors += 1
+                if verbose:
+                    print(f"[tick {tick.tick}] WARN:", e)
+                continue
+            board = cur
+            field, mine = board.field, board.mine
+            t2 = time.perf_counter()
+
+            actions = []
+            if any(v != -1 for row in field for v in row):
+                try:
+                    actions, _ = solver_step(field, mine, total_mines=board.total_mines, tiles=board.tiles)
+                except RuntimeError as e:
+                    errors += 1
+                    if verbose:
+                        print(f"[tick {tick.tick}] WARN:", e)
+            t3 = time.perf_counter()
+
+            t_split += t1 - t0
+            t_read += t2 - t1
+            t_solve += t3 - t2
+
+            if meta["field"] is not None and field != meta["field"]:
+                mismatched_ticks.append(tick.tick)
+                if verbose:
+                    print(f"[tick {tick.tick}] field differs from recording")
+
+            if verbose:
+                print(f"[tick {tick.tick}] actions={len(actions)}")
+
+        total = time.perf_counter() - t_start
+
+    return {
+        "ticks": n,
+        "total_sec": total,
+        "ticks_per_sec": n / total if total > 0 else 0.0,
+        "split_ms": 1000 * t_split / max(1, n),
+        "read_ms": 1000 * t_read / max(1, n),
+        "solve_ms": 1000 * t_solve / max(1, n),
+        "errors": errors,
+        "mismatched_ticks": mismatched_ticks,
+    }
+
+
+if __name__ == "__main__":
+    # python -m utils.replay_vision run.msrec [-v]
+    res = replay(sys.argv[1], verbose="-v" in sys.argv[2:])
+    print(f"ticks={res['ticks']} total={res['total_sec']:.3f}s -> {res['ticks_per_sec']:.1f} ticks/s")
+    print(f"per tick: split={res['split_ms']:.2f}ms read={res['read_ms']:.2f}ms solve={res['solve_ms']:.2f}ms")
+    print(f"errors={res['errors']} mismatched={len(res['mismatched_ticks'])}")
@@ -0,0 +1,38 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+
+# replica/ в корне проекта — не зависит от текущего каталога
+REPLICA_DIR = Path(__file__).resolve().parent.parent / "replica"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory: Optional[str] = None, port: int = 0, host: str = "127.0.0.1") -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Раздаёт статическую копию страницы игры (replica/index.html) с localhost в фоновом потоке.
+    directory — что раздавать (None — REPLICA_DIR); port=0 — свободный порт. Возвращает (server, url); остановить — server.shutdown().
+    """
+    handler = functools.partial(_QuietHandler, directory=str(directory or REPLICA_DIR))
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="replica-http", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/index.html"
+
+
+if __name__ == "__main__":
+    # python -m utils.replica_server [port]
+    import sys
+    import time
+
+    srv, url = serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print("Serving replica:", url)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,105 @@
+import time
+from dataclasses import dataclass, field as dc_field
+from typing import Any, Callable, List, Optional
+
+
+@dataclass
+class SettleResult:
+    settled: bool       # False — вышли по таймауту
+    changed: bool       # клетки хоть раз отличались от baseline
+    elapsed: float
+    polls: int
+
+
+@dataclass
+class SettleStats:
+    times: List[float] = dc_field(default_factory=list)
+    polls: int = 0
+    timeouts: int = 0
+    unchanged: int = 0   # клики, после которых клетки так и не изменились
+
+    def add(self, res: SettleResult):
+        self.times.append(res.elapsed)
+        self.polls += res.polls
+        if not res.settled:
+            self.timeouts += 1
+        if not res.changed:
+            self.unchanged += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.times:
+            return 0.0
+        xs = sorted(self.times)
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+    def report(self, name: str = "settle"):
+        n = len(self.times)
+        mean = sum(self.times) / n if n else 0.0
+        print(f"{name}: n={n} mean={mean * 1000:.1f}ms p50={self.percentile(0.5) * 1000:.1f}ms "
+              f"p95={self.percentile(0.95) * 1000:.1f}ms max={max(self.times, default=0.0) * 1000:.1f}ms "
+              f"timeouts={self.timeouts} unchanged={self.unchanged} polls={self.polls}")
+
+
+class SettleDetector:
+    """
+    Ждём, пока клетки после пачки кликов перестанут меняться, вместо фиксированного sleep.
+
+    probe() -> сигнатура только кликнутых клеток (пиксели / классы), same(a, b) — сравнение.
+    Логика:
+      1) пока сигнатура равна baseline (до клика) — игра ещё не отреагировала, ждём;
+         если так и не изменилась за change_timeout — клик ничего не открыл, выходим;
+      2) после первого изменения ждём stable_polls одинаковых опросов подряд (анимация закончилась).
+    Общий потолок — timeout.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        change_timeout: float = 0.15,
+        poll_interval: float = 0.005,
+        stable_polls: int = 2,
+        same: Optional[Callable[[Any, Any], bool]] = None,
+    ):
+        self.timeout = timeout
+        self.change_timeout = change_timeout
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.same = same or (lambda a, b: a == b)
+        self.stats = SettleStats()
+
+    def wait(self, probe: Callable[[], Any], baseline: Any = None) -> SettleResult:
+        t0 = time.perf_counter()
+        polls = 0
+        prev = baseline
+        changed = baseline is None
+        stable = 0
+
+        while True:
+            cur = probe()
+            polls += 1
+            now = time.perf_counter() - t0
+
+            if not changed:
+                if not self.same(cur, baseline):
+                    changed = True
+                    prev = cur
+                elif now >= self.change_timeout:
+                    res = SettleResult(settled=True, changed=False, elapsed=now, polls=polls)
+                    break
+            elif prev is not None and self.same(cur, prev):
+                stable += 1
+                if stable >= self.stable_polls:
+                    res = SettleResult(settled=True, changed=True, elapsed=now, polls=polls)
+                    break
+            else:
+                stable = 0
+                prev = cur
+
+            if now >= self.timeout:
+                res = SettleResult(settled=False, changed=changed, elapsed=now, polls=polls)
+                break
+
+            time.sleep(self.poll_interval)
+
+        self.stats.add(res)
+        return res
@@ -0,0 +1,282 @@
+"""
+Симулятор игры без браузера и экрана: те же правила, что в replica/index.html
+(мины раскладываются после первого клика, первая клетка и её соседи пустые, flood-fill по нулям).
+Меряет раунды capture -> solve на игру и win rate для разных политик догадок solver_step.
+
+    python -m utils.sim_game --games 500 --rows 16 --cols 30 --mines 99 --guess info min-risk
+    python -m utils.sim_game --games 100 --stats      # + сводка SolverStats по правилам
+    python -m utils.sim_game --games 200 --profile fast balanced strongest
+    python -m utils.sim_game --games 20 --check-bad   # профили и solver_step на позициях с неверной цифрой
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from core.solver import GUESS_PICKERS, SolverStats, neighbors8, solver_step
+from core.strategies import PROFILES, Solver, make_solver
+from core.types import BoardState
+from utils.corpus import CorpusWriter, pack_cells
+
+
+class SimGame:
+    def __init__(self, rows: int, cols: int, mines: int, seed: Optional[int] = None):
+        self.rows, self.cols = rows, cols
+        self.n_mines = min(mines, rows * cols - 9)
+        self.rng = random.Random(seed)
+        self.mines: List[List[bool]] = [[False] * cols for _ in range(rows)]
+        self.opened: List[List[bool]] = [[False] * cols for _ in range(rows)]
+        self.placed = False
+        self.status = "playing"
+        self.left = rows * cols - self.n_mines
+
+    def _place(self, r0: int, c0: int):
+        banned = {(r0, c0), *neighbors8(r0, c0, self.rows, self.cols)}
+        pool = [(r, c) for r in range(self.rows) for c in range(self.cols) if (r, c) not in banned]
+        for r, c in self.rng.sample(pool, self.n_mines):
+            self.mines[r][c] = True
+        self.placed = True
+
+    def count(self, r: int, c: int) -> int:
+        return sum(self.mines[rr][cc] for rr, cc in neighbors8(r, c, self.rows, self.cols))
+
+    def open(self, r: int, c: int) -> List[Tuple[int, int, int]]:
+        """Открыть клетку; возвращает открывшиеся (r, c, value)."""
+        if self.status != "playing" or self.opened[r][c]:
+            return []
+        if not self.placed:
+            self._place(r, c)
+        if self.mines[r][c]:
+            self.status = "loss"
+            return []
+
+        out = []
+        stack = [(r, c)]
+        while stack:
+            rr, cc = stack.pop()
+            if self.opened[rr][cc]:
+                continue
+            self.opened[rr][cc] = True
+            self.left -= 1
+            v = self.count(rr, cc)
+            out.append((rr, cc, v))
+            if v == 0:
+                stack.extend(nb for nb in neighbors8(rr, cc, self.rows, self.cols) if not self.opened[nb[0]][nb[1]])
+
+        if self.left == 0:
+            self.status = "win"
+        return out
+
+
+def play(rows: int, cols: int, mines: int, seed: Optional[int] = None, guess: str = "min-risk",
+         max_rounds: int = 5000, tile: Optional[int] = None,
+         corpus: Optional[CorpusWriter] = None,
+         stats: Optional[List[SolverStats]] = None,
+         solver: Optional[Solver] = None) -> Tuple[str, int, int]:
+    """
+    Одна игра. Раунд = один вызов solver_step + все его клики (как тик в живом цикле).
+    tile — как в BoardState.new (None — авто, 0 — без тайлов).
+    corpus — дописывать каждую позицию и ответ solver'а (синтетический корпус для бенчмарков).
+    stats — если задан список, сюда добавляется SolverStats каждого раунда.
+    solver — make_solver(profile) вместо solver_step(guess=...).
+    Возвращает (status, rounds, guesses).
+    """
+    game = SimGame(rows, cols, mines, seed)
+    board = BoardState.new(rows, cols, game.n_mines, tile=tile)
+    rounds = guesses = 0
+    # имя solver'а для корпуса: check прогонит позицию им же
+    policy = solver.profile if solver is not None else f"guess:{guess}"
+
+    while game.status == "playing" and rounds < max_rounds:
+        packed = pack_cells(board.field, board.mine) if corpus is not None else None
+        st = SolverStats() if stats is not None else None
+        if solver is not None:
+            actions, _ = solver(board.field, board.mine, total_mines=board.total_mines, tiles=board.tiles, stats=st)
+        else:
+            actions, _ = solver_step(board.field, board.mine, total_mines=board.total_mines, guess=guess,
+                                     tiles=board.tiles, stats=st)
+        if st is not None:
+            stats.append(st)
+        if corpus is not None:
+            corpus.add(board.field, board.mine, board.total_mines, actions, packed=packed, profile=policy)
+        rounds += 1
+        if not actions:
+            return "stuck", rounds, guesses
+
+        for a in actions:
+            if "MIN-RISK" in a.reason:
+                guesses += 1
+            opened = game.open(a.r, a.c)
+            for r, c, v in opened:
+                board.field[r][c] = v
+                board.mine[r][c] = 0
+            board.touch(opened)
+            if game.status != "playing":
+                break
+
+    return game.status, rounds, guesses
+
+
+def simulate(games: int, rows: int, cols: int, mines: int, guess: str = "min-risk", seed: int = 0,
+             tile: Optional[int] = None, corpus: Optional[CorpusWriter] = None,
+             solver_stats: bool = False, profile: Optional[str] = None) -> dict:
+    """
+    Одни и те же сиды для всех политик — раскладки совпадают (первый клик может отличаться).
+    solver_stats — собрать SolverStats всех раундов и вернуть сводку в "solver" (summarize_stats).
+    profile — играть профилем core/strategies.py (guess тогда не используется).
+    """
+    solver = make_solver(profile) if profile else None
+    stats: Optional[List[SolverStats]] = [] if solver_stats else None
+    wins = 0
+    rounds: List[int] = []
+    win_rounds: List[int] = []
+    guesses: List[int] = []
+    t0 = time.perf_counter()
+    for g in range(games):
+        status, n, k = play(rows, cols, mines, seed=seed + g, guess=guess, tile=tile, corpus=corpus,
+                            stats=stats, solver=solver)
+        wins += status == "win"
+        if status == "win":
+            win_rounds.append(n)
+        rounds.append(n)
+        guesses.append(k)
+    return {
+        "guess": profile or guess,
+        "games": games,
+        "win_rate": wins / games if games else 0.0,
+        "rounds_mean": statistics.mean(rounds) if rounds else 0.0,
+        "rounds_win_mean": statistics.mean(win_rounds) if win_rounds else 0.0,
+        "guesses_mean": statistics.mean(guesses) if guesses else 0.0,
+        "sec": time.perf_counter() - t0,
+        "solver": summarize_stats(stats) if stats is not None else None,
+    }
+
+
+def check_bad(games: int, rows: int, cols: int, mines: int, seed: int = 0) -> int:
+    """
+    Регрессия bad= (неверно распознанная цифра): в позициях сим-игр одна открытая цифра
+    подменяется так, чтобы получилось противоречие, и каждый профиль сверяется с solver_step:
+    ни одной safe-клетки рядом с противоречием, а balanced даёт те же действия.
+    Возвращает число расхождений (печатает первые).
+    """
+    rng = random.Random(seed)
+    solvers = {name: make_solver(name) for name in PROFILES}
+    positions = failures = 0
+
+    for g in range(games):
+        game = SimGame(rows, cols, mines, seed + g)
+        board = BoardState.new(rows, cols, game.n_mines, tile=0)
+        while game.status == "playing":
+            digits = [(r, c) for r in range(rows) for c in range(cols) if 1 <= board.field[r][c] <= 8]
+            if digits:
+                r0, c0 = rng.choice(digits)
+                nbs = neighbors8(r0, c0, rows, cols)
+                field = [row[:] for row in board.field]
+                # больше мин, чем закрытых соседей, — противоречие при любом раскладе
+                field[r0][c0] = min(8, sum(board.field[r][c] < 0 for r, c in nbs) + 1)
+                ref_bad = set()
+                ref, _ = solver_step(field, [row[:] for row in board.mine], total_mines=board.total_mines,
+                                     bad=ref_bad)
+                if ref_bad:
+                    positions += 1
+                    ref_safe = [(a.r, a.c) for a in ref if a.risk is None]
+                    for name, solver in solvers.items():
+                        bad = set()
+                        acts, _ = solver(field, [row[:] for row in board.mine], total_mines=board.total_mines,
+                                         bad=bad)
+                        near = {nb for r, c in bad | ref_bad for nb in neighbors8(r, c, rows, cols)}
+                        unsafe = [(a.r, a.c) for a in acts if a.risk is None and (a.r, a.c) in near]
+                        same = name != "balanced" or [(a.r, a.c) for a in acts if a.risk is None] == ref_safe
+                        if unsafe or not same:
+                            failures += 1
+                            if failures <= 5:
+                                print(f"  game {g} misread ({r0},{c0})={field[r0][c0]}: {name} "
+                                      f"opens {unsafe or [(a.r, a.c) for a in acts]}, solver_step {ref_safe}")
+
+            actions, _ = solver_step(board.field, board.mine, total_mines=board.total_mines)
+            if not actions:
+                break
+            for a in actions:
+                opened = game.open(a.r, a.c)
+                for r, c, v in opened:
+                    board.field[r][c] = v
+                    board.mine[r][c] = 0
+                if game.status != "playing":
+                    break
+
+    print(f"check bad: {positions} positions with a misread digit, {failures} mismatches "
+          f"({', '.join(PROFILES)} vs solver_step)")
+    return failures
+
+
+def summarize_stats(stats: List[SolverStats]) -> dict:
+    """Сводка по раундам: доля времени и выводов по правилам, итерации, компоненты, догадки."""
+    n = len(stats)
+    if not n:
+        return {}
+    t_total = sum(s.t_total for s in stats) or 1e-9
+    return {
+        "rounds": n,
+        "guess_rounds": sum(s.guess for s in stats) / n,
+        "ms_mean": 1000 * t_total / n,
+        "ms_max": 1000 * max(s.t_total for s in stats),
+        "share": {name: sum(getattr(s, "t_" + name) for s in stats) / t_total
+                  for name in ("build", "basic", "subset", "guess")},
+        "iters_mean": statistics.mean(s.iters for s in stats),
+        "iters_max": max(s.iters for s in stats),
+        "basic": (sum(s.basic_safe for s in stats), sum(s.basic_mines for s in stats)),
+        "subset": (sum(s.subset_safe for s in stats), sum(s.subset_mines for s in stats)),
+        "component_max": max((s.components[0] for s in stats if s.components), default=0),
+    }
+
+
+def print_solver_stats(sm: dict):
+    share = " ".join(f"{k}={v * 100:.0f}%" for k, v in sm["share"].items())
+    print(f"    solver: {sm['ms_mean']:.2f}ms/round (max {sm['ms_max']:.1f}) time {share}; "
+          f"iters mean={sm['iters_mean']:.2f} max={sm['iters_max']}; "
+          f"safe/mines basic={sm['basic'][0]}/{sm['basic'][1]} subset={sm['subset'][0]}/{sm['subset'][1]}; "
+          f"guess rounds={sm['guess_rounds'] * 100:.1f}%; largest component={sm['component_max']}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="sim_game")
+    ap.add_argument("--games", type=int, default=200)
+    ap.add_argument("--rows", type=int, default=16)
+    ap.add_argument("--cols", type=int, default=30)
+    ap.add_argument("--mines", type=int, default=99)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--guess", nargs="+", default=list(GUESS_PICKERS), choices=list(GUESS_PICKERS))
+    ap.add_argument("--tile", type=int, default=None, help="размер тайла; 0 — без тайлов, по умолчанию авто")
+    ap.add_argument("--corpus", default=None, help="дописать все позиции в корпус (.mspos)")
+    ap.add_argument("--stats", action="store_true", help="сводка SolverStats: время и выводы по правилам")
+    ap.add_argument("--profile", nargs="+", default=None, choices=list(PROFILES),
+                    help="сравнить профили solver'а вместо политик --guess")
+    ap.add_argument("--check-bad", action="store_true",
+                    help="регрессия: профили против solver_step на позициях с неверной цифрой")
+    a = ap.parse_args(argv)
+
+    if a.check_bad:
+        raise SystemExit(1 if check_bad(a.games, a.rows, a.cols, a.mines, seed=a.seed) else 0)
+
+    corpus = CorpusWriter(a.corpus) if a.corpus else None
+
+    print(f"{a.games} games {a.cols}x{a.rows}, mines={a.mines}")
+    runs = [(None, p) for p in a.profile] if a.profile else [(g, None) for g in a.guess]
+    for guess, profile in runs:
+        res = simulate(a.games, a.rows, a.cols, a.mines, guess=guess or "min-risk", seed=a.seed, tile=a.tile,
+                       corpus=corpus, solver_stats=a.stats, profile=profile)
+        guess = res["guess"]
+        print(f"  {guess:<9} win_rate={res['win_rate'] * 100:5.1f}% rounds/game={res['rounds_mean']:6.2f} "
+              f"rounds/win={res['rounds_win_mean']:6.2f} "
+              f"guesses/game={res['guesses_mean']:5.2f} ({res['sec']:.1f}s)")
+        if res["solver"]:
+            print_solver_stats(res["solver"])
+
+    if corpus is not None:
+        corpus.close()
+        corpus.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+"""
+Локальный solver-сервис: один долгоживущий процесс с тёплыми worker-процессами и кэшем позиций,
+к нему ходят несколько ботов (vision / selenium / farm) вместо своего solver'а в каждом.
+
+    python -m utils.solver_service serve                          # /tmp/ms-solver.sock, воркеров = CPU
+    python -m utils.solver_service serve --address 127.0.0.1:8765 --workers 4
+    python -m cli selenium --solver-service /tmp/ms-solver.sock
+    python -m utils.solver_service bench --clients 16 --games 40  # нагрузка: сервис в фоне + N клиентов
+
+Протокол (little-endian), сообщение = u32 длина + тело:
+  запрос = REQ (req_id, rows, cols, total_mines | NO_TOTAL, профиль, флаги, тайл | 0) + pack_cells (4 бита на клетку)
+  ответ  = RESP (req_id, status, changed, n_actions, n_mines, n_bad) +
+           n_actions * ACTION (r, c, reason, risk) + (n_mines + n_bad) * CELL (r, c);
+           status != 0 — вместо этого текст ошибки (utf-8)
+n_mines — клетки, которые solver отметил минами (клиент дописывает их в свой mine),
+n_bad — противоречивые клетки (только с флагом FLAG_BAD, иначе противоречие — ошибка, как в solver_step).
+тайл — размер тайла TileIndex клиента: сервис строит свой индекс того же размера (0 — без тайлов).
+"""
+import argparse
+import collections
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.solver import SolverStats
+from core.strategies import PROFILES, make_solver
+from core.tiles import TileIndex
+from core.types import Action
+from utils.corpus import NO_TOTAL, pack_cells, unpack_cells
+from utils.tracing import histograms_from_samples
+
+DEFAULT_ADDRESS = "/tmp/ms-solver.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+
+LEN = struct.Struct("<I")
+REQ = struct.Struct("<IHHHBBB")      # req_id, rows, cols, total_mines, profile, flags, tile
+RESP = struct.Struct("<IBBHHH")      # req_id, status, changed, n_actions, n_mines, n_bad
+ACTION = struct.Struct("<HHBf")      # r, c, reason (индекс в REASONS), risk (nan — нет)
+CELL = struct.Struct("<HH")
+
+FLAG_BAD = 1                         # собрать противоречивые клетки (bad=set()) вместо ошибки
+STATUS_OK, STATUS_ERROR = 0, 1
+MAX_MESSAGE = 1 << 20
+
+PROFILE_IDS = {name: i for i, name in enumerate(PROFILES)}
+PROFILE_NAMES = list(PROFILES)
+REASONS = ("SAFE (deterministic)", "SAFE (enumeration)",
+           "MIN-RISK guess", "MIN-RISK guess (info)", "MIN-RISK guess (exact)")
+REASON_IDS = {r: i for i, r in enumerate(REASONS)}
+
+
+def parse_address(address: str):
+    """'/path/to.sock' или 'unix:/path' — Unix socket; 'host:port' — TCP."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[5:]
+    if "/" in address or not address.rpartition(":")[2].isdigit():
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    """n байт или None, если соединение закрылось до первого байта."""
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            if buf:
+                raise ConnectionError("connection closed mid-message")
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_message(sock: socket.socket) -> Optional[bytes]:
+    head = recv_exact(sock, LEN.size)
+    if head is None:
+        return None
+    (n,) = LEN.unpack(head)
+    if n > MAX_MESSAGE:
+        raise ConnectionError(f"message too large: {n} bytes")
+    body = recv_exact(sock, n)
+    if body is None:
+        raise ConnectionError("connection closed mid-message")
+    return body
+
+
+def send_message(sock: socket.socket, body: bytes):
+    sock.sendall(LEN.pack(len(body)) + body)
+
+
+def encode_request(req_id: int, field, mine, total_mines: Optional[int], profile: str, collect_bad: bool,
+                   tile: int = 0) -> bytes:
+    rows = len(field)
+    cols = len(field[0]) if rows else 0
+    if not 0 <= tile <= 255:
+        raise ValueError(f"tile size {tile} does not fit the protocol (max 255)")
+    return REQ.pack(req_id, rows, cols, NO_TOTAL if total_mines is None else total_mines,
+                    PROFILE_IDS[profile], FLAG_BAD if collect_bad else 0, tile) + pack_cells(field, mine)
+
+
+def _error(message: str) -> bytes:
+    """Тело ответа без req_id (его подставляет соединение)."""
+    return struct.pack("<BBHHH", STATUS_ERROR, 0, 0, 0, 0) + message.encode("utf-8", "replace")
+
+
+# -------------------- воркер --------------------
+
+_SOLVERS: Dict[str, object] = {}
+
+
+def _warm_worker():
+    """Инициализатор воркера: импорты и solver'ы всех профилей создаются один раз на процесс."""
+    for name in PROFILES:
+        _SOLVERS[name] = make_solver(name)
+
+
+def _init_worker():
+    # Ctrl+C получает вся группа процессов; воркеры останавливает сервер (shutdown), а не сигнал
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _warm_worker()
+
+
+def solve_packed(body: bytes) -> bytes:
+    """Запрос без req_id -> тело ответа без req_id. Выполняется в воркере (или inline при workers=0)."""
+    try:
+        rows, cols, total, profile_id, flags, tile = struct.unpack_from("<HHHBBB", body)
+        if profile_id >= len(PROFILE_NAMES):
+            return _error(f"unknown profile id {profile_id}")
+        if len(body) != REQ.size - 4 + (rows * cols + 1) // 2:
+            return _error("bad request size")
+        name = PROFILE_NAMES[profile_id]
+        solver = _SOLVERS.get(name)
+        if solver is None:
+            solver = _SOLVERS[name] = make_solver(name)
+
+        f, m = unpack_cells(body[REQ.size - 4:], rows, cols)
+        field, mine = f.tolist(), m.tolist()
+        bad: Optional[Set[Tuple[int, int]]] = set() if flags & FLAG_BAD else None
+        # индекс клиента живёт между тиками, здесь — свежий на каждый запрос (все тайлы грязные)
+        tiles = TileIndex(rows, cols, tile) if tile else None
+        actions, changed = solver(field, mine, total_mines=None if total == NO_TOTAL else total,
+                                  tiles=tiles, bad=bad)
+    except (RuntimeError, ValueError) as e:
+        return _error(str(e))
+    except Exception as e:
+        # любой сбой solver'а — ответ-ошибка, а не упавший воркер/соединение
+        return _error(f"{type(e).__name__}: {e}")
+
+    new_mines = [(r, c) for r in range(rows) for c in range(cols) if mine[r][c] == 1 and m[r, c] != 1]
+    bad_cells = sorted(bad) if bad else []
+    out = [struct.pack("<BBHHH", STATUS_OK, int(bool(changed)), len(actions), len(new_mines), len(bad_cells))]
+    for a in actions:
+        out.append(ACTION.pack(a.r, a.c, REASON_IDS.get(a.reason, 0 if a.risk is None else 2),
+                               float("nan") if a.risk is None else a.risk))
+    out.extend(CELL.pack(r, c) for r, c in new_mines + bad_cells)
+    return b"".join(out)
+
+
+# -------------------- сервер --------------------
+
+class ServiceStats:
+    """Латентность запросов (от получения до отправки ответа) и пропускная способность."""
+
+    def __init__(self, window: int = 100_000):
+        self._lock = threading.Lock()
+        self.latencies: "collections.deque[float]" = collections.deque(maxlen=window)  # мс
+        self.t_start = time.perf_counter()
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.clients = 0
+        self.max_clients = 0
+        self._last = (self.t_start, 0)      # (момент, requests) прошлого report — темп за интервал
+
+    def add(self, dt: float, hit: bool, error: bool):
+        with self._lock:
+            self.latencies.append(dt * 1000.0)
+            self.requests += 1
+            self.cache_hits += hit
+            self.errors += error
+
+    def connected(self, delta: int):
+        with self._lock:
+            self.clients += delta
+            self.max_clients = max(self.max_clients, self.clients)
+
+    def summary(self) -> dict:
+        with self._lock:
+            lat = list(self.latencies)
+            elapsed = time.perf_counter() - self.t_start
+            out = {"requests": self.requests, "rps": self.requests / elapsed if elapsed > 0 else 0.0,
+                   "cache_hits": self.cache_hits, "errors": self.errors,
+                   "clients": self.clients, "max_clients": self.max_clients}
+        h = histograms_from_samples({"latency": lat}).get("latency")
+        if h is not None:
+            out.update(p50_ms=h["p50"], p95_ms=h["p95"], p99_ms=h["p99"], max_ms=h["max"])
+        return out
+
+    def report(self, name: str = "solver service"):
+        s = self.summary()
+        now = time.perf_counter()
+        t_last, n_last = self._last
+        self._last = (now, s["requests"])
+        recent = (s["requests"] - n_last) / (now - t_last) if now > t_last else 0.0
+        line = (f"{name}: {s['requests']} requests, {s['rps']:.0f} req/s overall, {recent:.0f} req/s since last report, "
+                f"cache hits {s['cache_hits'] / max(1, s['requests']) * 100:.1f}%, errors {s['errors']}, "
+                f"clients {s['clients']} (max {s['max_clients']})")
+        if "p50_ms" in s:
+            line += f", latency p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms"
+        print(line)
+
+
+class SolverService:
+    """
+    Сервер: поток на соединение (клиенты держат соединение открытым и шлют запросы по одному),
+    решение — в пуле тёплых процессов (workers=0 — в потоке соединения, без IPC).
+    Ответы кэшируются по байтам запроса (LRU на cache_size позиций): одна и та же позиция
+    от разных ботов/после повтора решается один раз.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, workers: Optional[int] = None, cache_size: int = 4096):
+        self.address = address
+        self.workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        self.cache_size = int(cache_size)
+        self.stats = ServiceStats()
+        self._cache: "collections.OrderedDict[bytes, bytes]" = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def _solve(self, body: bytes) -> Tuple[bytes, bool]:
+        with self._cache_lock:
+            hit = self._cache.get(body)
+            if hit is not None:
+                self._cache.move_to_end(body)
+                return hit, True
+        try:
+            out = self._run(body)
+        except Exception as e:
+            out = _error(f"{type(e).__name__}: {e}")
+        if out[0] == STATUS_OK and self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[body] = out
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return out, False
+
+    def _run(self, body: bytes) -> bytes:
+        pool = self._pool
+        if pool is None:
+            return solve_packed(body)
+        try:
+            return pool.submit(solve_packed, body).result()
+        except BrokenProcessPool:
+            # воркер умер (OOM, kill) — пул больше не принимает задачи; поднимаем новый, запрос не повторяем
+            self._restart_pool(pool)
+            raise
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker)
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self._pool is not broken:
+                return  # другое соединение уже пересоздало
+            print("solver service: worker pool broke, restarting it")
+            broken.shutdown(wait=False)
+            self._pool = self._new_pool()
+
+    def handle(self, sock: socket.socket):
+        self.stats.connected(+1)
+        try:
+            while True:
+                msg = recv_message(sock)
+                if msg is None:
+                    return
+                t0 = time.perf_counter()
+                if len(msg) < REQ.size:
+                    out, hit = _error("short request"), False
+                else:
+                    out, hit = self._solve(msg[4:])
+                send_message(sock, msg[:4] + out)
+                self.stats.add(time.perf_counter() - t0, hit, out[0] != STATUS_OK)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.stats.connected(-1)
+
+    def start(self) -> "SolverService":
+        """Поднять пул и начать слушать в фоновом потоке; остановить — shutdown()."""
+        if self.workers > 0:
+            self._pool = self._new_pool()
+            # воркеры стартуют лениво — прогреваем все сразу, чтобы первый клиент не платил за запуск
+            for f in [self._pool.submit(_warm_worker) for _ in range(self.workers)]:
+                f.result()
+        else:
+            _warm_worker()
+
+        service = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                service.handle(self.request)
+
+        family, addr = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.unlink(addr)
+            server = socketserver.ThreadingUnixStreamServer(addr, Handler)
+        else:
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            server = socketserver.ThreadingTCPServer(addr, Handler)
+            server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.address = f"{server.server_address[0]}:{server.server_address[1]}"
+        server.daemon_threads = True
+        self._server = server
+        threading.Thread(target=server.serve_forever, name="solver-service", daemon=True).start()
+        return self
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            family, addr = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(addr):
+                os.unlink(addr)
+            self._server = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# -------------------- клиент --------------------
+
+class SolverClient:
+    """
+    Тонкий клиент: вызывается так же, как Solver / solver_step, и подставляется в vision_main /
+    selenium_main вместо make_solver(profile). Мины, найденные сервисом, дописываются в mine,
+    противоречия — в bad. Из tiles уходит только размер тайла: индекс сервис строит сам.
+    Ошибки сервиса и связи — RuntimeError, как противоречия у solver_step.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, profile: str = "balanced", timeout: float = 5.0):
+        if profile not in PROFILE_IDS:
+            raise ValueError(f"Unknown solver profile: {profile} (known: {', '.join(PROFILES)})")
+        self.address = address
+        self.profile = profile
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.latencies: List[float] = []  # round trip, мс
+
+    def _connect(self) -> socket.socket:
+        family, addr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(addr)
+        except OSError as e:
+            sock.close()
+            raise RuntimeError(f"solver service at {self.address} is not reachable: {e}")
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _roundtrip(self, body: bytes) -> bytes:
+        # одна попытка переподключиться: сервис мог перезапуститься между тиками
+        for attempt in (0, 1):
+            if self._sock is None:
+                self._sock = self._connect()
+            try:
+                send_message(self._sock, body)
+                out = recv_message(self._sock)
+                if out is None:
+                    raise ConnectionError("connection closed by solver service")
+                return out
+            except (ConnectionError, OSError) as e:
+                self.close()
+                if attempt:
+                    raise RuntimeError(f"solver service at {self.address}: {e}")
+        raise AssertionError("unreachable")
+
+    def __call__(self, field, mine, total_mines: Optional[int] = None, tiles=None,
+                 bad: Optional[Set[Tuple[int, int]]] = None,
+                 stats: Optional[SolverStats] = None) -> Tuple[List[Action], bool]:
+        t0 = time.perf_counter()
+        with self._lock:
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            req_id = self._next_id
+            out = self._roundtrip(encode_request(req_id, field, mine, total_mines, self.profile, bad is not None,
+                                                 tiles.tile if tiles is not None else 0))
+        dt = time.perf_counter() - t0
+        self.latencies.append(dt * 1000.0)
+        if stats is not None:
+            stats.t_total = dt
+
+        rid, status, changed, n_act, n_mines, n_bad = RESP.unpack_from(out)
+        if rid != req_id:
+            self.close()
+            raise RuntimeError(f"solver service: response id {rid} != request id {req_id}")
+        if status != STATUS_OK:
+            raise RuntimeError(out[RESP.size:].decode("utf-8", "replace"))
+
+        actions = []
+        p = RESP.size
+        for _ in range(n_act):
+            r, c, reason, risk = ACTION.unpack_from(out, p)
+            p += ACTION.size
+            actions.append(Action(kind="open", r=r, c=c, reason=REASONS[reason] if reason < len(REASONS) else "SAFE",
+                                  risk=None if risk != risk else float(risk)))
+        for k in range(n_mines + n_bad):
+            r, c = CELL.unpack_from(out, p)
+            p += CELL.size
+            if k < n_mines:
+                mine[r][c] = 1
+            elif bad is not None:
+                bad.add((r, c))
+        return actions, bool(changed)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def report(self):
+        h = histograms_from_samples({"rtt": self.latencies}).get("rtt")
+        if h is None:
+            return
+        print(f"solver service {self.address} (profile {self.profile}): {h['n']} requests, "
+              f"round trip p50={h['p50']:.2f}ms p95={h['p95']:.2f}ms")
+
+
+# -------------------- нагрузка --------------------
+
+def bench(clients: int = 8, games: int = 20, rows: int = 16, cols: int = 30, mines: int = 99,
+          profile: str = "balanced", address: Optional[str] = None, workers: Optional[int] = None,
+          cache_size: int = 4096):
+    """
+    clients потоков, каждый играет games сим-игр через сервис (свой SolverClient, своё соединение).
+    address=None — поднять сервис здесь же во временном сокете; иначе нагружать уже запущенный.
+    Сравнение — те же игры с локальным solver'ом в одном потоке.
+    """
+    from utils.sim_game import play  # только для нагрузки: sim_game тянет corpus/writer
+
+    own = None
+    if address is None:
+        address = f"/tmp/ms-solver-bench-{os.getpid()}.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:0"
+        own = SolverService(address, workers=workers, cache_size=cache_size).start()
+        address = own.address
+
+    seeds = [[k * games + g for g in range(games)] for k in range(clients)]
+    results: List[List[str]] = [[] for _ in range(clients)]
+    lats: List[List[float]] = [[] for _ in range(clients)]
+
+    def run_client(k: int):
+        client = SolverClient(address, profile=profile)
+        try:
+            for seed in seeds[k]:
+                status, _, _ = play(rows, cols, mines, seed=seed, solver=client)
+                results[k].append(status)
+        finally:
+            client.close()
+            lats[k] = client.latencies
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=run_client, args=(k,)) for k in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    lat = [x for xs in lats for x in xs]
+    wins = sum(s == "win" for rs in results for s in rs)
+    total_games = sum(len(rs) for rs in results)
+    print(f"{clients} clients x {games} games ({rows}x{cols}/{mines}, {profile}): "
+          f"{len(lat)} requests in {wall:.2f}s = {len(lat) / wall:.0f} req/s, win {wins}/{total_games}")
+    h = histograms_from_samples({"rtt": lat}).get("rtt")
+    if h is not None:
+        print(f"  client round trip p50={h['p50']:.2f}ms p95={h['p95']:.2f}ms p99={h['p99']:.2f}ms")
+    if own is not None:
+        own.stats.report()
+        own.shutdown()
+
+    # эталон: один процесс, свой solver, те же игры подряд
+    local = make_solver(profile)
+    t0 = time.perf_counter()
+    n = 0
+    for k in range(clients):
+        for seed in seeds[k]:
+            n += play(rows, cols, mines, seed=seed, solver=local)[1]
+    wall_local = time.perf_counter() - t0
+    print(f"  in-process solver, 1 thread: {n} requests in {wall_local:.2f}s = {n / wall_local:.0f} req/s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="solver_service")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="запустить сервис (Ctrl+C — стоп)")
+    sp.add_argument("--address", default=DEFAULT_ADDRESS, help="путь Unix socket или host:port")
+    sp.add_argument("--workers", type=int, default=None, help="процессов-решателей (0 — в потоках сервера)")
+    sp.add_argument("--cache", type=int, default=4096, help="позиций в LRU-кэше ответов")
+    sp.add_argument("--report-every", type=float, default=30.0, help="печатать статистику раз в N секунд (0 — нет)")
+
+    bp = sub.add_parser("bench", help="нагрузка: N параллельных клиентов играют сим-игры")
+    bp.add_argument("--clients", type=int, default=8)
+    bp.add_argument("--games", type=int, default=20, help="игр на клиента")
+    bp.add_argument("--rows", type=int, default=16)
+    bp.add_argument("--cols", type=int, default=30)
+    bp.add_argument("--mines", type=int, default=99)
+    bp.add_argument("--profile", default="balanced", choices=list(PROFILES))
+    bp.add_argument("--address", default=None, help="нагружать уже запущенный сервис")
+    bp.add_argument("--workers", type=int, default=None)
+    bp.add_argument("--cache", type=int, default=4096)
+    a = ap.parse_args(argv)
+
+    if a.cmd == "bench":
+        bench(a.clients, a.games, a.rows, a.cols, a.mines, a.profile, a.address, a.workers, a.cache)
+        return
+
+    service = SolverService(a.address, workers=a.workers, cache_size=a.cache).start()
+    print(f"solver service on {service.address}, workers={service.workers}, cache={service.cache_size}")
+    try:
+        while True:
+            time.sleep(a.report_every or 3600)
+            if a.report_every:
+                service.stats.report()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stats.report()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
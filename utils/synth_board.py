@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from adapters.vision.detect_fields import IMAGES_DIR, hex_to_rgb, load_digit_sprites  # noqa: F401  (реэкспорт: bench_detection и старые импорты)
+
+# Те же цвета, что в Detection (grass_hex / open_hex); первый — светлый оттенок шахматки
+GRASS_HEX = ("#AAD751", "#A2D149")
+OPEN_HEX = ("#E5C29F", "#D7B899")
+HOVER_RGB = np.array([255, 255, 255], dtype=np.float32)
+
+
+def random_labels(rows: int, cols: int, rng: np.random.Generator,
+                  p_closed: float = 0.35, p_empty: float = 0.35) -> List[List[int]]:
+    """-1 закрыта, 0 пустая, 1..8 цифра (цифры — с убывающей частотой, как в реальной игре)."""
+    digit_w = np.array([0.40, 0.27, 0.15, 0.09, 0.05, 0.02, 0.01, 0.01])
+    digit_w = digit_w / digit_w.sum()
+
+    out = []
+    for _ in range(rows):
+        row = []
+        for _ in range(cols):
+            u = rng.random()
+            if u < p_closed:
+                row.append(-1)
+            elif u < p_closed + p_empty:
+                row.append(0)
+            else:
+                row.append(int(rng.choice(8, p=digit_w)) + 1)
+        out.append(row)
+    return out
+
+
+def render_cell(label: int, r: int, c: int, cell: int, sprites: Dict[int, List[np.ndarray]],
+                rng: np.random.Generator, jitter_px: int = 2, hover: bool = False) -> np.ndarray:
+    parity = (r + c) % 2
+    base = hex_to_rgb(GRASS_HEX[parity] if label == -1 else OPEN_HEX[parity])
+    img = np.empty((cell, cell, 3), dtype=np.float32)
+    img[:] = base
+
+    if label >= 1:
+        variants = sprites[label]
+        spr = variants[int(rng.integers(len(variants)))]
+        spr = cv2.resize(spr, (cell, cell), interpolation=cv2.INTER_AREA)
+
+        dx, dy = (int(v) for v in rng.integers(-jitter_px, jitter_px + 1, size=2)) if jitter_px else (0, 0)
+        spr = np.roll(spr, (dy, dx), axis=(0, 1))
+
+        a = spr[:, :, 3:4]
+        img = img * (1 - a) + spr[:, :, :3] * 255.0 * a
+
+    if hover:
+        img = img * 0.85 + HOVER_RGB * 0.15
+
+    return img
+
+
+def render_board(
+    rows: int,
+    cols: int,
+    cell: int = 45,
+    labels: Optional[List[List[int]]] = None,
+    seed: Optional[int] = None,
+    sprites: Optional[Dict[int, List[np.ndarray]]] = None,
+    jitter_px: int = 2,
+    scale: float = 1.0,
+    hover_prob: float = 0.0,
+    noise: float = 0.0,
+) -> Tuple[np.ndarray, List[List[int]]]:
+    """
+    Собирает поле rows x cols из палитры травы/открытых клеток и спрайтов цифр.
+    Возвращает (RGB uint8 как у screenshot_region, разметка [rows][cols]).
+    scale — масштаб всего поля (как зум в браузере), hover_prob — доля клеток с hover-подсветкой.
+    """
+    rng = np.random.default_rng(seed)
+    sprites = sprites if sprites is not None else load_digit_sprites()
+    if labels is None:
+        labels = random_labels(rows, cols, rng)
+
+    img = np.empty((rows * cell, cols * cell, 3), dtype=np.float32)
+    for r in range(rows):
+        for c in range(cols):
+            hover = hover_prob > 0 and rng.random() < hover_prob
+            img[r * cell:(r + 1) * cell, c * cell:(c + 1) * cell] = render_cell(
+                labels[r][c], r, c, cell, sprites, rng, jitter_px=jitter_px, hover=hover
+            )
+
+    if noise > 0:
+        img += rng.normal(0.0, noise, size=img.shape).astype(np.float32)
+
+    if scale != 1.0:
+        w = int(round(cols * cell * scale))
+        h = int(round(rows * cell * scale))
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+    return np.clip(img, 0, 255).astype(np.uint8), labels
+
+
+if __name__ == "__main__":
+    arr, lab = render_board(14, 18, seed=1, hover_prob=0.05)
+    Image.fromarray(arr).save("synth_board.png")
+    print("Saved: synth_board.png")
+    for row in lab:
+        print(" ".join(f"{v:2d}" for v in row))
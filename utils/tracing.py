@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+_clock = time.perf_counter
+
+
+class Span:
+    """Контекст-менеджер одного замера. После выхода dur — длительность в секундах."""
+
+    __slots__ = ("tracer", "name", "t0", "dur")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+        self.t0 = 0.0
+        self.dur = 0.0
+
+    def __enter__(self):
+        self.t0 = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.dur = _clock() - self.t0
+        self.tracer.record(self.name, self.t0, self.dur)
+        return False
+
+
+class _NullSpan:
+    """Выключенный трейсинг: один общий объект, ничего не меряет."""
+
+    __slots__ = ()
+    dur = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Замеры стадий (capture, snapshot, parse, solve, highlight, click, ...) в кольцевом буфере
+    фиксированного размера: никаких аллокаций на тик, кроме самого Span.
+    Выключается enabled=False — тогда span() отдаёт общий _NULL_SPAN.
+    """
+
+    def __init__(self, capacity: int = 8192, enabled: bool = True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._names: List[Optional[str]] = [None] * capacity
+        self._t0 = [0.0] * capacity
+        self._dur = [0.0] * capacity
+        self._tid = [0] * capacity
+        self._i = 0
+        self._lock = threading.Lock()
+        self.origin = _clock()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name: str, t0: float, dur: float):
+        with self._lock:
+            k = self._i % self.capacity
+            self._names[k] = name
+            self._t0[k] = t0
+            self._dur[k] = dur
+            self._tid[k] = threading.get_ident()
+            self._i += 1
+
+    def clear(self):
+        with self._lock:
+            self._names = [None] * self.capacity
+            self._i = 0
+
+    def _events(self):
+        """(name, t0, dur, tid) в хронологическом порядке."""
+        with self._lock:
+            n = min(self._i, self.capacity)
+            start = self._i - n
+            out = []
+            for j in range(start, self._i):
+                k = j % self.capacity
+                out.append((self._names[k], self._t0[k], self._dur[k], self._tid[k]))
+            return out
+
+    # -------------------- агрегаты --------------------
+
+    def samples(self) -> Dict[str, List[float]]:
+        """{stage: [длительности в мс]} — сырьё для гистограмм (и для слияния между процессами)."""
+        by_name: Dict[str, List[float]] = {}
+        for name, _, dur, _ in self._events():
+            by_name.setdefault(name, []).append(dur * 1000.0)
+        return by_name
+
+    def histograms(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {n, mean, p50, p95, p99, max}} в миллисекундах, по тому что есть в буфере."""
+        return histograms_from_samples(self.samples())
+
+    def report(self, title: str = "trace"):
+        print_histograms(self.histograms(), title)
+
+    def export_chrome(self, path: str):
+        """Chrome trace JSON (chrome://tracing, Perfetto): complete-события 'X' в микросекундах."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (t0 - self.origin) * 1e6,
+                "dur": dur * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, t0, dur, tid in self._events()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def histograms_from_samples(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for name, xs in samples.items():
+        if not xs:
+            continue
+        xs = sorted(xs)
+        n = len(xs)
+
+        def pct(q):
+            return xs[min(n - 1, int(q * n))]
+
+        out[name] = {
+            "n": n,
+            "mean": sum(xs) / n,
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "max": xs[-1],
+        }
+    return out
+
+
+def print_histograms(h: Dict[str, Dict[str, float]], title: str = "trace"):
+    if not h:
+        return
+    print(f"{title} (ms):")
+    for name, s in h.items():
+        print(f"  {name:<10} n={s['n']:<6} mean={s['mean']:8.3f} p50={s['p50']:8.3f} "
+              f"p95={s['p95']:8.3f} p99={s['p99']:8.3f} max={s['max']:8.3f}")
+
+
+# общий трейсер процесса
+TRACER = Tracer()
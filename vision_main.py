@@ -1,16 +1,27 @@
 import time
-import pyautogui
+import numpy as np
+from PIL import Image
 
 from adapters.vision.detect_fields import Detection
-from adapters.vision.get_field import screenshot_region, split_grid_np
-from adapters.vision.board_reader import update_board_from_grid
-from core.solver import solver_step, Action
-from utils.debug_prints import print_field, print_mines, print_actions
-from adapters.vision.clicker import click_action
-
-pyautogui.FAILSAFE = True
+from adapters.vision.get_field import screenshot_region, screenshot_full, split_grid_np
+from adapters.vision.locator import BoardLocator
+from adapters.vision.partial import PartialCapture, paste_cells
+from adapters.vision.pipeline import VisionPipeline
+from adapters.vision.recorder import Recorder
+from adapters.vision.board_reader import reread_cells, update_board_from_grid
+from core.solver import neighbors8, Action
+from core.strategies import Solver, make_solver
+from core.types import BoardState
+from utils.debug_prints import BoardDumper, print_field
+from utils.tracing import TRACER
+from adapters.vision.clicker import click_cells
+from adapters.vision.input_backend import InputBackend, make_backend
+from adapters.vision.settle import make_cells_probe, signatures_close
+from utils.corpus import CorpusWriter, pack_cells
+from utils.settle import SettleDetector
 
 # -------------------- presets --------------------
+# preset "auto" — поле ищется на экране (BoardLocator), пресеты ниже не нужны
 
 pixel_area = {
     "small":  [735, 427, 450, 360],
@@ -27,8 +38,33 @@ field_count = {
 total_mines = {"small": 10, "medium": 40, "hard": 99}
 max_moves = {"small": 200, "medium": 800, "hard": 2000}
 
+# сколько раз перечитывать нераспознанные / противоречивые клетки, прежде чем решать без них
+REREAD_RETRIES = 3
+
 # -------------------- helpers --------------------
 
+def make_locator(detection: Detection) -> BoardLocator:
+    return BoardLocator(grab_full=screenshot_full, grass_hex=detection.grass_hex, open_hex=detection.open_hex)
+
+def get_area(preset: str, locator: BoardLocator = None):
+    """(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS) из пресета или из кеша локатора."""
+    if preset == "auto":
+        geom = locator.locate()
+        return (*geom.as_area(), geom.cols, geom.rows)
+
+    LEFT, TOP, WIDTH, HEIGHT = pixel_area[preset]
+    COLS, ROWS = field_count[preset]
+    return LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS
+
+def get_total_mines(preset: str, COLS: int, ROWS: int):
+    if preset != "auto":
+        return total_mines.get(preset)
+    # для auto узнаём пресет по размеру сетки
+    for name, (cols, rows) in field_count.items():
+        if (cols, rows) == (COLS, ROWS):
+            return total_mines.get(name)
+    return None
+
 def is_all_closed(field) -> bool:
     """True если все клетки = -1 (полностью закрытое поле)."""
     return field is not None and all(v == -1 for row in field for v in row)
@@ -43,73 +79,299 @@ def center_action(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS) -> Action:
     y = int(TOP + (r + 0.5) * cell_h)
     return Action(kind="left", r=r, c=c, reason="START: click center")
 
-def capture_and_solve(preset: str, detection: Detection, field_prev=None, mine_prev=None, save_debug=False):
+def capture_and_solve(preset: str, detection: Detection, board: BoardState = None, save_debug=False,
+                      locator: BoardLocator = None, recorder: Recorder = None, backend: InputBackend = None,
+                      corpus: CorpusWriter = None, partial: PartialCapture = None, solver: Solver = None):
     """
     1) уводим мышь
-    2) скрин -> нарезка -> распознавание (с кешем)
-    3) solver -> actions
+    2) скрин -> нарезка -> распознавание (board обновляется на месте, открытые клетки не перечитываем)
+       partial — снимать только клетки, которые могли измениться после прошлых кликов
+    3) solver -> actions (позиция и ответ solver'а — в corpus, если задан)
+    4) (опционально) пишем кадр и результат в recorder — для replay
+    Возвращает (board, actions, changes); board=None — новая доска.
     """
-    LEFT, TOP, WIDTH, HEIGHT = pixel_area[preset]
-    COLS, ROWS = field_count[preset]
+    LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = get_area(preset, locator)
 
-    # чтобы hover не портил распознавание
-    pyautogui.moveTo(1, 1)
+    # чтобы hover не портил распознавание (мышь уводим, только если она на поле)
+    if backend is not None:
+        backend.park()
+
+    area = (LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS)
+    cells = None
+    if board is None and partial is not None:
+        partial.invalidate()
+    with TRACER.span("capture"):
+        if partial is not None:
+            img, cells = partial.capture(area)
+        else:
+            img = screenshot_region(LEFT, TOP, WIDTH, HEIGHT)
+
+    # probe смотрит на периметр поля — имеет смысл только на свежем полном кадре
+    if preset == "auto" and cells is None and not locator.probe(np.asarray(img)):
+        # окно сдвинули / поменяли масштаб — полный поиск заново
+        geom = locator.locate(force=True)
+        print("Board relocated:", geom)
+        if (geom.cols, geom.rows) != (COLS, ROWS):
+            board = None
+        LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area = get_area(preset, locator)
+        img = screenshot_region(LEFT, TOP, WIDTH, HEIGHT)
+        if partial is not None:
+            partial.invalidate()
 
-    img = screenshot_region(LEFT, TOP, WIDTH, HEIGHT)
     if save_debug:
-        img.save("region.png")
+        Image.fromarray(np.asarray(img)).save("region.png")
         print("Saved: region.png")
 
-    grid = split_grid_np(img, COLS, ROWS)
-    field, mine = update_board_from_grid(grid, detection, field_prev, mine_prev)
+    def regrab(suspects):
+        # переснять только подозрительные клетки и вклеить в кадр (у partial — прямо в его кеш)
+        nonlocal img
+        if not isinstance(img, np.ndarray) or not img.flags.writeable:
+            img = np.array(img)
+        paste_cells(img, area, suspects)
+        return img
+
+    try:
+        board, actions, changes = solve_region(img, preset, detection, board, area, corpus=corpus, cells=cells,
+                                               regrab=regrab, solver=solver)
+    except Exception as e:
+        # нераспознанные цифры / противоречия — ровно те кадры, что нужны для replay
+        if recorder is not None:
+            recorder.write(img, None, None, [], COLS, ROWS, None if board is None else board.total_mines,
+                           error=str(e))
+        raise
+    if recorder is not None:
+        recorder.write(img, board.field, board.mine, actions, COLS, ROWS, board.total_mines)
+    return board, actions, changes
+
+def solve_region(img, preset: str, detection: Detection, board: BoardState, area, corpus: CorpusWriter = None,
+                 cells=None, regrab=None, solver: Solver = None):
+    """
+    нарезка -> распознавание (с кешем) -> solver, без захвата экрана.
+    solver — make_solver(profile) (core/strategies.py); None — профиль balanced.
+    cells — перечитать только эти клетки (частичный захват), None — все закрытые.
+    regrab(cells) -> кадр: переснять только эти клетки. Если задан, нераспознанные клетки и цифры,
+    на которых solver нашёл противоречие (с соседями), перечитываются до REREAD_RETRIES раз,
+    а не роняют весь тик; остальная доска решается как обычно.
+    """
+    LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area
+    solver = solver or make_solver()
+
+    # первый кадр: нераспознанная цифра (и после перечитываний) — ошибка тика, доску тогда не сохраняем
+    first = board is None
+    if first:
+        board = BoardState.new(ROWS, COLS, get_total_mines(preset, COLS, ROWS))
+
+    unread = set() if regrab is not None else None
+    with TRACER.span("parse"):
+        grid = split_grid_np(img, COLS, ROWS)
+        changes = update_board_from_grid(grid, detection, board, strict=first, only=None if first else cells,
+                                         unread=unread)
+
+    for attempt in range(REREAD_RETRIES + 1):
+        # если это самый старт (всё закрыто) — возвращаем центр-клик
+        if not unread and is_all_closed(board.field):
+            return board, [center_action(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS)], changes
+
+        # solver дописывает mine на месте — в корпус кладём позицию до него
+        packed = pack_cells(board.field, board.mine) if corpus is not None else None
+        inconsistent = set()
+        with TRACER.span("solve"):
+            actions, changed = solver(board.field, board.mine, total_mines=board.total_mines,
+                                      tiles=board.tiles, bad=inconsistent)
 
-    # если это самый старт (всё закрыто) — возвращаем центр-клик
-    if is_all_closed(field):
-        return field, mine, [center_action(LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS)]
+        suspects = set(unread or ()) | {nb for r, c in inconsistent
+                                        for nb in [(r, c), *neighbors8(r, c, ROWS, COLS)]}
+        if not suspects or regrab is None or attempt == REREAD_RETRIES:
+            break
 
-    actions, changed = solver_step(field, mine, total_mines=total_mines.get(preset))
-    return field, mine, actions
+        with TRACER.span("reread"):
+            img = regrab(suspects)
+            grid = split_grid_np(img, COLS, ROWS)
+            more, unread = reread_cells(grid, detection, board, suspects)
+        changes.extend(more)
 
-def run_game(preset: str, save_debug=False, pre_start_delay=2.0):
-    detection = Detection()
-    field = None
-    mine = None
+    if first and unread:
+        raise RuntimeError(f"Unrecognized digits at {sorted(unread)} after {REREAD_RETRIES} re-reads")
+    if inconsistent:
+        print(f"WARN: inconsistent cells {sorted(inconsistent)}; solved the rest of the board")
+
+    # недочитанные клетки (в том числе кликнутые без цифры) — позиция неполная, в корпус не пишем
+    if corpus is not None and not inconsistent and not unread:
+        corpus.add(board.field, board.mine, board.total_mines, actions, packed=packed)
+    return board, actions, changes
+
+def run_game(preset: str, save_debug=False, pre_start_delay=2.0, record_path: str = None,
+             input_backend: str = "auto", click_budget: float = 0.02,
+             dump_interval: float = 1.0, trace_path: str = None, detector: str = "rules",
+             corpus_path: str = None, partial_capture: bool = True, full_every: int = 20,
+             speculative: bool = True, profile: str = "balanced", solver_service: str = None):
+    """
+    input_backend: "auto" | "xtest" | "pyautogui" | "recording"
+    profile: профиль solver'а — "fast" | "balanced" | "strongest" (core/strategies.py)
+    solver_service: адрес solver-сервиса (utils/solver_service.py) — решать там, а не в этом процессе
+    speculative: кликаем ВСЕ безопасные клетки одного solve, на доске они помечаются OPEN_UNKNOWN
+                 (BoardState.speculate), следующий захват только узнаёт их цифры; клетка, которая
+                 на кадре всё ещё закрыта, откатывается в -1. False — как раньше, по 5 кликов за тик
+    detector: "rules" | "centroid" — бэкенд Detection
+    corpus_path: куда дописывать позиции solver'а (utils/corpus.py), с дедупликацией
+    click_budget: время на один клик целиком (вместо pre_delay/post_delay)
+    после кликов ждём не фиксированное время, а пока кликнутые клетки не перестанут меняться
+    dump_interval: печать поля не чаще раза в N секунд (0 — не печатать)
+    trace_path: куда сохранить Chrome trace JSON
+    """
+    detection = Detection(backend=detector)
+    if solver_service:
+        from utils.solver_service import SolverClient
+        solver = SolverClient(solver_service, profile)
+    else:
+        solver = make_solver(profile)
+    dumper = BoardDumper(interval=dump_interval, enabled=dump_interval > 0)
+    board = None
+    backend = make_backend(input_backend, click_budget=click_budget)
+    settle = SettleDetector(same=signatures_close)
+    locator = make_locator(detection) if preset == "auto" else None
+    recorder = Recorder(record_path) if record_path else None
+    corpus = CorpusWriter(corpus_path, profile) if corpus_path else None
+    partial = PartialCapture(full_every=full_every) if partial_capture else None
+    speculated, spec_board = [], None
+    n_speculated = n_rollbacks = 0
 
     print(f"Preset: {preset}. Switch to the browser window. Starting in {pre_start_delay} seconds...")
     time.sleep(pre_start_delay)
 
     for step in range(max_moves.get(preset, 1000)):
         try:
-            field, mine, actions = capture_and_solve(preset, detection, field, mine, save_debug=save_debug)
+            board, actions, changes = capture_and_solve(preset, detection, board, save_debug=save_debug,
+                                                        locator=locator, recorder=recorder, backend=backend,
+                                                        corpus=corpus, partial=partial, solver=solver)
         except RuntimeError as e:
             # Обычно это hover/артефакт распознавания. Просто пропускаем тик.
             print("WARN:", e)
-            time.sleep(0.05)
+            time.sleep(0.01)
             continue
 
-        print_field(field)
-        print_mines(mine)
-        print_actions(actions, limit=10)
+        if speculated and board is spec_board:
+            # клик не дошёл (или анимация не успела) — клетка на кадре закрыта, update_board её откатил
+            n_rollbacks += sum(1 for r, c in speculated if board.field[r][c] == -1)
+            speculated = []
+
+        dumper.submit(board.field, board.mine, actions)
 
         if not actions:
             print("No actions. Stop.")
-            return
+            break
 
         # Ты хотел не ограничивать actions — ок.
         # На практике можно оставить так: все безопасные клики подряд.
 
-        LEFT, TOP, WIDTH, HEIGHT = pixel_area[preset]
-        COLS, ROWS = field_count[preset]
+        LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = get_area(preset, locator)
+
+        if speculative:
+            # все безопасные клики одним залпом; угадывание — всегда одно
+            batch = [a for a in actions if a.risk is None] or actions[:1]
+        else:
+            batch = actions[:5]
+        clicked = [(a.r, a.c) for a in batch]
+
+        probe = make_cells_probe((LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS), clicked)
+        baseline = probe()
+        with TRACER.span("click"):
+            click_cells(batch, LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, backend)
+            # hover на последней клетке тоже «изменение» — уводим мышь до ожидания
+            backend.park()
+        if partial is not None:
+            # до speculate: flood_extent идёт только по закрытым клеткам
+            partial.expect(board, clicked)
+        if speculative and batch[0].risk is None:
+            board.speculate(clicked)
+            speculated, spec_board = clicked, board
+            n_speculated += len(clicked)
+        with TRACER.span("settle"):
+            settle.wait(probe, baseline)
+    else:
+        print("Reached max_moves — stop.")
+
+    dumper.close()
+    backend.report()
+    solver.report()
+    if speculative:
+        print(f"speculative: {n_speculated} cells, {n_rollbacks} rolled back")
+    settle.stats.report()
+    if partial is not None:
+        partial.report()
+    TRACER.report("vision stages")
+    if trace_path:
+        TRACER.export_chrome(trace_path)
+        print("Saved trace:", trace_path)
+
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.tick} ticks -> {record_path}")
+    if corpus is not None:
+        corpus.close()
+        corpus.report()
+
+def run_game_pipelined(preset: str, pre_start_delay=2.0, max_actions=5, settle_delay=0.02, record_path: str = None,
+                       input_backend: str = "auto", click_budget: float = 0.02, detector: str = "rules",
+                       profile: str = "balanced", solver_service: str = None):
+    """
+    То же, что run_game, но захват / распознавание+solver / клики идут в разных потоках
+    (adapters/vision/pipeline.py). Для auto-пресета геометрия берётся из кеша локатора.
+    """
+    detection = Detection(backend=detector)
+    if solver_service:
+        from utils.solver_service import SolverClient
+        solver = SolverClient(solver_service, profile)
+    else:
+        solver = make_solver(profile)
+    locator = make_locator(detection) if preset == "auto" else None
+    recorder = Recorder(record_path) if record_path else None
+    backend = make_backend(input_backend, click_budget=click_budget)
+    state = {"board": None}
+
+    print(f"Preset: {preset}. Switch to the browser window. Starting in {pre_start_delay} seconds...")
+    time.sleep(pre_start_delay)
+
+    area = get_area(preset, locator)
+    LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS = area
+
+    def grab():
+        return np.asarray(screenshot_region(LEFT, TOP, WIDTH, HEIGHT))
+
+    def solve(img):
+        try:
+            board, actions, _ = solve_region(img, preset, detection, state["board"], area, solver=solver)
+        except Exception as e:
+            if recorder is not None:
+                old = state["board"]
+                recorder.write(img, None, None, [], COLS, ROWS, None if old is None else old.total_mines,
+                               error=str(e))
+            raise
+        state["board"] = board
+        if recorder is not None:
+            recorder.write(img, board.field, board.mine, actions, COLS, ROWS, board.total_mines)
+        return actions
 
+    def execute(actions):
+        click_cells(actions, LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, backend)
 
-        for a in actions[:5]:
-            print("NEXT:", a)
-            click_action(a, LEFT, TOP, WIDTH, HEIGHT, COLS, ROWS, pre_delay=0.01, post_delay=0.01)
+    # park — чтобы hover не портил распознавание следующего кадра
+    backend.park()
+    pipe = VisionPipeline(grab, solve, execute, park=backend.park, max_actions=max_actions, settle_delay=settle_delay)
+    pipe.run(max_plans=max_moves.get(preset, 1000))
+    pipe.report()
+    backend.report()
+    solver.report()
+    if recorder is not None:
+        recorder.close()
 
-    print("Reached max_moves — stop.")
+    if state["board"] is not None:
+        print_field(state["board"].field)
 
 # -------------------- entry --------------------
 
 if __name__ == "__main__":
-    # small medium hard
+    # small medium hard auto
+    # многопоточный вариант: run_game_pipelined("medium")
+    # запись для replay: run_game("medium", record_path="run.msrec") -> python -m utils.replay_vision run.msrec
     run_game("medium", save_debug=False, pre_start_delay=2.0)